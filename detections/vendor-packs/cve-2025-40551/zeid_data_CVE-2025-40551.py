@@ -6,18 +6,26 @@ Hunts for exploitation attempts consistent with CVE-2025-40551 and related WHD/A
   - Optional WHD app logs (plain text)
   - Optional process telemetry exported to JSON (EDR/Sysmon export)
 
+Log reading and parsing come from ../zeid_data_ingest.py; this file is the WHD
+rule set (RULESET) plus its CLI.
+
 This tool does NOT exploit anything and does NOT change any systems.
 """
 
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
-import re
 import sys
-from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from zeid_data_ingest import (  # noqa: E402  (shared ingestion module one level up)
+    DEFAULT_CHUNK_MB, Finding, RuleSet, TextRecord, UriRule, WebRecord, attach_context, build_tasks,
+    chunk_bytes_for, existing_logs, iter_json_events, lowered, run_tasks, uri_matcher, write_report,
+)
 
 # Web request patterns (defensive hunting signatures)
 SUSPICIOUS_PATH_SUBSTRINGS = [
@@ -47,70 +55,38 @@ SUSPICIOUS_PROCESS_MARKERS = [
     ("toolsiq.exe", ""),
 ]
 
-IIS_FIELDS_RE = re.compile(r"^#Fields:\s*(.*)$", re.IGNORECASE)
-COMBINED_RE = re.compile(
-    r'^(?P<ip>\S+)\s+\S+\s+\S+\s+\[(?P<time>[^\]]+)\]\s+"(?P<method>\S+)\s+(?P<uri>\S+)(?:\s+\S+)?"\s+(?P<status>\d+)'
-)
+URI_RULES = [
+    UriRule("WHD_LOGINPREF_AJAXPROXY_PRIMER", "high", "LoginPref + badparam=/ajax/ pattern (AjaxProxy priming indicator)",
+            require=(lowered(SUSPICIOUS_PATH_SUBSTRINGS),) + tuple((q,) for q in lowered(SUSPICIOUS_QUERY_SUBSTRINGS))),
+    UriRule("WHD_AJAX_TO_WO_BYPASS", "high", "'/wo/' path with badparam=/ajax/ (ajax→wo sanitization bypass indicator)",
+            require=(("/helpdesk/webobjects/helpdesk.woa/wo/",), ("badparam=/ajax/",))),
+    UriRule("WHD_SUSPICIOUS_PAYLOAD_MARKERS", "high", "URI contains JSON-RPC / JNDI payload markers",
+            require=(lowered(SUSPICIOUS_PAYLOAD_MARKERS),)),
+    # lower-confidence: /ajax/ string in params without wopage
+    UriRule("WHD_AJAX_STRING_IN_PARAMS", "medium", "URI parameters contain '/ajax/' (potential bypass attempt)",
+            require=(("badparam=",), ("/ajax/",)), exclude=("wopage=",)),
+]
+URI_MATCHER = uri_matcher(URI_RULES)
 
-@dataclass
-class Finding:
-    rule_id: str
-    severity: str
-    reason: str
-    source: str
-    line_no: int
-    raw: str
-    fields: Dict[str, str]
-
-def load_text(path: Path) -> List[str]:
-    return path.read_text(encoding="utf-8", errors="replace").splitlines()
-
-def parse_iis_w3c(lines: List[str]) -> List[Dict[str, str]]:
-    fields: Optional[List[str]] = None
-    out: List[Dict[str, str]] = []
-    for ln in lines:
-        if ln.startswith("#"):
-            m = IIS_FIELDS_RE.match(ln)
-            if m:
-                fields = m.group(1).split()
-            continue
-        if not ln.strip():
-            continue
-        if not fields:
-            return []
-        parts = ln.strip().split()
-        if len(parts) < len(fields):
-            continue
-        out.append({fields[i]: parts[i] for i in range(len(fields))})
-    return out
-
-def normalize_uri(stem: str, query: str) -> str:
-    if query and query != "-":
-        return f"{stem}?{query}"
-    return stem
+def _uri_hits(uri_lower: str) -> List[UriRule]:
+    found = URI_MATCHER.find(uri_lower)
+    if not found:
+        return []
+    return [r for r in URI_RULES if r.matches(found)]
 
 def scan_uri(uri: str) -> List[Tuple[str, str, str]]:
-    u = uri.lower()
-    hits: List[Tuple[str, str, str]] = []
-    if any(p.lower() in u for p in SUSPICIOUS_PATH_SUBSTRINGS) and all(q.lower() in u for q in SUSPICIOUS_QUERY_SUBSTRINGS):
-        hits.append(("WHD_LOGINPREF_AJAXPROXY_PRIMER", "high", "LoginPref + badparam=/ajax/ pattern (AjaxProxy priming indicator)"))
-    if "/helpdesk/webobjects/helpdesk.woa/wo/" in u and "badparam=/ajax/" in u:
-        hits.append(("WHD_AJAX_TO_WO_BYPASS", "high", "'/wo/' path with badparam=/ajax/ (ajax→wo sanitization bypass indicator)"))
-    if any(m.lower() in u for m in SUSPICIOUS_PAYLOAD_MARKERS):
-        hits.append(("WHD_SUSPICIOUS_PAYLOAD_MARKERS", "high", "URI contains JSON-RPC / JNDI payload markers"))
-    # lower-confidence: /ajax/ string in params without wopage
-    if "badparam=" in u and "/ajax/" in u and "wopage=" not in u:
-        hits.append(("WHD_AJAX_STRING_IN_PARAMS", "medium", "URI parameters contain '/ajax/' (potential bypass attempt)"))
-    return hits
+    return [(r.rule_id, r.severity, r.reason) for r in _uri_hits(uri.lower())]
 
-def scan_app_log_line(line: str) -> Optional[Tuple[str, str, str]]:
-    l = line.lower()
-    if "whitelisted payload with matched keyword" in l:
+def _app_log_hit(low: str) -> Optional[Tuple[str, str, str]]:
+    if "whitelisted payload with matched keyword" in low:
         return ("WHD_WHITELIST_BYPASS_LOG", "high", "App log indicates 'whitelisted payload' processing")
-    if "ajaxproxy" in l and ("jsonrpc" in l or "json-rpc" in l):
+    if "ajaxproxy" in low and ("jsonrpc" in low or "json-rpc" in low):
         return ("WHD_AJAXPROXY_JSONRPC_LOG", "medium", "App log references AjaxProxy/JSON-RPC activity")
     return None
 
+def scan_app_log_line(line: str) -> Optional[Tuple[str, str, str]]:
+    return _app_log_hit(line.lower())
+
 def scan_process_event(evt: Dict[str, object]) -> List[Tuple[str, str, str]]:
     hits: List[Tuple[str, str, str]] = []
     image = str(evt.get("Image") or evt.get("image") or evt.get("process") or "").lower()
@@ -122,6 +98,44 @@ def scan_process_event(evt: Dict[str, object]) -> List[Tuple[str, str, str]]:
             hits.append(("WHD_POSTEXP_BEHAVIOR", sev, f"Process pattern match: {proc} {marker}".strip()))
     return hits
 
+def scan_web_record(source: str, rec: WebRecord) -> Sequence[Finding]:
+    return [
+        Finding(r.rule_id, r.severity, r.reason, source=source, line_no=rec.line_no, raw=rec.raw[:5000], fields=rec.fields())
+        for r in _uri_hits(rec.uri_lower)
+    ]
+
+def scan_app_record(source: str, rec: TextRecord) -> Sequence[Finding]:
+    hit = _app_log_hit(rec.lower)
+    if not hit:
+        return ()
+    rule_id, sev, reason = hit
+    return [Finding(rule_id, sev, reason, source=source, line_no=rec.line_no, raw=rec.raw[:5000], fields={})]
+
+RULESET = RuleSet("cve-2025-40551", {"web": (scan_web_record,), "app": (scan_app_record,)})
+
+def iter_proc_findings(pth: Path) -> Iterator[Finding]:
+    """Stream process events from a JSON array, ``{"events": [...]}`` or NDJSON export.
+
+    Events are decoded one at a time, so export size does not bound memory;
+    ``line_no`` is the event's position in the export.
+    """
+    if not pth.exists():
+        print(f"[!] Missing proc JSON: {pth}", file=sys.stderr)
+        return
+    try:
+        for idx, evt in iter_json_events(pth):
+            if not isinstance(evt, dict):
+                continue
+            hits = scan_process_event(evt)
+            if not hits:
+                continue
+            fields = {k: str(v) for k, v in itertools.islice(evt.items(), 30)}
+            raw = json.dumps(evt)[:5000]
+            for rule_id, sev, reason in hits:
+                yield Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=raw, fields=fields, pack=RULESET.pack)
+    except Exception as e:
+        print(f"[!] Failed to parse JSON: {pth} ({e})", file=sys.stderr)
+
 def main(argv: Optional[List[str]] = None) -> int:
     ap = argparse.ArgumentParser(
         prog="zeid_data_CVE-2025-40551",
@@ -129,97 +143,31 @@ def main(argv: Optional[List[str]] = None) -> int:
     )
     ap.add_argument("--web-log", action="append", default=[], help="Web access log file. Repeatable.")
     ap.add_argument("--app-log", action="append", default=[], help="WHD application log file. Repeatable.")
-    ap.add_argument("--proc-json", action="append", default=[], help="JSON file with process events (list or {events:[...]}). Repeatable.")
+    ap.add_argument("--proc-json", action="append", default=[], help="JSON/NDJSON file with process events (list, {events:[...]} or one event per line; streamed). Repeatable.")
     ap.add_argument("--out", default="", help="Write JSON findings to this path (default: stdout).")
+    ap.add_argument("--out-format", choices=("json", "ndjson"), default="json", help="json: one document at the end; ndjson: stream each finding as it is found, then a summary record.")
+    ap.add_argument("--workers", type=int, default=1, help="Scan log files/chunks in N processes (default: 1).")
+    ap.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_MB, help=f"Split logs larger than this into chunks for --workers (default: {DEFAULT_CHUNK_MB}).")
+    ap.add_argument("--context", type=int, default=0, help="Add N lines before and after each finding, read back from the log by byte offset (plain-text logs only; default: 0).")
     args = ap.parse_args(argv)
 
-    findings: List[Finding] = []
-
-    # Web logs
-    for lp in args.web_log:
-        pth = Path(lp)
-        if not pth.exists():
-            print(f"[!] Missing web log: {pth}", file=sys.stderr)
-            continue
-        lines = load_text(pth)
-        w3c = parse_iis_w3c(lines)
-        if w3c:
-            for idx, rec in enumerate(w3c, start=1):
-                stem = rec.get("cs-uri-stem", "")
-                query = rec.get("cs-uri-query", "")
-                uri = normalize_uri(stem, query)
-                for rule_id, sev, reason in scan_uri(uri):
-                    fields = {
-                        "c-ip": rec.get("c-ip", ""),
-                        "cs-method": rec.get("cs-method", ""),
-                        "uri": uri,
-                        "sc-status": rec.get("sc-status", ""),
-                        "time": f"{rec.get('date','')} {rec.get('time','')}".strip(),
-                    }
-                    findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=" ".join(lines[idx-1:idx])[:5000], fields=fields))
-        else:
-            for idx, line in enumerate(lines, start=1):
-                m = COMBINED_RE.match(line)
-                if m:
-                    uri = m.group("uri")
-                    for rule_id, sev, reason in scan_uri(uri):
-                        fields = {"c-ip": m.group("ip"), "cs-method": m.group("method"), "uri": uri, "sc-status": m.group("status"), "time": m.group("time")}
-                        findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=line[:5000], fields=fields))
-                else:
-                    for rule_id, sev, reason in scan_uri(line):
-                        findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=line[:5000], fields={"uri_or_line": line[:2000]}))
-
-    # App logs
-    for lp in args.app_log:
-        pth = Path(lp)
-        if not pth.exists():
-            print(f"[!] Missing app log: {pth}", file=sys.stderr)
-            continue
-        for idx, line in enumerate(load_text(pth), start=1):
-            hit = scan_app_log_line(line)
-            if hit:
-                rule_id, sev, reason = hit
-                findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=line[:5000], fields={}))
-
-    # Process telemetry
-    for jp in args.proc_json:
-        pth = Path(jp)
-        if not pth.exists():
-            print(f"[!] Missing proc JSON: {pth}", file=sys.stderr)
-            continue
-        try:
-            data = json.loads(pth.read_text(encoding="utf-8", errors="replace"))
-        except Exception as e:
-            print(f"[!] Failed to parse JSON: {pth} ({e})", file=sys.stderr)
-            continue
-        events = data.get("events") if isinstance(data, dict) else data
-        if not isinstance(events, list):
-            continue
-        for idx, evt in enumerate(events, start=1):
-            if not isinstance(evt, dict):
-                continue
-            for rule_id, sev, reason in scan_process_event(evt):
-                fields = {k: str(evt.get(k, "")) for k in list(evt.keys())[:30]}
-                findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=json.dumps(evt)[:5000], fields=fields))
-
-    payload = {
-        "tool": "zeid_data_CVE-2025-40551",
-        "finding_count": len(findings),
-        "findings": [asdict(f) for f in findings],
-        "notes": {
-            "web_signatures": {"paths": SUSPICIOUS_PATH_SUBSTRINGS, "queries": SUSPICIOUS_QUERY_SUBSTRINGS, "payload_markers": SUSPICIOUS_PAYLOAD_MARKERS},
-            "process_hunting": "Optional: provide JSON-exported process telemetry to catch common follow-on behaviors.",
-        },
-    }
+    chunk_bytes = chunk_bytes_for(args.workers, args.chunk_mb)
 
-    out_json = json.dumps(payload, indent=2, sort_keys=False)
-    if args.out:
-        Path(args.out).write_text(out_json, encoding="utf-8")
-        print(f"[+] Wrote findings JSON: {args.out}")
-    else:
-        print(out_json)
+    # Web + app logs, then process telemetry
+    tasks = build_tasks("web", existing_logs(args.web_log, "web log"), chunk_bytes, (RULESET,))
+    tasks += build_tasks("app", existing_logs(args.app_log, "app log"), chunk_bytes, (RULESET,))
+    found = itertools.chain(run_tasks(tasks, args.workers), *(iter_proc_findings(Path(jp)) for jp in args.proc_json))
+    if args.context > 0:
+        found = attach_context(found, args.context)
+
+    tool = "zeid_data_CVE-2025-40551"
+    notes = {
+        "web_signatures": {"paths": SUSPICIOUS_PATH_SUBSTRINGS, "queries": SUSPICIOUS_QUERY_SUBSTRINGS, "payload_markers": SUSPICIOUS_PAYLOAD_MARKERS},
+        "process_hunting": "Optional: provide JSON-exported process telemetry to catch common follow-on behaviors.",
+    }
 
-    print(f"[summary] Findings={len(findings)}", file=sys.stderr)
+    counts = write_report(found, args.out, args.out_format, tool, notes)
+    print(f"[summary] Findings={sum(counts.values())}", file=sys.stderr)
     return 0
 
 if __name__ == "__main__":
@@ -6,18 +6,24 @@ Hunts for exploitation attempts against SmarterMail's ConnectToHub API by scanni
   - Optional SmarterMail admin/application logs (plain text)
   - Optional egress/proxy logs (plain text) to detect SmarterMail reaching hub setup endpoints
 
+Log reading and parsing come from ../zeid_data_ingest.py; this file is the
+SmarterMail rule set (RULESET) plus its CLI.
+
 This tool does NOT exploit anything and does NOT modify systems.
 """
 
 from __future__ import annotations
 
 import argparse
-import json
-import re
 import sys
-from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from zeid_data_ingest import (  # noqa: E402  (shared ingestion module one level up)
+    DEFAULT_CHUNK_MB, Finding, RuleSet, TextRecord, UriRule, WebRecord, attach_context, build_tasks,
+    chunk_bytes_for, existing_logs, lowered, run_tasks, uri_matcher, write_report,
+)
 
 TARGET_ENDPOINTS = [
     "/api/v1/settings/sysadmin/connect-to-hub",
@@ -33,67 +39,60 @@ APP_LOG_MARKERS = [
     "SystemMount",
 ]
 
-IIS_FIELDS_RE = re.compile(r"^#Fields:\s*(.*)$", re.IGNORECASE)
-COMBINED_RE = re.compile(
-    r'^(?P<ip>\S+)\s+\S+\s+\S+\s+\[(?P<time>[^\]]+)\]\s+"(?P<method>\S+)\s+(?P<uri>\S+)(?:\s+\S+)?"\s+(?P<status>\d+)'
-)
+URI_RULES = [
+    UriRule("SMARTERMAIL_CONNECT_TO_HUB_REQUEST", "high", "Request to ConnectToHub endpoint",
+            require=(lowered(TARGET_ENDPOINTS),)),
+    UriRule("SMARTERMAIL_HUB_SETUP_PATH", "high", "Hub setup-initial-connection path observed",
+            require=(lowered(HUB_SETUP_PATHS),)),
+    UriRule("SMARTERMAIL_HUBADDRESS_PRESENT", "medium", "URI contains hubAddress parameter reference",
+            require=(("hubaddress",),)),
+]
+URI_MATCHER = uri_matcher(URI_RULES)
 
-@dataclass
-class Finding:
-    rule_id: str
-    severity: str
-    reason: str
-    source: str
-    line_no: int
-    raw: str
-    fields: Dict[str, str]
-
-def load_text(path: Path) -> List[str]:
-    return path.read_text(encoding="utf-8", errors="replace").splitlines()
-
-def parse_iis_w3c(lines: List[str]) -> List[Dict[str, str]]:
-    fields: Optional[List[str]] = None
-    out: List[Dict[str, str]] = []
-    for ln in lines:
-        if ln.startswith("#"):
-            m = IIS_FIELDS_RE.match(ln)
-            if m:
-                fields = m.group(1).split()
-            continue
-        if not ln.strip():
-            continue
-        if not fields:
-            return []
-        parts = ln.strip().split()
-        if len(parts) < len(fields):
-            continue
-        out.append({fields[i]: parts[i] for i in range(len(fields))})
-    return out
-
-def normalize_uri(stem: str, query: str) -> str:
-    if query and query != "-":
-        return f"{stem}?{query}"
-    return stem
+def _uri_hits(uri_lower: str) -> List[UriRule]:
+    found = URI_MATCHER.find(uri_lower)
+    if not found:
+        return []
+    return [r for r in URI_RULES if r.matches(found)]
 
 def scan_uri(uri: str) -> List[Tuple[str, str, str]]:
-    u = uri.lower()
-    hits: List[Tuple[str, str, str]] = []
-    if any(ep in u for ep in TARGET_ENDPOINTS):
-        hits.append(("SMARTERMAIL_CONNECT_TO_HUB_REQUEST", "high", "Request to ConnectToHub endpoint"))
-    if any(p in u for p in HUB_SETUP_PATHS):
-        hits.append(("SMARTERMAIL_HUB_SETUP_PATH", "high", "Hub setup-initial-connection path observed"))
-    if "hubaddress" in u:
-        hits.append(("SMARTERMAIL_HUBADDRESS_PRESENT", "medium", "URI contains hubAddress parameter reference"))
-    return hits
+    return [(r.rule_id, r.severity, r.reason) for r in _uri_hits(uri.lower())]
 
-def scan_app_line(line: str) -> Optional[Tuple[str, str, str]]:
-    low = line.lower()
+def _app_hit(low: str) -> Optional[Tuple[str, str, str]]:
     for m in APP_LOG_MARKERS:
         if m.lower() in low:
             sev = "high" if m.lower() in ("connecting to hub", "commandmount") else "medium"
             return ("SMARTERMAIL_APP_LOG_MARKER", sev, f"App log marker hit: {m}")
     return None
 
+def scan_app_line(line: str) -> Optional[Tuple[str, str, str]]:
+    return _app_hit(line.lower())
+
+def scan_web_record(source: str, rec: WebRecord) -> Sequence[Finding]:
+    return [
+        Finding(r.rule_id, r.severity, r.reason, source=source, line_no=rec.line_no, raw=rec.raw[:5000], fields=rec.fields())
+        for r in _uri_hits(rec.uri_lower)
+    ]
+
+def scan_app_record(source: str, rec: TextRecord) -> Sequence[Finding]:
+    hit = _app_hit(rec.lower)
+    if not hit:
+        return ()
+    rule_id, sev, reason = hit
+    return [Finding(rule_id, sev, reason, source=source, line_no=rec.line_no, raw=rec.raw[:5000], fields={})]
+
+def scan_egress_record(source: str, rec: TextRecord) -> Sequence[Finding]:
+    return [
+        Finding(r.rule_id, r.severity, r.reason, source=source, line_no=rec.line_no, raw=rec.raw[:5000], fields={"line": rec.raw[:2000]})
+        for r in _uri_hits(rec.lower) if r.rule_id == "SMARTERMAIL_HUB_SETUP_PATH"
+    ]
+
+RULESET = RuleSet("cve-2026-24423", {
+    "web": (scan_web_record,),
+    "app": (scan_app_record,),
+    "egress": (scan_egress_record,),
+})
+
 def main(argv: Optional[List[str]] = None) -> int:
     ap = argparse.ArgumentParser(
         prog="zeid_data_CVE-2026-24423",
@@ -103,80 +102,27 @@ def main(argv: Optional[List[str]] = None) -> int:
     ap.add_argument("--app-log", action="append", default=[], help="SmarterMail admin/app logs (plain text). Repeatable.")
     ap.add_argument("--egress-log", action="append", default=[], help="Egress/proxy logs (plain text). Repeatable.")
     ap.add_argument("--out", default="", help="Write JSON findings to this path (default: stdout).")
+    ap.add_argument("--out-format", choices=("json", "ndjson"), default="json", help="json: one document at the end; ndjson: stream each finding as it is found, then a summary record.")
+    ap.add_argument("--workers", type=int, default=1, help="Scan log files/chunks in N processes (default: 1).")
+    ap.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_MB, help=f"Split logs larger than this into chunks for --workers (default: {DEFAULT_CHUNK_MB}).")
+    ap.add_argument("--context", type=int, default=0, help="Add N lines before and after each finding, read back from the log by byte offset (plain-text logs only; default: 0).")
     args = ap.parse_args(argv)
 
-    findings: List[Finding] = []
-
-    # Web logs
-    for lp in args.web_log:
-        pth = Path(lp)
-        if not pth.exists():
-            print(f"[!] Missing web log: {pth}", file=sys.stderr)
-            continue
-        lines = load_text(pth)
-        w3c = parse_iis_w3c(lines)
-        if w3c:
-            for idx, rec in enumerate(w3c, start=1):
-                uri = normalize_uri(rec.get("cs-uri-stem", ""), rec.get("cs-uri-query", ""))
-                for rule_id, sev, reason in scan_uri(uri):
-                    fields = {
-                        "c-ip": rec.get("c-ip",""),
-                        "cs-method": rec.get("cs-method",""),
-                        "uri": uri,
-                        "sc-status": rec.get("sc-status",""),
-                        "time": f"{rec.get('date','')} {rec.get('time','')}".strip(),
-                    }
-                    findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=lines[idx-1][:5000], fields=fields))
-        else:
-            for idx, line in enumerate(lines, start=1):
-                m = COMBINED_RE.match(line)
-                if m:
-                    uri = m.group("uri")
-                    for rule_id, sev, reason in scan_uri(uri):
-                        fields = {"c-ip": m.group("ip"), "cs-method": m.group("method"), "uri": uri, "sc-status": m.group("status"), "time": m.group("time")}
-                        findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=line[:5000], fields=fields))
-                else:
-                    for rule_id, sev, reason in scan_uri(line):
-                        findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=line[:5000], fields={"uri_or_line": line[:2000]}))
-
-    # App logs
-    for lp in args.app_log:
-        pth = Path(lp)
-        if not pth.exists():
-            print(f"[!] Missing app log: {pth}", file=sys.stderr)
-            continue
-        for idx, line in enumerate(load_text(pth), start=1):
-            hit = scan_app_line(line)
-            if hit:
-                rule_id, sev, reason = hit
-                findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=line[:5000], fields={}))
-
-    # Egress logs
-    for lp in args.egress_log:
-        pth = Path(lp)
-        if not pth.exists():
-            print(f"[!] Missing egress log: {pth}", file=sys.stderr)
-            continue
-        for idx, line in enumerate(load_text(pth), start=1):
-            for rule_id, sev, reason in scan_uri(line):
-                if rule_id == "SMARTERMAIL_HUB_SETUP_PATH":
-                    findings.append(Finding(rule_id, sev, reason, source=str(pth), line_no=idx, raw=line[:5000], fields={"line": line[:2000]}))
-
-    payload = {
-        "tool": "zeid_data_CVE-2026-24423",
-        "finding_count": len(findings),
-        "findings": [asdict(f) for f in findings],
-        "notes": {"target_endpoints": TARGET_ENDPOINTS, "hub_setup_paths": HUB_SETUP_PATHS},
-    }
-
-    out_json = json.dumps(payload, indent=2, sort_keys=False)
-    if args.out:
-        Path(args.out).write_text(out_json, encoding="utf-8")
-        print(f"[+] Wrote findings JSON: {args.out}")
-    else:
-        print(out_json)
-
-    print(f"[summary] Findings={len(findings)}", file=sys.stderr)
+    chunk_bytes = chunk_bytes_for(args.workers, args.chunk_mb)
+
+    # Web, app and egress logs
+    tasks = build_tasks("web", existing_logs(args.web_log, "web log"), chunk_bytes, (RULESET,))
+    tasks += build_tasks("app", existing_logs(args.app_log, "app log"), chunk_bytes, (RULESET,))
+    tasks += build_tasks("egress", existing_logs(args.egress_log, "egress log"), chunk_bytes, (RULESET,))
+    found = run_tasks(tasks, args.workers)
+    if args.context > 0:
+        found = attach_context(found, args.context)
+
+    tool = "zeid_data_CVE-2026-24423"
+    notes = {"target_endpoints": TARGET_ENDPOINTS, "hub_setup_paths": HUB_SETUP_PATHS}
+
+    counts = write_report(found, args.out, args.out_format, tool, notes)
+    print(f"[summary] Findings={sum(counts.values())}", file=sys.stderr)
     return 0
 
 if __name__ == "__main__":
@@ -4,6 +4,9 @@
 Parses FortiOS/FortiGate-style event logs (key=value pairs) and flags patterns
 consistent with FortiCloud SSO abuse and post-login persistence actions.
 
+Log reading and key=value parsing come from ../zeid_data_ingest.py; this file
+is the FortiGate rule set (ruleset()), its correlation/state logic and CLI.
+
 This tool:
   - reads text log files
   - produces JSON findings
@@ -14,12 +17,27 @@ This tool:
 from __future__ import annotations
 
 import argparse
+import bisect
+import calendar
+import functools
+import glob
+import hashlib
+import ipaddress
 import json
-import re
+import os
+import socket
 import sys
-from dataclasses import dataclass, asdict
+import time
+from array import array
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from zeid_data_ingest import (  # noqa: E402  (shared ingestion module one level up)
+    DEFAULT_CHUNK_MB, Finding, KvRecord, LineCursor, NdjsonSink, RuleSet, attach_context, build_tasks,
+    chunk_bytes_for, iter_findings_at, open_log, run_tasks, sniff_compression, write_report,
+)
 
 # IOCs from Fortinet PSIRT blog (can change over time). Tunable via CLI flags.
 DEFAULT_SSO_USERS = {
@@ -39,29 +57,26 @@ DEFAULT_IP_IOCS = {
 LOGID_ADMIN_LOGIN_SUCCESS = "0100032001"
 LOGID_OBJECT_ATTR_CONFIGURED = "0100044547"
 
-KV_RE = re.compile(r'(\b[\w.-]+)=(".*?"|\S+)')
-QUOTES_MAP = str.maketrans({
-    "“": '"', "”": '"', "„": '"', "’": "'", "‘": "'", "—": "-", "–": "-",
+# Fields read by is_sso_login / is_local_admin_add and the severity logic. Other
+# fields are only parsed for lines that actually produce a finding.
+RULE_FIELDS = frozenset({
+    "logid", "logdesc", "method", "ui", "status", "action", "cfgpath", "cfgobj", "user", "srcip",
 })
+# Every rule needs one of these (case-insensitive) in the raw line: SSO logins
+# carry ui="sso(<ip>)" and admin adds carry cfgpath="system.admin". Lines
+# without them are skipped before any key=value parsing.
+CANDIDATE_MARKERS = ("sso(", "system.admin")
 
-def parse_kv_line(line: str) -> Dict[str, str]:
-    line = line.translate(QUOTES_MAP).strip()
-    out: Dict[str, str] = {}
-    for k, v in KV_RE.findall(line):
-        v = v.strip()
-        if v.startswith('"') and v.endswith('"'):
-            v = v[1:-1]
-        out[k] = v
-    return out
+# SSO login -> system.admin add correlation (per device). State is bounded: per
+# device only logins inside the window are kept (at most CORRELATE_MAX_PENDING),
+# and the least recently active devices are dropped past CORRELATE_MAX_DEVICES.
+DEFAULT_CORRELATE_MINUTES = 15
+CORRELATE_MAX_DEVICES = 4096
+CORRELATE_MAX_PENDING = 32
 
-@dataclass
-class Finding:
-    rule_id: str
-    severity: str
-    reason: str
-    line_no: int
-    raw: str
-    fields: Dict[str, str]
+def is_candidate(line: str) -> bool:
+    low = line.lower()
+    return any(m in low for m in CANDIDATE_MARKERS)
 
 def is_sso_login(evt: Dict[str, str]) -> bool:
     method = (evt.get("method") or "").lower()
@@ -86,6 +101,415 @@ def is_local_admin_add(evt: Dict[str, str]) -> bool:
         cfgpath == "system.admin" and action == "add"
     )
 
+class IpIocIndex:
+    """IP / CIDR IOC set with longest-prefix lookup on ``srcip``.
+
+    Networks are flattened at build time into sorted, non-overlapping integer
+    intervals per address family, each labelled with the most specific entry
+    covering it, so a lookup is one bisect regardless of how many IOCs are
+    loaded. Entries that do not parse are kept in ``invalid``.
+    """
+
+    def __init__(self, entries: Iterable[str]) -> None:
+        nets: Dict[int, List[Tuple[int, int, str]]] = {4: [], 6: []}
+        self.invalid: List[str] = []
+        seen = set()
+        for raw in entries:
+            entry = raw.strip()
+            if not entry or entry in seen:
+                continue
+            seen.add(entry)
+            try:
+                net = ipaddress.ip_network(entry, strict=False)
+            except ValueError:
+                self.invalid.append(entry)
+                continue
+            nets[net.version].append((int(net.network_address), int(net.broadcast_address), entry))
+        self.size = len(nets[4]) + len(nets[6])
+        self._tables = {version: self._flatten(items, version) for version, items in nets.items()}
+
+    @staticmethod
+    def _flatten(items: List[Tuple[int, int, str]], version: int) -> Tuple[Any, Any, List[str]]:
+        # CIDR blocks are either nested or disjoint: walk them outermost-first
+        # with a stack of enclosing blocks, emitting each stretch of address
+        # space under the innermost block that covers it.
+        segs: List[Tuple[int, int, str]] = []
+        stack: List[Tuple[int, str]] = []
+        pos = 0
+
+        def emit(lo: int, hi: int, label: str) -> None:
+            if lo <= hi:
+                segs.append((lo, hi, label))
+
+        for lo, hi, label in sorted(items, key=lambda t: (t[0], -t[1])):
+            while stack and stack[-1][0] < lo:
+                end, outer = stack.pop()
+                emit(pos, end, outer)
+                pos = end + 1
+            if stack:
+                emit(pos, lo - 1, stack[-1][1])
+            stack.append((hi, label))
+            pos = lo
+        while stack:
+            end, outer = stack.pop()
+            emit(pos, end, outer)
+            pos = end + 1
+
+        starts = [s[0] for s in segs]
+        ends = [s[1] for s in segs]
+        if version == 4:
+            return array("L", starts), array("L", ends), [s[2] for s in segs]
+        return starts, ends, [s[2] for s in segs]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def lookup(self, ip: str) -> Optional[str]:
+        """Return the most specific IOC entry covering ``ip`` (or None)."""
+        if not ip:
+            return None
+        try:
+            if ":" in ip:
+                version, packed = 6, socket.inet_pton(socket.AF_INET6, ip.split("%", 1)[0])
+            else:
+                version, packed = 4, socket.inet_pton(socket.AF_INET, ip)
+        except (OSError, ValueError):
+            return None
+        starts, ends, labels = self._tables[version]
+        addr = int.from_bytes(packed, "big")
+        i = bisect.bisect_right(starts, addr) - 1
+        if i >= 0 and addr <= ends[i]:
+            return labels[i]
+        return None
+
+def read_ioc_file(path: Path) -> List[str]:
+    """One IP or CIDR per line; blank lines and ``#`` comments are ignored."""
+    out: List[str] = []
+    with path.open("r", encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            entry = line.split("#", 1)[0].strip()
+            if entry:
+                out.append(entry.split()[0].rstrip(","))
+    return out
+
+IocSets = Tuple[FrozenSet[str], IpIocIndex, FrozenSet[str]]
+
+def scan_fortios_record(source: str, rec: KvRecord, iocs: IocSets) -> Sequence[Finding]:
+    if not is_candidate(rec.raw):
+        return ()
+    evt = rec.pick(RULE_FIELDS)
+    sso_login = is_sso_login(evt)
+    admin_add = is_local_admin_add(evt)
+    if not (sso_login or admin_add):
+        return ()
+    sso_users, ip_iocs, suspicious_admin_names = iocs
+    fields = rec.fields
+    out: List[Finding] = []
+
+    if sso_login:
+        user = (evt.get("user") or "").lower()
+        srcip = evt.get("srcip") or ""
+        ip_hit = ip_iocs.lookup(srcip)
+        sev = "high" if (user in sso_users or ip_hit) else "medium"
+        reason_bits = ["SSO admin login success"]
+        if user in sso_users:
+            reason_bits.append(f"user IOC match: {user}")
+        if ip_hit:
+            reason_bits.append(f"srcip IOC match: {srcip}" if ip_hit == srcip else f"srcip IOC match: {srcip} in {ip_hit}")
+        out.append(Finding(
+            rule_id="FORTI_SSO_LOGIN_SUCCESS",
+            severity=sev,
+            reason="; ".join(reason_bits),
+            source=source,
+            line_no=rec.line_no,
+            raw=rec.raw,
+            fields=fields,
+        ))
+
+    if admin_add:
+        cfgobj = (evt.get("cfgobj") or "").lower()
+        user = (evt.get("user") or "").lower()
+        sev = "high" if (cfgobj in suspicious_admin_names or user in sso_users) else "medium"
+        reason_bits = ["Local admin added (system.admin)"]
+        if cfgobj:
+            reason_bits.append(f"admin name: {cfgobj}")
+        if cfgobj in suspicious_admin_names:
+            reason_bits.append("admin name matches suspicious list")
+        if user in sso_users:
+            reason_bits.append(f"actor user IOC match: {user}")
+        out.append(Finding(
+            rule_id="FORTI_LOCAL_ADMIN_ADD",
+            severity=sev,
+            reason="; ".join(reason_bits),
+            source=source,
+            line_no=rec.line_no,
+            raw=rec.raw,
+            fields=fields,
+        ))
+    return out
+
+def ruleset(iocs: IocSets) -> RuleSet:
+    return RuleSet("cve-2026-24858", {"kv": (functools.partial(scan_fortios_record, iocs=iocs),)}, {"kv": is_candidate})
+
+RULESET = ruleset((frozenset(DEFAULT_SSO_USERS), IpIocIndex(DEFAULT_IP_IOCS), frozenset(DEFAULT_SUSPICIOUS_ADMIN_NAMES)))
+
+def event_epoch(fields: Dict[str, str]) -> Optional[float]:
+    """Event time in epoch seconds from ``date``/``time`` (+ ``tz``), else ``eventtime``."""
+    date, clock = fields.get("date") or "", fields.get("time") or ""
+    try:
+        if date and clock:
+            y, mo, d = (int(x) for x in date.split("-"))
+            hh, mm, ss = (int(x) for x in clock.split(":")[:3])
+            ts = float(calendar.timegm((y, mo, d, hh, mm, ss, 0, 0, 0)))
+            tz = fields.get("tz") or ""
+            if len(tz) == 5 and tz[0] in "+-" and tz[1:].isdigit():
+                offset = int(tz[1:3]) * 3600 + int(tz[3:]) * 60
+                ts -= offset if tz[0] == "+" else -offset
+            return ts
+        ev = fields.get("eventtime") or ""
+        if ev.isdigit():
+            # FortiOS writes seconds, milliseconds or nanoseconds depending on version.
+            return int(ev) / (1e9 if len(ev) >= 16 else 1e3 if len(ev) >= 13 else 1)
+    except ValueError:
+        pass
+    return None
+
+class SsoAdminCorrelator:
+    """Raises one composite finding when a local admin add follows an SSO admin login on the same device.
+
+    Fed the ordered FORTI_SSO_LOGIN_SUCCESS / FORTI_LOCAL_ADMIN_ADD findings;
+    devices are keyed by ``devid`` (else ``devname``, else the log source).
+    """
+
+    def __init__(self, window_minutes: float, max_devices: int = CORRELATE_MAX_DEVICES,
+                 max_pending: int = CORRELATE_MAX_PENDING) -> None:
+        self.window_minutes = window_minutes
+        self.window = window_minutes * 60
+        self.max_devices = max_devices
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+
+    def _device(self, f: Finding) -> str:
+        return f.fields.get("devid") or f.fields.get("devname") or f"source:{f.source}"
+
+    def feed(self, f: Finding) -> Optional[Finding]:
+        if f.rule_id not in ("FORTI_SSO_LOGIN_SUCCESS", "FORTI_LOCAL_ADMIN_ADD"):
+            return None
+        ts = event_epoch(f.fields)
+        if ts is None:
+            return None
+        dev = self._device(f)
+        pending = self._pending.get(dev)
+        if pending is not None:
+            self._pending.move_to_end(dev)
+            while pending and pending[0]["ts"] < ts - self.window:
+                pending.popleft()
+
+        if f.rule_id == "FORTI_SSO_LOGIN_SUCCESS":
+            if pending is None:
+                pending = self._pending[dev] = deque(maxlen=self.max_pending)
+                while len(self._pending) > self.max_devices:
+                    self._pending.popitem(last=False)
+            pending.append({
+                "ts": ts,
+                "time": f"{f.fields.get('date', '')} {f.fields.get('time', '')}".strip(),
+                "user": (f.fields.get("user") or "").lower(),
+                "srcip": f.fields.get("srcip") or "",
+                "source": f.source,
+                "line_no": f.line_no,
+            })
+            return None
+
+        logins = [x for x in (pending or ()) if ts - self.window <= x["ts"] <= ts]
+        if not logins:
+            return None
+        actor = (f.fields.get("user") or "").lower()
+        login = next((x for x in reversed(logins) if x["user"] == actor), logins[-1])
+        cfgobj = (f.fields.get("cfgobj") or "").lower()
+        delay = int(ts - login["ts"])
+        return Finding(
+            rule_id="FORTI_SSO_LOGIN_THEN_ADMIN_ADD",
+            severity="high",
+            reason=(f"SSO admin login ({login['user'] or 'unknown user'} from {login['srcip'] or 'unknown ip'}) "
+                    f"followed by local admin add ({cfgobj or 'unknown name'}) {delay}s later on {dev}"),
+            source=f.source,
+            line_no=f.line_no,
+            raw=f.raw,
+            offset=f.offset,
+            fields={
+                "device": dev,
+                "login_time": login["time"],
+                "login_user": login["user"],
+                "login_srcip": login["srcip"],
+                "login_source": login["source"],
+                "login_line_no": str(login["line_no"]),
+                "admin_time": f"{f.fields.get('date', '')} {f.fields.get('time', '')}".strip(),
+                "admin_name": cfgobj,
+                "admin_actor": actor,
+                "delay_seconds": str(delay),
+                "window_minutes": f"{self.window_minutes:g}",
+            },
+            pack=RULESET.pack,
+        )
+
+    def dump(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {dev: list(q) for dev, q in self._pending.items() if q}
+
+    def load(self, pending: Any) -> None:
+        if not isinstance(pending, dict):
+            return
+        for dev, items in pending.items():
+            if isinstance(items, list):
+                self._pending[dev] = deque((x for x in items if isinstance(x, dict) and "ts" in x), maxlen=self.max_pending)
+
+def correlate(found: Iterable[Finding], correlator: Optional[SsoAdminCorrelator]) -> Iterator[Finding]:
+    """Pass findings through, inserting composite findings right after the event that completes them."""
+    for f in found:
+        yield f
+        if correlator is not None:
+            composite = correlator.feed(f)
+            if composite is not None:
+                yield composite
+
+# --state / --follow: per-file checkpoints so repeated runs only read appended bytes.
+STATE_VERSION = 1
+HEAD_BYTES = 256  # fingerprint of the file start; catches copytruncate followed by regrowth
+
+def load_state(path: Path) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """Return (per-file checkpoints, pending SSO logins for the correlator)."""
+    if not path.exists():
+        return {}, {}
+    try:
+        obj = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError as e:
+        print(f"[!] Ignoring unreadable state file: {path} ({e})", file=sys.stderr)
+        return {}, {}
+    if not isinstance(obj, dict):
+        return {}, {}
+    files, pending = obj.get("files"), obj.get("correlation")
+    return (files if isinstance(files, dict) else {}), (pending if isinstance(pending, dict) else {})
+
+def save_state(path: Path, files: Dict[str, Dict[str, Any]], correlator: Optional[SsoAdminCorrelator] = None) -> None:
+    obj: Dict[str, Any] = {"version": STATE_VERSION, "files": files}
+    if correlator is not None:
+        obj["correlation"] = correlator.dump()
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _fresh_entry(st: os.stat_result) -> Dict[str, Any]:
+    return {"inode": st.st_ino, "dev": st.st_dev, "offset": 0, "partial": "", "line_no": 0, "head": "", "head_len": 0}
+
+def _head_digest(path: Path, n: int) -> str:
+    with path.open("rb") as f:
+        return hashlib.sha256(f.read(n)).hexdigest()
+
+def _drain(path: Path, entry: Dict[str, Any], final: bool) -> Iterator[Tuple[int, Optional[int], str]]:
+    """Yield (line_no, offset, line) for complete lines after the checkpoint, advancing ``entry`` in place.
+
+    A trailing line without a newline is held in ``entry["partial"]`` (stored
+    surrogate-escaped so the bytes round-trip through JSON) until the rest of
+    it arrives, or flushed as-is when ``final`` (the file was rotated away).
+    """
+    partial = entry.get("partial", "").encode("utf-8", "surrogateescape")
+    start = entry["offset"] - len(partial)
+    with path.open("rb") as f:
+        f.seek(entry["offset"])
+        for raw in f:
+            entry["offset"] += len(raw)
+            if not raw.endswith(b"\n"):
+                partial += raw
+                break
+            line, partial = partial + raw, b""
+            entry["line_no"] += 1
+            yield entry["line_no"], start, line.decode("utf-8", errors="replace").rstrip("\r\n")
+            start = entry["offset"]
+    if final and partial:
+        entry["line_no"] += 1
+        yield entry["line_no"], start, partial.decode("utf-8", errors="replace").rstrip("\r")
+        partial = b""
+    entry["partial"] = partial.decode("utf-8", "surrogateescape")
+    entry["head_len"] = min(entry["offset"], HEAD_BYTES)
+    entry["head"] = _head_digest(path, entry["head_len"])
+
+def _drain_partial(entry: Dict[str, Any]) -> Iterator[Tuple[int, Optional[int], str]]:
+    raw = entry.get("partial", "").encode("utf-8", "surrogateescape")
+    entry["partial"] = ""
+    if raw:
+        entry["line_no"] += 1
+        yield entry["line_no"], None, raw.decode("utf-8", errors="replace").rstrip("\r")  # its file is gone
+
+def _find_rotated(path: Path, entry: Dict[str, Any]) -> Optional[Path]:
+    """Locate the checkpointed inode among rotated siblings (``fgt.log.1``, ``fgt.log-20260201``...)."""
+    for cand in sorted(path.parent.glob(glob.escape(path.name) + "?*")):
+        try:
+            st = cand.stat()
+        except OSError:
+            continue
+        if st.st_ino == entry.get("inode") and st.st_dev == entry.get("dev"):
+            return cand
+    return None
+
+def tail_segments(path: Path, entry: Dict[str, Any]) -> Iterator[Tuple[Path, Iterator[Tuple[int, Optional[int], str]]]]:
+    """Yield (source, lines) segments of unread data for one checkpointed log.
+
+    Handles rename rotation (finish the old inode, then start the new file at
+    byte 0) and copytruncate rotation (size shrank below the checkpoint, or
+    the first HEAD_BYTES no longer match). A held partial line whose rest
+    cannot be read any more is flushed as-is before starting over.
+    Each segment must be consumed before advancing to the next.
+    """
+    st = path.stat()
+    if not entry:
+        entry.update(_fresh_entry(st))
+    elif (entry.get("inode"), entry.get("dev")) != (st.st_ino, st.st_dev):
+        old = _find_rotated(path, entry)
+        if old is not None:
+            yield old, _drain(old, entry, final=True)
+        elif entry.get("partial"):
+            yield path, _drain_partial(entry)
+        entry.clear()
+        entry.update(_fresh_entry(st))
+    elif st.st_size < entry.get("offset", 0) or _head_digest(path, entry.get("head_len", 0)) != entry.get("head"):
+        if entry.get("partial"):
+            yield path, _drain_partial(entry)  # the rest of it went to the rotated copy
+        entry.clear()
+        entry.update(_fresh_entry(st))
+    yield path, _drain(path, entry, final=False)
+
+def iter_tail_findings(paths: List[Path], files: Dict[str, Dict[str, Any]], iocs: IocSets) -> Iterator[Finding]:
+    rules = (ruleset(iocs),)
+    for path in paths:
+        if not path.exists():
+            continue
+        if sniff_compression(path):
+            print(f"[!] --state/--follow need plain-text logs, skipping: {path}", file=sys.stderr)
+            continue
+        entry = files.setdefault(str(path.resolve()), {})
+        for source, lines in tail_segments(path, entry):
+            yield from iter_findings_at("kv", str(source), LineCursor(lines), rules)
+
+def follow_logs(paths: List[Path], files: Dict[str, Dict[str, Any]], iocs: IocSets,
+                state_path: Optional[Path], sink: NdjsonSink, summary: Dict[str, Any], interval: float,
+                correlator: Optional[SsoAdminCorrelator] = None, context: int = 0) -> int:
+    """Poll for appended bytes until interrupted, streaming findings to ``sink``."""
+    try:
+        while True:
+            found = correlate(iter_tail_findings(paths, files, iocs), correlator)
+            for f in (attach_context(found, context) if context > 0 else found):
+                sink.write(f)
+            if state_path:
+                save_state(state_path, files, correlator)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if state_path:
+            save_state(state_path, files, correlator)
+        sink.close(summary)
+    print(f"[summary] Findings={sink.count}", file=sys.stderr)
+    return 0
+
 def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(
         prog="zeid_data_CVE-2026-24858",
@@ -94,93 +518,85 @@ def main(argv: Optional[List[str]] = None) -> int:
     p.add_argument("--log", action="append", required=True, help="Path to Fortinet syslog/event log file. Repeatable.")
     p.add_argument("--out", default="", help="Write JSON findings to this path (default: stdout).")
     p.add_argument("--extra-sso-user", action="append", default=[], help="Add IOC SSO usernames (repeatable).")
-    p.add_argument("--extra-ioc-ip", action="append", default=[], help="Add IOC IPs (repeatable).")
+    p.add_argument("--extra-ioc-ip", action="append", default=[], help="Add IOC IPs or CIDR ranges (repeatable).")
+    p.add_argument("--ioc-file", action="append", default=[], help="File of IOC IPs/CIDRs, one per line, # comments allowed (repeatable).")
     p.add_argument("--extra-admin-name", action="append", default=[], help="Add suspicious local admin names (repeatable).")
+    p.add_argument("--out-format", choices=("json", "ndjson"), default="json", help="json: one document at the end; ndjson: stream each finding as it is found, then a summary record.")
+    p.add_argument("--correlate-minutes", type=float, default=DEFAULT_CORRELATE_MINUTES, help=f"Raise a composite finding when a local admin add follows an SSO admin login on the same device within N minutes; 0 disables (default: {DEFAULT_CORRELATE_MINUTES}).")
+    p.add_argument("--workers", type=int, default=1, help="Scan log files/chunks in N processes (default: 1).")
+    p.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_MB, help=f"Split logs larger than this into chunks for --workers (default: {DEFAULT_CHUNK_MB}).")
+    p.add_argument("--context", type=int, default=0, help="Add N lines before and after each finding, read back from the log by byte offset (plain-text logs only; default: 0).")
+    p.add_argument("--state", default="", help="Checkpoint file; each run only scans bytes appended since the last run.")
+    p.add_argument("--follow", action="store_true", help="Keep tailing the logs, streaming NDJSON findings (Ctrl-C to stop).")
+    p.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --follow (default: 5).")
     args = p.parse_args(argv)
+    if (args.state or args.follow) and args.workers > 1:
+        p.error("--state/--follow read each log sequentially; drop --workers")
 
-    sso_users = set(DEFAULT_SSO_USERS) | set(args.extra_sso_user)
-    ip_iocs = set(DEFAULT_IP_IOCS) | set(args.extra_ioc_ip)
-    suspicious_admin_names = set(DEFAULT_SUSPICIOUS_ADMIN_NAMES) | set(args.extra_admin_name)
+    ip_entries = sorted(DEFAULT_IP_IOCS) + list(args.extra_ioc_ip)
+    for ioc_file in args.ioc_file:
+        try:
+            ip_entries.extend(read_ioc_file(Path(ioc_file)))
+        except OSError as e:
+            print(f"[!] Cannot read IOC file: {ioc_file} ({e})", file=sys.stderr)
+    ip_index = IpIocIndex(ip_entries)
+    for bad in ip_index.invalid:
+        print(f"[!] Ignoring invalid IOC IP/CIDR: {bad}", file=sys.stderr)
 
-    findings: List[Finding] = []
+    iocs: IocSets = (
+        frozenset(DEFAULT_SSO_USERS | set(args.extra_sso_user)),
+        ip_index,
+        frozenset(DEFAULT_SUSPICIOUS_ADMIN_NAMES | set(args.extra_admin_name)),
+    )
+    chunk_bytes = chunk_bytes_for(args.workers, args.chunk_mb)
 
+    paths: List[Path] = []
     for log_path in args.log:
         path = Path(log_path)
         if not path.exists():
             print(f"[!] Missing log file: {path}", file=sys.stderr)
+            if args.follow:
+                paths.append(path)  # picked up once it appears
             continue
-        with path.open("r", encoding="utf-8", errors="replace") as f:
-            for i, raw in enumerate(f, start=1):
-                line = raw.rstrip("\n")
-                evt = parse_kv_line(line)
-                if not evt:
-                    continue
-
-                if is_sso_login(evt):
-                    user = (evt.get("user") or "").lower()
-                    srcip = evt.get("srcip") or ""
-                    sev = "high" if (user in sso_users or srcip in ip_iocs) else "medium"
-                    reason_bits = ["SSO admin login success"]
-                    if user in sso_users:
-                        reason_bits.append(f"user IOC match: {user}")
-                    if srcip in ip_iocs:
-                        reason_bits.append(f"srcip IOC match: {srcip}")
-                    findings.append(Finding(
-                        rule_id="FORTI_SSO_LOGIN_SUCCESS",
-                        severity=sev,
-                        reason="; ".join(reason_bits),
-                        line_no=i,
-                        raw=line,
-                        fields=evt,
-                    ))
-
-                if is_local_admin_add(evt):
-                    cfgobj = (evt.get("cfgobj") or "").lower()
-                    user = (evt.get("user") or "").lower()
-                    sev = "high" if (cfgobj in suspicious_admin_names or user in sso_users) else "medium"
-                    reason_bits = ["Local admin added (system.admin)"]
-                    if cfgobj:
-                        reason_bits.append(f"admin name: {cfgobj}")
-                    if cfgobj in suspicious_admin_names:
-                        reason_bits.append("admin name matches suspicious list")
-                    if user in sso_users:
-                        reason_bits.append(f"actor user IOC match: {user}")
-                    findings.append(Finding(
-                        rule_id="FORTI_LOCAL_ADMIN_ADD",
-                        severity=sev,
-                        reason="; ".join(reason_bits),
-                        line_no=i,
-                        raw=line,
-                        fields=evt,
-                    ))
-
-    payload = {
-        "tool": "zeid_data_CVE-2026-24858",
-        "finding_count": len(findings),
-        "findings": [asdict(x) for x in findings],
-        "notes": {
-            "default_iocs": {
-                "sso_users": sorted(DEFAULT_SSO_USERS),
-                "ip_iocs": sorted(DEFAULT_IP_IOCS),
-                "suspicious_admin_names": sorted(DEFAULT_SUSPICIOUS_ADMIN_NAMES),
-            },
-            "tuning": "Use --extra-* flags to extend IOCs; edit defaults to fit your environment.",
+        try:
+            open_log(path).close()
+        except (OSError, RuntimeError) as e:
+            print(f"[!] Cannot read log file: {path} ({e})", file=sys.stderr)
+            continue
+        paths.append(path)
+
+    tool = "zeid_data_CVE-2026-24858"
+    notes = {
+        "default_iocs": {
+            "sso_users": sorted(DEFAULT_SSO_USERS),
+            "ip_iocs": sorted(DEFAULT_IP_IOCS),
+            "suspicious_admin_names": sorted(DEFAULT_SUSPICIOUS_ADMIN_NAMES),
         },
+        "ip_ioc_entries": len(ip_index),
+        "correlate_minutes": args.correlate_minutes,
+        "tuning": "Use --extra-* flags or --ioc-file to extend IOCs; edit defaults to fit your environment.",
     }
 
-    out_json = json.dumps(payload, indent=2, sort_keys=False)
-    if args.out:
-        Path(args.out).write_text(out_json, encoding="utf-8")
-        print(f"[+] Wrote findings JSON: {args.out}")
+    state_path = Path(args.state) if args.state else None
+    files, pending = load_state(state_path) if state_path else ({}, {})
+    correlator = SsoAdminCorrelator(args.correlate_minutes) if args.correlate_minutes > 0 else None
+    if correlator is not None:
+        correlator.load(pending)
+    if args.follow:
+        sink = NdjsonSink(args.out, mode="a")
+        return follow_logs(paths, files, iocs, state_path, sink, {"tool": tool, "notes": notes}, args.interval, correlator, args.context)
+    if state_path:
+        found: Iterable[Finding] = iter_tail_findings(paths, files, iocs)
     else:
-        print(out_json)
-
-    # Summary to stderr
-    highs = sum(1 for x in findings if x.severity == "high")
-    meds = sum(1 for x in findings if x.severity == "medium")
-    lows = sum(1 for x in findings if x.severity == "low")
-    print(f"[summary] Findings={len(findings)} high={highs} medium={meds} low={lows}", file=sys.stderr)
+        found = run_tasks(build_tasks("kv", paths, chunk_bytes, (ruleset(iocs),)), args.workers)
+    found = correlate(found, correlator)
+    if args.context > 0:
+        found = attach_context(found, args.context)
 
+    counts = write_report(found, args.out, args.out_format, tool, notes)
+    if state_path:
+        save_state(state_path, files, correlator)
+    print(f"[summary] Findings={sum(counts.values())} high={counts.get('high', 0)} medium={counts.get('medium', 0)} low={counts.get('low', 0)}", file=sys.stderr)
     return 0
 
 if __name__ == "__main__":
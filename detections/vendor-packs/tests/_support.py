@@ -0,0 +1,27 @@
+"""Shared helpers for the vendor-pack tests: import path and pack loading."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+PACKS_DIR = Path(__file__).resolve().parents[1]
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+if str(PACKS_DIR) not in sys.path:
+    sys.path.insert(0, str(PACKS_DIR))
+
+
+def load_pack(folder: str) -> ModuleType:
+    """Import ``<folder>/zeid_data_*.py`` (pack scripts have hyphens, so not importable by name)."""
+    path = next((PACKS_DIR / folder).glob("zeid_data_*.py"))
+    name = "pack_" + folder.replace("-", "_")
+    mod = sys.modules.get(name)
+    if mod is None:
+        spec = importlib.util.spec_from_file_location(name, path)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[name] = mod
+        spec.loader.exec_module(mod)
+    return mod
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import unittest
+
+from tests._support import FIXTURES, load_pack
+
+from zeid_data_ingest import Finding, iter_findings, iter_lines
+
+FORTI = load_pack("cve-2026-24858")
+FGT_LOG = FIXTURES / "fortigate_sso_admin.log"
+
+
+def event(rule_id: str, clock: str, dev: str = "FG100F0001", user: str = "a@example.org", **fields: str) -> Finding:
+    fields = {"date": "2026-02-01", "time": clock, "tz": "+0000", "devid": dev, "user": user, **fields}
+    return Finding(rule_id, "medium", "", "fgt.log", 0, "", fields)
+
+
+def login(clock: str, **kw: str) -> Finding:
+    return event("FORTI_SSO_LOGIN_SUCCESS", clock, **kw)
+
+
+def admin_add(clock: str, **kw: str) -> Finding:
+    return event("FORTI_LOCAL_ADMIN_ADD", clock, cfgobj="audit", **kw)
+
+
+class SsoAdminCorrelatorTest(unittest.TestCase):
+    def test_fixture_log(self) -> None:
+        found = FORTI.correlate(iter_findings("kv", str(FGT_LOG), iter_lines(FGT_LOG), (FORTI.RULESET,)),
+                                FORTI.SsoAdminCorrelator(15))
+        composite = [f for f in found if f.rule_id == "FORTI_SSO_LOGIN_THEN_ADMIN_ADD"]
+        # FGT-1 adds an admin 4 minutes after the SSO login; FGT-2 waits 20 minutes, outside the window
+        self.assertEqual(len(composite), 1)
+        fields = composite[0].fields
+        self.assertEqual((fields["device"], fields["login_line_no"], composite[0].line_no), ("FG100F0001", "2", 3))
+        self.assertEqual((fields["login_user"], fields["admin_name"], fields["delay_seconds"]),
+                         ("cloud-noc@mail.io", "audit", "240"))
+
+    def test_window_is_inclusive_and_logins_expire(self) -> None:
+        corr = FORTI.SsoAdminCorrelator(15)
+        corr.feed(login("10:00:00"))
+        self.assertIsNotNone(corr.feed(admin_add("10:15:00")))
+        self.assertIsNone(corr.feed(admin_add("10:15:01")))
+        # the expired login was dropped, not just skipped
+        self.assertEqual(corr.dump(), {})
+
+    def test_devices_are_separate(self) -> None:
+        corr = FORTI.SsoAdminCorrelator(15)
+        corr.feed(login("10:00:00", dev="FG-A"))
+        self.assertIsNone(corr.feed(admin_add("10:01:00", dev="FG-B")))
+        self.assertIsNotNone(corr.feed(admin_add("10:02:00", dev="FG-A")))
+
+    def test_prefers_the_login_of_the_acting_user(self) -> None:
+        corr = FORTI.SsoAdminCorrelator(15)
+        corr.feed(login("10:00:00", user="X@example.org", srcip="198.51.100.1"))
+        corr.feed(login("10:05:00", user="y@example.org", srcip="198.51.100.2"))
+        hit = corr.feed(admin_add("10:06:00", user="x@example.org"))
+        self.assertEqual((hit.fields["login_user"], hit.fields["login_srcip"]), ("x@example.org", "198.51.100.1"))
+        hit = corr.feed(admin_add("10:07:00", user="z@example.org"))
+        self.assertEqual(hit.fields["login_user"], "y@example.org")
+
+    def test_admin_add_before_the_login_does_not_match(self) -> None:
+        corr = FORTI.SsoAdminCorrelator(15)
+        corr.feed(login("10:10:00"))
+        self.assertIsNone(corr.feed(admin_add("10:05:00")))
+
+    def test_bounded_memory(self) -> None:
+        corr = FORTI.SsoAdminCorrelator(15, max_devices=2, max_pending=3)
+        for dev in ("FG-A", "FG-B", "FG-C"):
+            corr.feed(login("10:00:00", dev=dev))
+        self.assertEqual(sorted(corr.dump()), ["FG-B", "FG-C"])  # least recently seen device evicted
+        for minute in range(5):
+            corr.feed(login(f"10:0{minute}:30", dev="FG-C"))
+        self.assertEqual(len(corr.dump()["FG-C"]), 3)
+
+    def test_pending_logins_survive_a_state_round_trip(self) -> None:
+        corr = FORTI.SsoAdminCorrelator(15)
+        corr.feed(login("10:00:00"))
+        resumed = FORTI.SsoAdminCorrelator(15)
+        resumed.load(corr.dump())
+        self.assertIsNotNone(resumed.feed(admin_add("10:10:00")))
+        resumed.load(["not", "a", "dict"])  # ignored
+
+    def test_event_epoch(self) -> None:
+        base = FORTI.event_epoch({"date": "2026-02-01", "time": "10:00:00", "tz": "+0000"})
+        self.assertEqual(FORTI.event_epoch({"date": "2026-02-01", "time": "11:00:00", "tz": "+0100"}), base)
+        self.assertEqual(FORTI.event_epoch({"date": "2026-02-01", "time": "05:30:00", "tz": "-0430"}), base)
+        for eventtime in ("1769940000", "1769940000000", "1769940000000000000"):
+            self.assertEqual(FORTI.event_epoch({"eventtime": eventtime}), base)
+        self.assertIsNone(FORTI.event_epoch({"date": "2026-02-xx", "time": "10:00:00"}))
+        self.assertIsNone(FORTI.event_epoch({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
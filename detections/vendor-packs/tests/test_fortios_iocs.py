@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import ipaddress
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests._support import load_pack
+
+from zeid_data_ingest import KvRecord
+
+FORTI = load_pack("cve-2026-24858")
+
+SSO_LOGIN = ('logid="0100032001" user="someone@example.org" ui="sso(198.51.100.77)" method="sso" '
+             'srcip={ip} action="login" status="success"')
+
+
+def most_specific(nets, ip: str):
+    """Reference lookup over (network, entry) pairs: the longest prefix that contains ``ip``."""
+    addr = ipaddress.ip_address(ip)
+    hits = [(net.prefixlen, entry) for net, entry in nets if net.version == addr.version and addr in net]
+    return max(hits, key=lambda h: h[0])[1] if hits else None
+
+
+class IpIocIndexTest(unittest.TestCase):
+    def test_longest_prefix_wins(self) -> None:
+        index = FORTI.IpIocIndex(["10.0.0.0/8", "10.1.0.0/16", "10.1.2.3", "10.1.2.0/24",
+                                  "2001:db8::/32", "2001:db8:1::/48", "fe80::/10"])
+        self.assertEqual(index.lookup("10.1.2.3"), "10.1.2.3")
+        self.assertEqual(index.lookup("10.1.2.4"), "10.1.2.0/24")
+        self.assertEqual(index.lookup("10.1.3.1"), "10.1.0.0/16")
+        self.assertEqual(index.lookup("10.200.0.1"), "10.0.0.0/8")
+        self.assertIsNone(index.lookup("11.0.0.1"))
+        self.assertEqual(index.lookup("2001:db8:1::5"), "2001:db8:1::/48")
+        self.assertEqual(index.lookup("2001:db8:2::5"), "2001:db8::/32")
+        self.assertEqual(index.lookup("fe80::1%port1"), "fe80::/10")  # zone id is ignored
+        self.assertEqual(len(index), 7)
+
+    def test_bad_input_is_kept_out(self) -> None:
+        index = FORTI.IpIocIndex(["198.51.100.1", " 198.51.100.1 ", "", "not-an-ip", "300.1.1.1", "10.0.0.1/8"])
+        self.assertEqual(index.invalid, ["not-an-ip", "300.1.1.1"])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.lookup("10.9.9.9"), "10.0.0.1/8")  # host bits are not an error
+        for ip in ("", "garbage", "1.2.3", "::g"):
+            self.assertIsNone(index.lookup(ip), ip)
+
+    def test_matches_reference_lookup(self) -> None:
+        rng = random.Random(7)
+        entries = []
+        for _ in range(300):
+            if rng.random() < 0.8:
+                net = ipaddress.ip_network((rng.getrandbits(32) & 0x0AFFFFFF | 0x0A000000, rng.randint(8, 32)), strict=False)
+            else:
+                net = ipaddress.ip_network((0x20010DB8 << 96 | rng.getrandbits(64) << 32, rng.randint(32, 128)), strict=False)
+            entries.append(str(net))
+        index = FORTI.IpIocIndex(entries)
+        nets = [(ipaddress.ip_network(e), e) for e in set(entries)]
+        probes = [str(ipaddress.ip_network(e).network_address) for e in entries]
+        probes += [str(ipaddress.ip_network(e).broadcast_address) for e in entries]
+        probes += [str(ipaddress.IPv4Address(0x0A000000 | rng.getrandbits(24))) for _ in range(2000)]
+        for ip in probes:
+            self.assertEqual(index.lookup(ip), most_specific(nets, ip), ip)
+
+    def test_ioc_file_format(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "iocs.txt"
+            path.write_text("# threat feed\n104.28.244.115\n\n104.28.212.0/24, # campaign range\n2001:db8::1 extra\n",
+                            encoding="utf-8")
+            self.assertEqual(FORTI.read_ioc_file(path), ["104.28.244.115", "104.28.212.0/24", "2001:db8::1"])
+
+    def test_cidr_hit_names_the_block(self) -> None:
+        iocs = (frozenset(), FORTI.IpIocIndex(["104.28.212.0/24"]), frozenset())
+        found = FORTI.scan_fortios_record("t.log", KvRecord(1, SSO_LOGIN.format(ip="104.28.212.114")), iocs)
+        self.assertEqual([(f.rule_id, f.severity) for f in found], [("FORTI_SSO_LOGIN_SUCCESS", "high")])
+        self.assertIn("srcip IOC match: 104.28.212.114 in 104.28.212.0/24", found[0].reason)
+        found = FORTI.scan_fortios_record("t.log", KvRecord(1, SSO_LOGIN.format(ip="104.28.213.1")), iocs)
+        self.assertEqual(found[0].severity, "medium")
+
+
+if __name__ == "__main__":
+    unittest.main()
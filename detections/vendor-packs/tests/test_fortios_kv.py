@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import unittest
+
+from tests._support import load_pack
+
+from zeid_data_ingest import KvRecord, parse_kv_line
+
+FORTI = load_pack("cve-2026-24858")
+
+# Repeated key: FortiOS keeps the last copy, as KV_RE.findall -> dict did.
+REPEATED_ACTION = 'logid="0100044547" cfgpath="system.admin" action="Edit" cfgobj="x" msg="m" action="Add"'
+
+
+class ParseKvLineTest(unittest.TestCase):
+    def test_last_duplicate_wins_in_both_modes(self) -> None:
+        self.assertEqual(parse_kv_line(REPEATED_ACTION)["action"], "Add")
+        self.assertEqual(parse_kv_line(REPEATED_ACTION, frozenset({"action", "cfgpath"})),
+                         {"cfgpath": "system.admin", "action": "Add"})
+
+    def test_selective_mode_matches_full_parse(self) -> None:
+        lines = [
+            REPEATED_ACTION,
+            'date=2026-01-02 time=10:00:00 devname="fgt1" logid="0100032001" user="a b" ui="sso(10.0.0.1)" action=login',
+            "a=1\tb=2\tc=\"x y\"\ta=3",
+            'user=“admin” msg=“curly”',
+            "no pairs here",
+            "k.v-1=ok =bad x=",
+        ]
+        keys = frozenset({"a", "user", "action", "k.v-1", "msg", "logid"})
+        for ln in lines:
+            full = parse_kv_line(ln)
+            self.assertEqual(parse_kv_line(ln, keys), {k: v for k, v in full.items() if k in keys}, ln)
+
+    def test_quoted_values_keep_spaces(self) -> None:
+        self.assertEqual(parse_kv_line('msg="two words" x=1'), {"msg": "two words", "x": "1"})
+
+
+class FortiRepeatedKeyTest(unittest.TestCase):
+    def test_repeated_action_is_an_admin_add(self) -> None:
+        iocs = (frozenset(), FORTI.IpIocIndex(()), frozenset({"x"}))
+        found = FORTI.scan_fortios_record("t.log", KvRecord(1, REPEATED_ACTION), iocs)
+        self.assertEqual([f.rule_id for f in found], ["FORTI_LOCAL_ADMIN_ADD"])
+        # severity (from the selective parse) and fields (full parse) see the same line
+        self.assertEqual(found[0].severity, "high")
+        self.assertEqual(found[0].fields["action"], "Add")
+
+
+if __name__ == "__main__":
+    unittest.main()
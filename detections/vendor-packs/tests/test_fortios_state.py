@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from pathlib import Path
+
+from tests._support import FIXTURES, load_pack
+
+FORTI = load_pack("cve-2026-24858")
+
+
+class TailStateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.log = self.dir / "fgt.log"
+        self.entry: dict = {}
+
+    def write(self, data: bytes, mode: str = "ab", path: Path = None) -> None:
+        with (path or self.log).open(mode) as f:
+            f.write(data)
+
+    def read(self) -> list:
+        """One --state pass: (file name, line_no, offset, line) for everything not read before."""
+        return [(src.name, no, off, ln) for src, lines in FORTI.tail_segments(self.log, self.entry)
+                for no, off, ln in lines]
+
+    def test_only_appended_lines_are_read(self) -> None:
+        self.write(b"a=1\nb=2\n")
+        self.assertEqual(self.read(), [("fgt.log", 1, 0, "a=1"), ("fgt.log", 2, 4, "b=2")])
+        self.assertEqual(self.read(), [])
+        self.write(b"c=3\r\n")
+        self.assertEqual(self.read(), [("fgt.log", 3, 8, "c=3")])
+
+    def test_partial_line_waits_for_its_newline(self) -> None:
+        self.write(b"a=1\nb=")
+        self.assertEqual(self.read(), [("fgt.log", 1, 0, "a=1")])
+        self.write(b"2")
+        self.assertEqual(self.read(), [])
+        self.write(b"2\n")
+        self.assertEqual(self.read(), [("fgt.log", 2, 4, "b=22")])
+
+    def test_rename_rotation_finishes_the_old_file_first(self) -> None:
+        self.write(b"a=1\nb=")
+        self.read()
+        os.rename(self.log, self.dir / "fgt.log.1")
+        self.write(b"2\nc=3", path=self.dir / "fgt.log.1")  # late writes to the old inode, no final newline
+        self.write(b"new=1\n", "wb")
+        self.assertEqual(self.read(), [
+            ("fgt.log.1", 2, 4, "b=2"), ("fgt.log.1", 3, 8, "c=3"),
+            ("fgt.log", 1, 0, "new=1"),
+        ])
+        self.assertEqual(self.read(), [])
+
+    def test_rotated_file_gone_flushes_the_held_partial_line(self) -> None:
+        self.write(b"a=1\nb=2")
+        self.read()
+        with self.log.open("rb"):  # keeps the old inode from being reused by the new file
+            self.log.unlink()
+            self.write(b"new=1\n", "wb")
+            self.assertEqual(self.read(), [("fgt.log", 2, None, "b=2"), ("fgt.log", 1, 0, "new=1")])
+
+    def test_copytruncate_restarts_from_the_top(self) -> None:
+        self.write(b"a=1\nb=2\nc=3\n")
+        self.read()
+        self.write(b"d=4\n", "wb")  # truncated in place, now shorter than the checkpoint
+        self.assertEqual(self.read(), [("fgt.log", 1, 0, "d=4")])
+
+    def test_copytruncate_flushes_the_held_partial_line(self) -> None:
+        self.write(b"a=1\nb=2")
+        self.read()
+        self.write(b"", "wb")
+        self.write(b"c=3\n")
+        self.assertEqual(self.read(), [("fgt.log", 2, None, "b=2"), ("fgt.log", 1, 0, "c=3")])
+
+    def test_copytruncate_then_regrowth_is_caught_by_the_head_digest(self) -> None:
+        self.write(b"a=1\nb=2\n")
+        self.read()
+        self.write(b"x=9\ny=8\nz=7\n", "wb")  # same inode, already past the old offset again
+        self.assertEqual([ln for _, _, _, ln in self.read()], ["x=9", "y=8", "z=7"])
+
+    def test_state_file_round_trip(self) -> None:
+        self.write(b"a=1\nb=\xff\xfe")  # held partial line that is not valid UTF-8
+        self.read()
+        state = self.dir / "fgt.state.json"
+        corr = FORTI.SsoAdminCorrelator(15)
+        FORTI.save_state(state, {str(self.log): self.entry}, corr)
+        files, pending = FORTI.load_state(state)
+        self.assertEqual(files, {str(self.log): self.entry})
+        self.assertEqual(pending, {})
+        self.entry = files[str(self.log)]
+        self.write(b"\n")
+        self.assertEqual(self.read(), [("fgt.log", 2, 4, "b=\ufffd\ufffd")])
+
+    def test_missing_or_unreadable_state_starts_fresh(self) -> None:
+        state = self.dir / "fgt.state.json"
+        self.assertEqual(FORTI.load_state(state), ({}, {}))
+        state.write_text("{not json", encoding="utf-8")
+        with redirect_stderr(StringIO()):
+            self.assertEqual(FORTI.load_state(state), ({}, {}))
+
+    def test_repeated_runs_find_each_event_once(self) -> None:
+        lines = (FIXTURES / "fortigate_sso_admin.log").read_bytes().splitlines(keepends=True)
+        files: dict = {}
+        iocs = (frozenset(FORTI.DEFAULT_SSO_USERS), FORTI.IpIocIndex(FORTI.DEFAULT_IP_IOCS),
+                frozenset(FORTI.DEFAULT_SUSPICIOUS_ADMIN_NAMES))
+        seen = []
+        for ln in lines:
+            self.write(ln[:20])
+            seen += FORTI.iter_tail_findings([self.log], files, iocs)
+            self.write(ln[20:])
+            seen += FORTI.iter_tail_findings([self.log], files, iocs)
+        self.assertEqual([(f.rule_id, f.line_no) for f in seen], [
+            ("FORTI_SSO_LOGIN_SUCCESS", 2), ("FORTI_LOCAL_ADMIN_ADD", 3),
+            ("FORTI_SSO_LOGIN_SUCCESS", 4), ("FORTI_LOCAL_ADMIN_ADD", 5),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
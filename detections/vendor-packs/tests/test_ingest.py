@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import io
+import lzma
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tests._support import FIXTURES
+
+import zeid_data_ingest as ingest
+from zeid_data_ingest import JsonEventStream, LineIndex, iter_json_events, iter_lines, sniff_compression
+
+W3C_LOG = FIXTURES / "iis_w3c.log"
+
+
+class CompressionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.plain = W3C_LOG.read_bytes()
+
+    def test_magic_bytes_decide_not_the_extension(self) -> None:
+        expected = list(iter_lines(W3C_LOG))
+        for name, opener in (("gzip", gzip.open), ("bz2", bz2.open), ("xz", lzma.open)):
+            # misleading extension on purpose
+            path = self.tmp / f"u_ex260201.{name}.log"
+            with opener(path, "wb") as f:
+                f.write(self.plain)
+            self.assertEqual(sniff_compression(path), name)
+            self.assertEqual(list(iter_lines(path)), expected, name)
+
+    def test_plain_file_named_gz_is_read_as_text(self) -> None:
+        path = self.tmp / "access.log.gz"
+        path.write_bytes(self.plain)
+        self.assertIsNone(sniff_compression(path))
+        self.assertEqual(list(iter_lines(path)), list(iter_lines(W3C_LOG)))
+
+    def test_zstd_is_recognised(self) -> None:
+        path = self.tmp / "access.log"
+        path.write_bytes(b"\x28\xb5\x2f\xfd" + b"\x00" * 8)
+        self.assertEqual(sniff_compression(path), "zstd")
+
+    def test_empty_file(self) -> None:
+        path = self.tmp / "empty.log"
+        path.write_bytes(b"")
+        self.assertIsNone(sniff_compression(path))
+        self.assertEqual(list(iter_lines(path)), [])
+
+
+class JsonEventStreamTest(unittest.TestCase):
+    def events(self, text: str) -> list:
+        return list(JsonEventStream(io.BytesIO(text.encode("utf-8"))))
+
+    def test_events_container_skips_other_keys(self) -> None:
+        found = [evt for _, evt in iter_json_events(FIXTURES / "proc_events.json")]
+        self.assertEqual([e["pid"] for e in found], [4120, 4188, 4190])
+
+    def test_ndjson_and_container_agree(self) -> None:
+        self.assertEqual(list(iter_json_events(FIXTURES / "proc_events.ndjson")),
+                         list(iter_json_events(FIXTURES / "proc_events.json")))
+
+    def test_top_level_array_and_concatenated_objects(self) -> None:
+        self.assertEqual(self.events('[{"a": 1}, {"a": 2}]'), [{"a": 1}, {"a": 2}])
+        self.assertEqual(self.events('{"a": 1}{"a": 2} {"a": 3}'), [{"a": 1}, {"a": 2}, {"a": 3}])
+        self.assertEqual(self.events("[]"), [])
+        self.assertEqual(self.events('{"events": []}'), [])
+
+    def test_lone_object_without_events_is_one_event(self) -> None:
+        self.assertEqual(self.events('{"image": "cmd.exe", "pid": 1}'), [{"image": "cmd.exe", "pid": 1}])
+        self.assertEqual(self.events("{}"), [{}])
+
+    def test_only_the_first_events_array_is_streamed(self) -> None:
+        self.assertEqual(self.events('{"events": [1], "events": [2]}'), [1])
+
+    def test_values_split_across_reads(self) -> None:
+        text = (FIXTURES / "proc_events.json").read_text(encoding="utf-8") + ' 12345678 "été"'
+        expected = self.events(text)
+        for size in (1, 2, 3, 7):
+            with mock.patch.object(ingest, "JSON_READ_BYTES", size):
+                self.assertEqual(self.events(text), expected, size)
+        self.assertEqual(expected[-2:], [12345678, "été"])
+
+    def test_malformed_input_raises_after_earlier_events(self) -> None:
+        stream = iter(JsonEventStream(io.BytesIO(b'[{"a": 1}, {"a": 2} {"a": 3}]')))
+        self.assertEqual(next(stream), {"a": 1})
+        self.assertEqual(next(stream), {"a": 2})
+        with self.assertRaises(ValueError):
+            next(stream)
+
+    def test_oversized_value_is_rejected(self) -> None:
+        with mock.patch.object(ingest, "JSON_READ_BYTES", 4), mock.patch.object(ingest, "JSON_MAX_VALUE_BYTES", 16):
+            with self.assertRaises(ValueError):
+                self.events('{"k": "' + "x" * 64 + '"}')
+
+
+class LineIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def test_matches_iter_line_offsets(self) -> None:
+        triples = list(ingest.iter_line_offsets(W3C_LOG))
+        with LineIndex(W3C_LOG) as index:
+            self.assertEqual(len(index), len(triples))
+            for line_no, offset, line in triples:
+                self.assertEqual(index.offset_of(line_no), offset)
+                self.assertEqual(index.line_no_at(offset), line_no)
+                self.assertEqual(index.line_no_at(offset + 1), line_no)
+                self.assertEqual(index.line_at(offset), line)
+            self.assertIsNone(index.offset_of(0))
+            self.assertIsNone(index.offset_of(len(triples) + 1))
+
+    def test_context_clips_at_file_edges(self) -> None:
+        path = self.tmp / "five.log"
+        path.write_bytes(b"one\r\ntwo\nthree\nfour\nfive")  # no trailing newline
+        with LineIndex(path) as index:
+            self.assertEqual(len(index), 5)
+            self.assertEqual(index.line_at(index.offset_of(5)), "five")
+            self.assertEqual(index.context(index.offset_of(1), 2, 1), [(0, "one"), (1, "two")])
+            self.assertEqual(index.context(index.offset_of(3), 1, 1), [(-1, "two"), (0, "three"), (1, "four")])
+            self.assertEqual(index.context(index.offset_of(5), 2, 3), [(-2, "three"), (-1, "four"), (0, "five")])
+
+    def test_empty_file(self) -> None:
+        path = self.tmp / "empty.log"
+        path.write_bytes(b"")
+        with LineIndex(path) as index:
+            self.assertEqual(len(index), 0)
+            self.assertIsNone(index.offset_of(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import random
+import unittest
+
+import tests._support  # noqa: F401  (puts the packs folder on sys.path)
+
+from zeid_data_ingest import MarkerMatcher, UriRule, uri_matcher
+
+
+def naive(markers, text):
+    return {m.lower() for m in markers if m and m.lower() in text}
+
+
+class MarkerMatcherTest(unittest.TestCase):
+    def test_automaton_matches_naive_search(self) -> None:
+        rnd = random.Random(20260201)
+        alphabet = "abcd/._-"  # small alphabet: many overlapping and nested markers
+        for _ in range(50):
+            markers = {"".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 6))) for _ in range(200)}
+            matcher = MarkerMatcher(markers)
+            self.assertGreater(len(matcher.markers), MarkerMatcher.SMALL_SET)  # automaton path
+            for _ in range(40):
+                text = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 80)))
+                self.assertEqual(matcher.find(text), naive(markers, text), text)
+
+    def test_classic_overlaps(self) -> None:
+        markers = ["he", "she", "his", "hers"] + [f"pad{i:03d}" for i in range(70)]
+        matcher = MarkerMatcher(markers)
+        self.assertEqual(matcher.find("ushers"), {"he", "she", "hers"})
+        self.assertEqual(matcher.find("xpad0070pad012"), {"pad007", "pad012"})
+        self.assertEqual(matcher.find(""), set())
+
+    def test_small_sets_use_substring_checks_with_same_result(self) -> None:
+        markers = ["/ajax/", "loginpref", "badparam=", "x"]
+        small = MarkerMatcher(markers)
+        forced = MarkerMatcher(markers)
+        forced.SMALL_SET = 0  # force the automaton on the same markers
+        for text in ("/helpdesk/wo/loginpref.jsp?badparam=/ajax/x", "nothing", "/ajax", "xx"):
+            self.assertEqual(small.find(text), forced.find(text))
+            self.assertEqual(small.find(text), naive(markers, text))
+
+    def test_markers_are_lowercased_and_empty_ignored(self) -> None:
+        self.assertEqual(MarkerMatcher(["AbC", ""]).markers, ["abc"])
+
+    def test_uri_rule_groups_and_excludes(self) -> None:
+        rule = UriRule("R", "high", "r", require=(("loginpref",), ("badparam=", "ajax")), exclude=("benign",))
+        matcher = uri_matcher([rule])
+        self.assertTrue(rule.matches(matcher.find("/loginpref.jsp?ajax=1")))
+        self.assertFalse(rule.matches(matcher.find("/loginpref.jsp")))
+        self.assertFalse(rule.matches(matcher.find("/loginpref.jsp?ajax=1&benign")))
+
+
+if __name__ == "__main__":
+    unittest.main()
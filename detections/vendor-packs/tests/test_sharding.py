@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests._support import FIXTURES, load_pack
+
+from zeid_data_ingest import (
+    Finding, LineIndex, RuleSet, build_tasks, iter_findings, iter_line_offsets, iter_lines, iter_web_records, plan_chunks,
+    run_tasks, w3c_state_at,
+)
+
+WHD = load_pack("cve-2025-40551")
+W3C_LOG = FIXTURES / "iis_w3c.log"
+
+
+def flag_every_line(source: str, rec) -> list:
+    return [Finding("LINE", "low", "", source, rec.line_no, rec.raw, {})]
+
+
+LINE_RULES = RuleSet("test-lines", {"app": (flag_every_line,)})
+
+
+class ShardedScanTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def test_chunks_start_on_line_boundaries_and_cover_the_file(self) -> None:
+        data = W3C_LOG.read_bytes()
+        for chunk_bytes in (1, 50, 200, len(data) - 1):
+            chunks = plan_chunks(W3C_LOG, chunk_bytes)
+            self.assertEqual(chunks[0][0], 0)
+            self.assertIsNone(chunks[-1][1])
+            for (_, end), (start, _) in zip(chunks, chunks[1:]):
+                self.assertEqual(end, start)
+                self.assertEqual(data[start - 1:start], b"\n")
+            lines = [ln for start, end in chunks for _, ln in iter_lines(W3C_LOG, start, end)]
+            self.assertEqual(lines, [ln for _, ln in iter_lines(W3C_LOG)], chunk_bytes)
+
+    def test_small_and_compressed_files_are_one_chunk(self) -> None:
+        self.assertEqual(plan_chunks(W3C_LOG, 1 << 20), [(0, None)])
+        path = self.tmp / "u_ex.log.gz"
+        with gzip.open(path, "wb") as f:
+            f.write(W3C_LOG.read_bytes() * 20)
+        self.assertEqual(plan_chunks(path, 16), [(0, None)])
+
+    def test_sharded_scan_matches_serial_scan(self) -> None:
+        # the fixture changes #Fields mid-file, so later shards need w3c_state_at
+        serial = list(iter_findings("web", str(W3C_LOG), iter_lines(W3C_LOG), (WHD.RULESET,)))
+        self.assertEqual([f.line_no for f in serial], [7, 14, 14, 16])
+        for chunk_bytes in (64, 300):
+            tasks = build_tasks("web", [W3C_LOG], chunk_bytes, (WHD.RULESET,))
+            self.assertGreater(len(tasks), 1)
+            records = [(r.fmt, r.uri, r.ip, r.status) for _, _, start, end, state, _ in tasks
+                       for r in iter_web_records(iter_lines(W3C_LOG, start, end), *state)]
+            self.assertEqual(records, [(r.fmt, r.uri, r.ip, r.status) for r in iter_web_records(iter_lines(W3C_LOG))])
+            for workers in (1, 2):
+                sharded = list(run_tasks(tasks, workers))
+                self.assertEqual([(f.rule_id, f.line_no, f.raw) for f in sharded],
+                                 [(f.rule_id, f.line_no, f.raw) for f in serial], (chunk_bytes, workers))
+
+    def test_merge_rebases_line_numbers_per_file(self) -> None:
+        other = self.tmp / "app.log"
+        other.write_text("".join(f"line {i}\n" for i in range(1, 31)), encoding="utf-8")
+        tasks = build_tasks("app", [other, W3C_LOG, other], 40, (LINE_RULES,))
+        self.assertGreater(len(tasks), 3)
+        found = list(run_tasks(tasks, 1))
+        n_other, n_w3c = 30, len(list(iter_lines(W3C_LOG)))
+        expected = [(str(other), i) for i in range(1, n_other + 1)]
+        expected = expected + [(str(W3C_LOG), i) for i in range(1, n_w3c + 1)] + expected
+        self.assertEqual([(f.source, f.line_no) for f in found], expected)
+        # offsets stay absolute, so they point back at the line
+        with LineIndex(other) as index:
+            for f in found[:n_other]:
+                self.assertEqual(index.line_at(f.offset), f.raw)
+
+    def test_fields_header_before_the_first_data_line_carries_over(self) -> None:
+        offset = next(pos for _, pos, ln in iter_line_offsets(W3C_LOG) if ln.startswith("2026-"))
+        fields, w3c = w3c_state_at(W3C_LOG, offset)
+        self.assertIsNone(w3c)
+        self.assertEqual(fields[:4], ["date", "time", "s-ip", "cs-method"])
+        rec = next(iter_web_records(iter_lines(W3C_LOG, offset), fields, w3c))
+        self.assertEqual((rec.fmt, rec.uri), ("w3c", "/index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""zeid_data_bench — throughput benchmark for the Zeid Data CVE detection packs (defensive-only)
+
+Generates seeded synthetic logs (IIS W3C, common/combined, FortiOS key=value)
+at a configurable size and hit rate, then measures each parser and each pack's
+RuleSet over them:
+  - parser:<format>   reading + parsing only (iter_web_records / parse_kv_line)
+  - pack:<pack>:<format>   the full per-record scan, as the pack CLIs run it
+
+Each case runs in a fresh process and reports lines/s, MB/s, findings/s and
+peak RSS. Results can be saved as a baseline and later runs compared against
+it: a throughput drop or RSS growth beyond --tolerance, or any change in the
+finding count for the same seed, is reported as a regression (exit code 1).
+Throughput and RSS only compare on the machine that recorded them, so
+baselines carry no host details and --portable-baseline keeps just the
+finding counts, which are the same everywhere.
+
+The generated logs are synthetic (documentation/TEST-NET addresses only).
+This tool does NOT exploit anything and does NOT modify systems.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+from zeid_data_hunt import discover_packs, load_packs  # noqa: E402
+from zeid_data_ingest import INPUT_FORMATS, iter_findings, iter_lines, iter_web_records, parse_kv_line  # noqa: E402
+
+DEFAULT_SIZE_MB = 16
+DEFAULT_HIT_RATE = 0.001
+DEFAULT_TOLERANCE = 0.25
+PORTABLE_FIELDS = ("findings",)
+
+# --- generators --------------------------------------------------------------
+
+BENIGN_PATHS = [
+    "/", "/index.html", "/css/site.css", "/js/app.js", "/images/logo.png", "/favicon.ico",
+    "/api/v1/auth/login", "/api/v1/settings/user", "/Mail/Default.aspx", "/owa/auth/logon.aspx",
+    # near misses: share a prefix with a signature but should not hit
+    "/helpdesk/WebObjects/Helpdesk.woa", "/helpdesk/WebObjects/Helpdesk.woa/wa/Login", "/web/api/node-management/status",
+]
+BENIGN_QUERIES = ["-", "-", "-", "id={n}", "page={n}&sort=asc", "lang=en-US", "ReturnUrl=%2FMail%2F"]
+HIT_REQUESTS = [
+    ("/helpdesk/WebObjects/Helpdesk.woa/wo/{n}.0.1", "wopage=LoginPref&badparam=/ajax/"),
+    ("/helpdesk/WebObjects/Helpdesk.woa/ajax/{n}", "method=JSONRpcClient&javaClass=x"),
+    ("/api/v1/settings/sysadmin/connect-to-hub", "-"),
+    ("/web/api/node-management/setup-initial-connection", "hubAddress=203.0.113.9"),
+]
+USER_AGENTS = [
+    "Mozilla/5.0+(Windows+NT+10.0;+Win64;+x64)+AppleWebKit/537.36+(KHTML,+like+Gecko)+Chrome/121.0+Safari/537.36",
+    "Mozilla/5.0+(Macintosh;+Intel+Mac+OS+X+14_2)+AppleWebKit/605.1.15+(KHTML,+like+Gecko)+Version/17.2+Safari/605.1.15",
+    "curl/8.5.0",
+]
+W3C_HEADER = (
+    "#Software: Microsoft Internet Information Services 10.0\n#Version: 1.0\n#Date: {date} {time}\n"
+    "#Fields: date time s-ip cs-method cs-uri-stem cs-uri-query s-port cs-username c-ip cs(User-Agent) "
+    "cs(Referer) sc-status sc-substatus sc-win32-status time-taken\n"
+)
+W3C_HEADER_EVERY = 100_000  # IIS rewrites the header block on every restart/rollover
+START_EPOCH = 1769904000  # 2026-02-01T00:00:00Z
+
+FORTI_TRAFFIC = (
+    'date={date} time={time} devname="FGT-{dev}" devid="FG100F{dev:04d}" eventtime={eventtime} tz="+0000" '
+    'logid="0000000013" type="traffic" subtype="forward" level="notice" vd="root" srcip=10.{a}.{b}.{c} '
+    'srcport={sport} srcintf="port2" dstip=198.51.100.{d} dstport=443 dstintf="port1" proto=6 '
+    'action="accept" policyid=12 service="HTTPS" sentbyte={sent} rcvdbyte={rcvd} appcat="unscanned"'
+)
+FORTI_BENIGN_EVENTS = [
+    # https admin login and a config edit that touches system.admin without adding one
+    'date={date} time={time} devname="FGT-{dev}" devid="FG100F{dev:04d}" eventtime={eventtime} tz="+0000" '
+    'logid="0100032001" type="event" subtype="system" level="information" vd="root" logdesc="Admin login successful" '
+    'user="admin" ui="https(10.0.0.9)" method="https" srcip=10.0.0.9 dstip=10.0.0.1 action="login" status="success" '
+    'msg="Administrator admin logged in successfully from https(10.0.0.9)"',
+    'date={date} time={time} devname="FGT-{dev}" devid="FG100F{dev:04d}" eventtime={eventtime} tz="+0000" '
+    'logid="0100044546" type="event" subtype="system" level="information" vd="root" logdesc="Attribute configured" '
+    'user="admin" ui="GUI(10.0.0.9)" action="Edit" cfgtid=1 cfgpath="system.admin" cfgobj="admin" cfgattr="trusthost1" '
+    'msg="Edit system.admin admin"',
+]
+FORTI_HITS = [
+    'date={date} time={time} devname="FGT-{dev}" devid="FG100F{dev:04d}" eventtime={eventtime} tz="+0000" '
+    'logid="0100032001" type="event" subtype="system" level="information" vd="root" logdesc="Admin login successful" '
+    'sn="{sent}" user="cloud-noc@mail.io" ui="sso(104.28.244.115)" method="sso" srcip=104.28.244.115 dstip=10.0.0.1 '
+    'action="login" status="success" reason="none" msg="Administrator cloud-noc@mail.io logged in successfully from sso(104.28.244.115)"',
+    'date={date} time={time} devname="FGT-{dev}" devid="FG100F{dev:04d}" eventtime={eventtime} tz="+0000" '
+    'logid="0100044547" type="event" subtype="system" level="information" vd="root" logdesc="Object attribute configured" '
+    'user="cloud-noc@mail.io" ui="sso(104.28.244.115)" action="Add" cfgtid={sport} cfgpath="system.admin" cfgobj="audit" '
+    'cfgattr="accprofile[super_admin]" msg="Add system.admin audit"',
+]
+
+def _stamp(epoch: int) -> Tuple[str, str]:
+    t = time.gmtime(epoch)
+    return time.strftime("%Y-%m-%d", t), time.strftime("%H:%M:%S", t)
+
+def _request(rng: random.Random, hit_rate: float) -> Tuple[str, str, str]:
+    n = rng.randrange(1, 100_000)
+    if rng.random() < hit_rate:
+        stem, query = rng.choice(HIT_REQUESTS)
+        status = "200"
+    else:
+        stem, query = rng.choice(BENIGN_PATHS), rng.choice(BENIGN_QUERIES)
+        status = rng.choice(("200", "200", "200", "302", "304", "404"))
+    return stem.format(n=n), query.format(n=n), status
+
+def gen_w3c(out: TextIO, rng: random.Random, size: int, hit_rate: float) -> int:
+    written = lines = 0
+    epoch = START_EPOCH
+    while written < size:
+        if lines % W3C_HEADER_EVERY == 0:
+            text = W3C_HEADER.format(date=_stamp(epoch)[0], time=_stamp(epoch)[1])
+            written += out.write(text)
+            lines += text.count("\n")
+        epoch += rng.randrange(0, 3)
+        date, tm = _stamp(epoch)
+        stem, query, status = _request(rng, hit_rate)
+        written += out.write(
+            f"{date} {tm} 10.0.0.20 {rng.choice(('GET', 'GET', 'POST'))} {stem} {query} 443 - "
+            f"203.0.113.{rng.randrange(1, 255)} {rng.choice(USER_AGENTS)} - {status} 0 0 {rng.randrange(1, 900)}\n"
+        )
+        lines += 1
+    return lines
+
+def gen_combined(out: TextIO, rng: random.Random, size: int, hit_rate: float) -> int:
+    written = lines = 0
+    epoch = START_EPOCH
+    while written < size:
+        epoch += rng.randrange(0, 3)
+        stamp = time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(epoch))
+        stem, query, status = _request(rng, hit_rate)
+        uri = stem if query == "-" else f"{stem}?{query}"
+        ua = rng.choice(USER_AGENTS).replace("+", " ")
+        written += out.write(
+            f'203.0.113.{rng.randrange(1, 255)} - - [{stamp}] "{rng.choice(("GET", "GET", "POST"))} {uri} HTTP/1.1" '
+            f'{status} {rng.randrange(200, 60_000)} "-" "{ua}"\n'
+        )
+        lines += 1
+    return lines
+
+def gen_fortios(out: TextIO, rng: random.Random, size: int, hit_rate: float) -> int:
+    written = lines = 0
+    epoch = START_EPOCH
+    while written < size:
+        epoch += rng.randrange(0, 2)
+        date, tm = _stamp(epoch)
+        roll = rng.random()
+        if roll < hit_rate:
+            tmpl = rng.choice(FORTI_HITS)
+        elif roll < 0.02:
+            tmpl = rng.choice(FORTI_BENIGN_EVENTS)
+        else:
+            tmpl = FORTI_TRAFFIC
+        written += out.write(tmpl.format(
+            date=date, time=tm, dev=rng.randrange(1, 9), eventtime=epoch * 1_000_000_000,
+            a=rng.randrange(256), b=rng.randrange(256), c=rng.randrange(1, 255), d=rng.randrange(1, 255),
+            sport=rng.randrange(1024, 65535), sent=rng.randrange(40, 90_000), rcvd=rng.randrange(40, 900_000),
+        ) + "\n")
+        lines += 1
+    return lines
+
+# corpus name -> (input kind it is scanned as, generator)
+CORPORA: Dict[str, Tuple[str, Callable[[TextIO, random.Random, int, float], int]]] = {
+    "w3c": ("web", gen_w3c),
+    "combined": ("web", gen_combined),
+    "kv": ("kv", gen_fortios),
+}
+
+def generate(corpus: str, path: Path, size_mb: float, hit_rate: float, seed: int) -> int:
+    """Write one synthetic log of about ``size_mb``; returns its line count."""
+    # the corpus name is mixed into the seed so every corpus is reproducible on its own
+    rng = random.Random(f"{seed}:{corpus}")
+    with path.open("w", encoding="utf-8", newline="\n") as out:
+        return CORPORA[corpus][1](out, rng, int(size_mb * 1024 * 1024), hit_rate)
+
+# --- cases -------------------------------------------------------------------
+
+# (case name, corpus, pack or "" for a parser case)
+Case = Tuple[str, str, str]
+
+def _parse_only(corpus: str, path: Path) -> int:
+    if INPUT_FORMATS[CORPORA[corpus][0]] == "web":
+        for _ in iter_web_records(iter_lines(path)):
+            pass
+    else:
+        for _, ln in iter_lines(path):
+            parse_kv_line(ln)
+    return 0
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_case(case: Case, path_s: str, repeat: int, pack_paths: List[str]) -> Dict[str, float]:
+    """Time one case (best of ``repeat``) in the current process; returns seconds, findings and peak RSS."""
+    _, corpus, pack = case
+    path = Path(path_s)
+    if pack:
+        rulesets = tuple(rs for rs in load_packs(pack_paths) if rs.pack == pack)
+        kind = CORPORA[corpus][0]
+        work: Callable[[], int] = lambda: sum(1 for _ in iter_findings(kind, path_s, iter_lines(path), rulesets))
+    else:
+        work = lambda: _parse_only(corpus, path)
+    best = float("inf")
+    findings = 0
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        findings = work()
+        best = min(best, time.perf_counter() - t0)
+    return {"seconds": best, "findings": findings, "peak_rss_mb": _peak_rss_mb()}
+
+def plan_cases(rulesets) -> List[Case]:
+    cases: List[Case] = [(f"parser:{corpus}", corpus, "") for corpus in CORPORA]
+    for rs in rulesets:
+        for corpus, (kind, _) in CORPORA.items():
+            if kind in rs.hooks:
+                cases.append((f"pack:{rs.pack}:{corpus}", corpus, rs.pack))
+    return cases
+
+# --- baselines ---------------------------------------------------------------
+
+def baseline_of(report: Dict[str, Any], portable: bool) -> Dict[str, Any]:
+    """The baseline to save from a run's report: no host details, and with ``portable`` only PORTABLE_FIELDS."""
+    cases = report["cases"]
+    if portable:
+        cases = {name: {k: v for k, v in res.items() if k in PORTABLE_FIELDS} for name, res in cases.items()}
+    return {"tool": report["tool"], "params": report["params"], "cases": cases}
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return one message per regression against ``baseline["cases"]``.
+
+    Only the metrics the baseline recorded are compared, so a portable
+    baseline checks finding counts alone.
+    """
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            continue
+        if cur["findings"] != base["findings"]:
+            problems.append(f"{name}: findings {base['findings']} -> {cur['findings']}")
+        if "lines_per_s" in base and cur["lines_per_s"] < base["lines_per_s"] * (1 - tolerance):
+            problems.append(f"{name}: lines/s {base['lines_per_s']:,.0f} -> {cur['lines_per_s']:,.0f}")
+        if base.get("peak_rss_mb") and cur["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            problems.append(f"{name}: peak RSS {base['peak_rss_mb']:.1f} MB -> {cur['peak_rss_mb']:.1f} MB")
+    return problems
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="zeid_data_bench",
+        description="Benchmark the Zeid Data CVE detection pack parsers and rule sets on synthetic logs."
+    )
+    ap.add_argument("--size-mb", type=float, default=DEFAULT_SIZE_MB, help=f"Size of each generated log (default: {DEFAULT_SIZE_MB}).")
+    ap.add_argument("--hit-rate", type=float, default=DEFAULT_HIT_RATE, help=f"Fraction of lines that match a signature (default: {DEFAULT_HIT_RATE}).")
+    ap.add_argument("--seed", type=int, default=1, help="Generator seed (default: 1). Finding counts are only comparable for the same seed/size/hit rate.")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept (default: 3).")
+    ap.add_argument("--pack", action="append", default=[], help="Only benchmark these packs (folder name). Repeatable; default: all.")
+    ap.add_argument("--keep-dir", default="", help="Write the generated logs here and keep them (default: a temporary directory).")
+    ap.add_argument("--out", default="", help="Write the results as JSON to this path.")
+    ap.add_argument("--baseline", default="", help="Compare against this baseline JSON; exit 1 on a regression.")
+    ap.add_argument("--save-baseline", default="", help="Write the results to this path as the new baseline (no host details).")
+    ap.add_argument("--portable-baseline", action="store_true", help="With --save-baseline, keep only the finding counts, which do not depend on the machine (for a baseline committed to the repo).")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help=f"Allowed throughput drop / RSS growth before a case counts as regressed (default: {DEFAULT_TOLERANCE}).")
+    args = ap.parse_args(argv)
+
+    pack_paths = [str(p) for p in discover_packs() if not args.pack or p.parent.name in args.pack]
+    cases = plan_cases(load_packs(pack_paths))
+    params = {"size_mb": args.size_mb, "hit_rate": args.hit_rate, "seed": args.seed}
+
+    tmp = None if args.keep_dir else tempfile.TemporaryDirectory(prefix="zeid_data_bench_")
+    workdir = Path(args.keep_dir or tmp.name)
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        corpora: Dict[str, Tuple[Path, int]] = {}
+        for corpus in sorted({c[1] for c in cases}):
+            path = workdir / f"bench_{corpus}.log"
+            n_lines = generate(corpus, path, args.size_mb, args.hit_rate, args.seed)
+            corpora[corpus] = (path, n_lines)
+            print(f"[+] Generated {path.name}: {n_lines:,} lines, {path.stat().st_size / (1024 * 1024):.1f} MB", file=sys.stderr)
+
+        # one fresh process per case, so peak RSS is that case's alone
+        ctx = multiprocessing.get_context("spawn")
+        results: Dict[str, Dict[str, float]] = {}
+        print(f"{'case':<36} {'lines/s':>12} {'MB/s':>8} {'findings/s':>11} {'peak RSS MB':>12} {'findings':>9}")
+        for case in cases:
+            path, n_lines = corpora[case[1]]
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+                r = ex.submit(run_case, case, str(path), args.repeat, pack_paths).result()
+            secs = max(r["seconds"], 1e-9)
+            size_mb = path.stat().st_size / (1024 * 1024)
+            res = results[case[0]] = {
+                "lines": n_lines, "seconds": round(secs, 4), "findings": r["findings"],
+                "lines_per_s": round(n_lines / secs, 1), "mb_per_s": round(size_mb / secs, 2),
+                "findings_per_s": round(r["findings"] / secs, 1), "peak_rss_mb": round(r["peak_rss_mb"], 1),
+            }
+            print(f"{case[0]:<36} {res['lines_per_s']:>12,.0f} {res['mb_per_s']:>8.1f} {res['findings_per_s']:>11,.0f} "
+                  f"{res['peak_rss_mb']:>12.1f} {res['findings']:>9}")
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        "tool": "zeid_data_bench",
+        "params": params,
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine()},
+        "cases": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[+] Wrote results JSON: {args.out}", file=sys.stderr)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(baseline_of(report, args.portable_baseline), indent=2) + "\n", encoding="utf-8")
+        print(f"[+] Wrote baseline: {args.save_baseline}", file=sys.stderr)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if baseline.get("params") != params:
+            print(f"[!] Baseline was recorded with {baseline.get('params')}, this run used {params}; not comparing", file=sys.stderr)
+            return 1
+        problems = compare(results, baseline, args.tolerance)
+        for msg in problems:
+            print(f"[!] Regression: {msg}", file=sys.stderr)
+        print(f"[summary] Cases={len(results)} regressions={len(problems)}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
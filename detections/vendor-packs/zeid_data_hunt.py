@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""zeid_data_hunt — run every CVE detection pack over one log corpus in a single pass (defensive-only)
+
+Loads the RuleSet of each pack under detections/vendor-packs/*/zeid_data_*.py
+and scans each input once: every line is read, decompressed and parsed a
+single time, and the parsed record is handed to all packs that hook that input
+kind. Findings carry a ``pack`` field naming the pack that raised them.
+
+Pack-specific extras are not part of a RuleSet and still need the pack's own
+CLI: WHD --proc-json telemetry, FortiGate custom IOCs, SSO→admin correlation
+and --state/--follow.
+
+This tool does NOT exploit anything and does NOT modify systems.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+from zeid_data_ingest import (  # noqa: E402
+    DEFAULT_CHUNK_MB, INPUT_FORMATS, Finding, RuleSet, attach_context, build_tasks, chunk_bytes_for, existing_logs,
+    run_tasks, write_report,
+)
+
+def _module_name(path: Path) -> str:
+    return "zeid_data_pack_" + re.sub(r"\W", "_", path.parent.name)
+
+def discover_packs(root: Path = HERE) -> List[Path]:
+    return sorted(root.glob("*/zeid_data_*.py"))
+
+def load_packs(paths: Sequence[str]) -> List[RuleSet]:
+    """Import each pack script and return its RULESET (packs without one are skipped).
+
+    Modules are registered in sys.modules under a stable name so rule set
+    hooks pickle by reference; this also runs in every --workers process.
+    """
+    rulesets = []
+    for path_s in paths:
+        path = Path(path_s)
+        name = _module_name(path)
+        mod = sys.modules.get(name)
+        if mod is None:
+            spec = importlib.util.spec_from_file_location(name, path)
+            if spec is None or spec.loader is None:
+                continue
+            mod = importlib.util.module_from_spec(spec)
+            sys.modules[name] = mod
+            try:
+                spec.loader.exec_module(mod)
+            except Exception as e:
+                del sys.modules[name]
+                print(f"[!] Skipping pack {path.parent.name}: {e}", file=sys.stderr)
+                continue
+        rs = getattr(mod, "RULESET", None)
+        if isinstance(rs, RuleSet):
+            rulesets.append(rs)
+    return rulesets
+
+def count_by_pack(found: Iterable[Finding], counts: Dict[str, int]) -> Iterator[Finding]:
+    for f in found:
+        counts[f.pack] = counts.get(f.pack, 0) + 1
+        yield f
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="zeid_data_hunt",
+        description="Scan logs once with the rules of every Zeid Data CVE detection pack (defensive-only)."
+    )
+    ap.add_argument("--web-log", action="append", default=[], help="Web access log (IIS W3C or common/combined). Repeatable.")
+    ap.add_argument("--app-log", action="append", default=[], help="Application log (plain text). Repeatable.")
+    ap.add_argument("--egress-log", action="append", default=[], help="Egress/proxy log (plain text). Repeatable.")
+    ap.add_argument("--kv-log", action="append", default=[], help="FortiOS-style key=value event log. Repeatable.")
+    ap.add_argument("--pack", action="append", default=[], help="Only run these packs (folder name, e.g. cve-2025-40551). Repeatable; default: all.")
+    ap.add_argument("--list-packs", action="store_true", help="List the packs and the input kinds they hook, then exit.")
+    ap.add_argument("--out", default="", help="Write JSON findings to this path (default: stdout).")
+    ap.add_argument("--out-format", choices=("json", "ndjson"), default="json", help="json: one document at the end; ndjson: stream each finding as it is found, then a summary record.")
+    ap.add_argument("--workers", type=int, default=1, help="Scan log files/chunks in N processes (default: 1).")
+    ap.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_MB, help=f"Split logs larger than this into chunks for --workers (default: {DEFAULT_CHUNK_MB}).")
+    ap.add_argument("--context", type=int, default=0, help="Add N lines before and after each finding, read back from the log by byte offset (plain-text logs only; default: 0).")
+    args = ap.parse_args(argv)
+
+    pack_paths = [str(p) for p in discover_packs() if not args.pack or p.parent.name in args.pack]
+    rulesets = load_packs(pack_paths)
+    for name in sorted(set(args.pack) - {rs.pack for rs in rulesets}):
+        print(f"[!] Unknown pack: {name}", file=sys.stderr)
+
+    if args.list_packs:
+        for rs in rulesets:
+            print(f"{rs.pack}: {', '.join(sorted(rs.hooks))}")
+        return 0
+    if not rulesets:
+        print("[!] No packs loaded", file=sys.stderr)
+        return 1
+
+    chunk_bytes = chunk_bytes_for(args.workers, args.chunk_mb)
+    inputs = {"web": args.web_log, "app": args.app_log, "egress": args.egress_log, "kv": args.kv_log}
+    tasks = []
+    for kind, logs in inputs.items():
+        if not logs:
+            continue
+        hooked = tuple(rs for rs in rulesets if kind in rs.hooks)
+        if not hooked:
+            print(f"[!] No loaded pack scans {kind} logs; skipping {len(logs)} file(s)", file=sys.stderr)
+            continue
+        tasks += build_tasks(kind, existing_logs(logs, f"{kind} log"), chunk_bytes, hooked)
+
+    pack_counts: Dict[str, int] = {}
+    found = count_by_pack(run_tasks(tasks, args.workers, load_packs, (pack_paths,)), pack_counts)
+    if args.context > 0:
+        found = attach_context(found, args.context)
+
+    tool = "zeid_data_hunt"
+    notes = {
+        "packs": {rs.pack: sorted(rs.hooks) for rs in rulesets},
+        "input_formats": {kind: INPUT_FORMATS[kind] for kind, logs in inputs.items() if logs},
+    }
+
+    counts = write_report(found, args.out, args.out_format, tool, notes)
+    per_pack = " ".join(f"{pack}={n}" for pack, n in sorted(pack_counts.items()))
+    print(f"[summary] Findings={sum(counts.values())} {per_pack}".rstrip(), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
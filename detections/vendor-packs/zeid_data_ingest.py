@@ -0,0 +1,872 @@
+#!/usr/bin/env python3
+"""zeid_data_ingest — shared streaming log ingestion for the Zeid Data CVE detection packs
+
+Everything the packs have in common lives here so each pack is only its rule
+table:
+  - input: compression sniffing (gzip/bz2/xz/zstd), streaming line reads,
+    line-aligned chunking for process pools
+  - parsing: IIS W3C / common+combined web logs, FortiOS key=value logs and
+    plain text, each yielding compact ``__slots__`` records; JSON event
+    exports streamed one event at a time
+  - matching: a multi-marker matcher (plain substring checks up to
+    MarkerMatcher.SMALL_SET markers, an Aho-Corasick automaton above) and
+    declarative URI rules
+  - running: per-record rule hooks over sharded tasks, JSON/NDJSON output
+
+A pack describes its detections as a RuleSet: per input kind ("web", "app",
+"kv", ...), a tuple of hooks ``hook(source, record) -> findings`` and an
+optional raw-line prefilter. Any number of rule sets can share one pass over
+the same log.
+
+Read-only. No network calls.
+"""
+
+from __future__ import annotations
+
+import bz2
+import codecs
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Files larger than this are split into line-aligned byte ranges for --workers.
+DEFAULT_CHUNK_MB = 64
+
+# --- input -------------------------------------------------------------------
+
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+
+def sniff_compression(path: Path) -> Optional[str]:
+    """Identify gzip/bz2/xz/zstd input by magic bytes (file extensions are not trusted)."""
+    with path.open("rb") as f:
+        head = f.read(6)
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+def open_log(path: Path) -> BinaryIO:
+    """Open a log for binary line reading, decompressing on the fly when needed."""
+    kind = sniff_compression(path)
+    if kind == "gzip":
+        return gzip.open(path, "rb")
+    if kind == "bz2":
+        return bz2.open(path, "rb")
+    if kind == "xz":
+        return lzma.open(path, "rb")
+    if kind == "zstd":
+        try:
+            from compression import zstd  # Python 3.14+
+            return zstd.open(path, "rb")
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd input needs Python 3.14+ or the 'zstandard' package") from None
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True))
+    return path.open("rb")
+
+def iter_line_offsets(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, str]]:
+    """Yield (line_no, byte_offset, line) without holding the file in memory.
+
+    Compressed input is decoded as a stream (offsets are then positions in the
+    decompressed data). ``start``/``end`` restrict the scan to the lines
+    beginning inside that byte range of a plain file; line numbers are then
+    relative to ``start``, offsets stay absolute.
+    """
+    with (path.open("rb") if start or end is not None else open_log(path)) as f:
+        if start:
+            f.seek(start)
+        pos = start
+        for idx, raw in enumerate(f, start=1):
+            if end is not None and pos >= end:
+                break
+            yield idx, pos, raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            pos += len(raw)
+
+def iter_lines(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """Yield (line_no, line) pairs; see iter_line_offsets."""
+    for idx, _, ln in iter_line_offsets(path, start, end):
+        yield idx, ln
+
+def plan_chunks(path: Path, chunk_bytes: int) -> List[Tuple[int, Optional[int]]]:
+    """Split a file into (start, end) byte ranges that begin on line boundaries.
+
+    Compressed files have no random access and always form a single chunk.
+    """
+    size = path.stat().st_size
+    if size <= chunk_bytes or sniff_compression(path):
+        return [(0, None)]
+    bounds = [0]
+    with path.open("rb") as f:
+        pos = chunk_bytes
+        while pos < size:
+            f.seek(pos)
+            f.readline()
+            pos = f.tell()
+            if pos >= size:
+                break
+            bounds.append(pos)
+            pos += chunk_bytes
+    return list(zip(bounds, bounds[1:] + [None]))
+
+def existing_logs(paths: Iterable[str], label: str) -> List[Path]:
+    """Keep the paths that exist and can be opened, reporting the rest on stderr."""
+    out = []
+    for lp in paths:
+        pth = Path(lp)
+        if not pth.exists():
+            print(f"[!] Missing {label}: {pth}", file=sys.stderr)
+            continue
+        try:
+            open_log(pth).close()
+        except (OSError, RuntimeError) as e:
+            print(f"[!] Cannot read {label}: {pth} ({e})", file=sys.stderr)
+            continue
+        out.append(pth)
+    return out
+
+class LineIndex:
+    """Random access to the lines of a plain (uncompressed) log through mmap.
+
+    Nothing is decoded or retained up front: ``line_at``/``context`` seek from
+    a byte offset, and lookups by line number use an ``array`` of line start
+    offsets (8 bytes per line) built on first use from the mapped file.
+    """
+
+    NEWLINE_RE = re.compile(rb"\n")
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._f = path.open("rb")
+        size = os.fstat(self._f.fileno()).st_size
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._starts: Optional[array] = None
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._f.close()
+
+    def __enter__(self) -> "LineIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def starts(self) -> array:
+        if self._starts is None:
+            starts = array("Q", [0])
+            starts.extend(m.end() for m in self.NEWLINE_RE.finditer(self._mm))
+            if len(starts) > 1 and starts[-1] == len(self._mm):
+                starts.pop()  # no line after a trailing newline
+            self._starts = starts
+        return self._starts
+
+    def __len__(self) -> int:
+        return len(self.starts) if len(self._mm) else 0
+
+    def offset_of(self, line_no: int) -> Optional[int]:
+        """Byte offset where 1-based ``line_no`` starts, or None past the end."""
+        if 1 <= line_no <= len(self):
+            return self.starts[line_no - 1]
+        return None
+
+    def line_no_at(self, offset: int) -> int:
+        """1-based number of the line containing byte ``offset``."""
+        return bisect_right(self.starts, offset)
+
+    def _decode(self, lo: int, hi: int) -> str:
+        return self._mm[lo:hi].decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def line_at(self, offset: int) -> str:
+        """The full line containing byte ``offset``."""
+        lo = self._mm.rfind(b"\n", 0, offset) + 1
+        hi = self._mm.find(b"\n", offset)
+        return self._decode(lo, hi if hi >= 0 else len(self._mm))
+
+    def context(self, offset: int, before: int, after: int) -> List[Tuple[int, str]]:
+        """Up to ``before`` lines before and ``after`` lines after the line at ``offset``, plus that line.
+
+        Returned as (position relative to that line, text): -2, -1, 0, 1, ...
+        """
+        mm = self._mm
+        size = len(mm)
+        lo = mm.rfind(b"\n", 0, offset) + 1
+        first = lo
+        n_before = 0
+        while n_before < before and first > 0:
+            first = mm.rfind(b"\n", 0, first - 1) + 1
+            n_before += 1
+        out: List[Tuple[int, str]] = []
+        pos = first
+        rel = -n_before
+        while pos < size and rel <= after:
+            hi = mm.find(b"\n", pos)
+            if hi < 0:
+                hi = size
+            out.append((rel, self._decode(pos, hi)))
+            pos = hi + 1
+            rel += 1
+        return out
+
+# --- records -----------------------------------------------------------------
+
+class TextRecord:
+    """One plain-text log line; ``lower`` is computed once and shared by every rule set."""
+
+    __slots__ = ("line_no", "raw", "_lower")
+
+    def __init__(self, line_no: int, raw: str) -> None:
+        self.line_no = line_no
+        self.raw = raw
+        self._lower: Optional[str] = None
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.raw.lower()
+        return self._lower
+
+class WebRecord:
+    """One web request. ``fmt`` is "w3c", "combined", or "line" (unparsed; ``uri`` is the whole line)."""
+
+    __slots__ = ("line_no", "raw", "uri", "fmt", "ip", "method", "status", "time", "_lower")
+
+    def __init__(self, line_no: int, raw: str, uri: str, fmt: str,
+                 ip: str = "", method: str = "", status: str = "", time: str = "") -> None:
+        self.line_no = line_no
+        self.raw = raw
+        self.uri = uri
+        self.fmt = fmt
+        self.ip = ip
+        self.method = method
+        self.status = status
+        self.time = time
+        self._lower: Optional[str] = None
+
+    @property
+    def uri_lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.uri.lower()
+        return self._lower
+
+    def fields(self) -> Dict[str, str]:
+        if self.fmt == "line":
+            return {"uri_or_line": self.uri[:2000]}
+        return {"c-ip": self.ip, "cs-method": self.method, "uri": self.uri, "sc-status": self.status, "time": self.time}
+
+class KvRecord(TextRecord):
+    """One FortiOS-style ``key=value`` line, tokenized lazily: ``pick`` for a few keys, ``fields`` for all."""
+
+    __slots__ = ("_fields",)
+
+    def __init__(self, line_no: int, raw: str) -> None:
+        super().__init__(line_no, raw)
+        self._fields: Optional[Dict[str, str]] = None
+
+    def pick(self, keys: FrozenSet[str]) -> Dict[str, str]:
+        return parse_kv_line(self.raw, keys)
+
+    @property
+    def fields(self) -> Dict[str, str]:
+        if self._fields is None:
+            self._fields = parse_kv_line(self.raw)
+        return self._fields
+
+# --- parsers -----------------------------------------------------------------
+
+IIS_FIELDS_RE = re.compile(r"^#Fields:\s*(.*)$", re.IGNORECASE)
+COMBINED_RE = re.compile(
+    r'^(?P<ip>\S+)\s+\S+\s+\S+\s+\[(?P<time>[^\]]+)\]\s+"(?P<method>\S+)\s+(?P<uri>\S+)(?:\s+\S+)?"\s+(?P<status>\d+)'
+)
+
+def normalize_uri(stem: str, query: str) -> str:
+    if query and query != "-":
+        return f"{stem}?{query}"
+    return stem
+
+def iter_web_records(
+    lines: Iterable[Tuple[int, str]],
+    fields: Optional[List[str]] = None,
+    w3c: Optional[bool] = None,
+) -> Iterator[WebRecord]:
+    """Yield a WebRecord for every scannable web log line.
+
+    The format is decided by the first data line: if a ``#Fields:`` header was
+    seen before it, the file is IIS W3C (later ``#Fields:`` headers replace the
+    active layout). Otherwise every line is tried against COMBINED_RE and falls
+    back to scanning the whole line.
+
+    ``fields``/``w3c`` seed the parser state when resuming mid-file (see
+    w3c_state_at).
+    """
+    for idx, ln in lines:
+        if w3c is None and not ln.startswith("#") and ln.strip():
+            w3c = bool(fields)
+        if w3c is False:
+            m = COMBINED_RE.match(ln)
+            if m:
+                ip, tm, method, uri, status = m.group("ip", "time", "method", "uri", "status")
+                yield WebRecord(idx, ln, uri, "combined", ip, method, status, tm)
+            elif ln.strip():
+                yield WebRecord(idx, ln, ln, "line")
+            continue
+        if ln.startswith("#"):
+            m = IIS_FIELDS_RE.match(ln)
+            if m:
+                fields = m.group(1).split()
+            continue
+        if not ln.strip() or not fields:
+            continue
+        parts = ln.strip().split()
+        if len(parts) < len(fields):
+            continue
+        rec = dict(zip(fields, parts))
+        yield WebRecord(
+            idx, ln, normalize_uri(rec.get("cs-uri-stem", ""), rec.get("cs-uri-query", "")), "w3c",
+            rec.get("c-ip", ""), rec.get("cs-method", ""), rec.get("sc-status", ""),
+            f"{rec.get('date','')} {rec.get('time','')}".strip(),
+        )
+
+def w3c_state_at(path: Path, offset: int) -> Tuple[Optional[List[str]], Optional[bool]]:
+    """Return the (#Fields layout, is-W3C) parser state in effect at byte ``offset``.
+
+    Before the first data line the format is still undecided (None), but a
+    ``#Fields:`` header already read is part of the state.
+    """
+    fields: Optional[List[str]] = None
+    w3c: Optional[bool] = None
+    for _, ln in iter_lines(path, 0, offset):
+        if ln.startswith("#"):
+            m = IIS_FIELDS_RE.match(ln)
+            if m:
+                fields = m.group(1).split()
+        elif ln.strip():
+            w3c = bool(fields)
+            break
+    if w3c is None:
+        return fields, None
+    if not w3c:
+        return None, w3c
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = max(mm.rfind(b"\n" + h, 0, offset) for h in (b"#Fields:", b"#fields:", b"#FIELDS:"))
+        if pos >= 0:
+            eol = mm.find(b"\n", pos + 1)
+            m = IIS_FIELDS_RE.match(mm[pos + 1:eol if eol >= 0 else len(mm)].decode("utf-8", errors="replace").rstrip("\r"))
+            if m:
+                fields = m.group(1).split()
+    return fields, w3c
+
+QUOTES_MAP = str.maketrans({
+    "“": '"', "”": '"', "„": '"', "’": "'", "‘": "'", "—": "-", "–": "-",
+})
+KV_RE = re.compile(r'(\b[\w.-]+)=(".*?"|\S+)')
+
+def parse_kv_line(line: str, keys: Optional[FrozenSet[str]] = None) -> Dict[str, str]:
+    """Extract FortiOS ``key=value`` / ``key="quoted value"`` pairs with ``KV_RE``.
+
+    The last duplicate of a key wins. With ``keys``, only those fields are
+    returned; the whole line is still scanned, since any key may repeat later.
+    """
+    if not line.isascii():
+        line = line.translate(QUOTES_MAP)
+    out: Dict[str, str] = {}
+    for m in KV_RE.finditer(line):
+        key = m.group(1)
+        if keys is not None and key not in keys:
+            continue
+        val = m.group(2).strip()
+        if val.startswith('"') and val.endswith('"'):
+            val = val[1:-1]
+        out[key] = val
+    return out
+
+def iter_text_records(lines: Iterable[Tuple[int, str]]) -> Iterator[TextRecord]:
+    for idx, ln in lines:
+        yield TextRecord(idx, ln)
+
+def iter_kv_records(lines: Iterable[Tuple[int, str]]) -> Iterator[KvRecord]:
+    for idx, ln in lines:
+        yield KvRecord(idx, ln)
+
+# Largest single JSON value (one event, or one non-"events" key of a container)
+# the streaming reader will buffer before giving up on the file.
+JSON_MAX_VALUE_BYTES = 64 * 1024 * 1024
+JSON_READ_BYTES = 1024 * 1024
+JSON_WS_RE = re.compile(r"[ \t\r\n\ufeff]*")
+
+class JsonEventStream:
+    """Incremental reader for JSON event exports of any size.
+
+    Accepts a top-level array of events, an object with an ``events`` array
+    (other keys are skipped), NDJSON, or concatenated objects. A top-level
+    object without an ``events`` array is itself an event, exactly like a
+    one-line NDJSON file, so a single-event export yields that event. Only
+    the current value is held in memory; each one is decoded with the
+    C-level ``JSONDecoder.raw_decode``.
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f: BinaryIO) -> None:
+        self.f = f
+        self.dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.count = 0
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        if len(self.buf) > JSON_MAX_VALUE_BYTES:
+            raise ValueError(f"JSON value larger than {JSON_MAX_VALUE_BYTES} bytes")
+        chunk = self.f.read(JSON_READ_BYTES)
+        if not chunk:
+            self.eof = True
+            self.buf += self.dec.decode(b"", final=True)
+            return False
+        self.buf += self.dec.decode(chunk)
+        return True
+
+    def _peek(self) -> Optional[str]:
+        while True:
+            self.pos = JSON_WS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, chars: str) -> str:
+        ch = self._peek()
+        if ch is None or ch not in chars:
+            raise ValueError(f"expected one of {chars!r} at offset {self.pos}, got {ch!r}")
+        self.pos += 1
+        return ch
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                val, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            if end == len(self.buf) and self._fill():
+                continue  # a number may continue in the next chunk
+            self.pos = end
+            return val
+
+    def _array(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            self.count += 1
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def _object(self) -> Iterator[Any]:
+        self._expect("{")
+        obj: Dict[str, Any] = {}
+        streamed = False
+        if self._peek() == "}":
+            self.pos += 1
+        else:
+            while True:
+                key = self._value()
+                self._expect(":")
+                if key == "events" and not streamed and self._peek() == "[":
+                    streamed = True
+                    yield from self._array()
+                else:
+                    obj[key] = self._value()
+                if self._expect(",}") == "}":
+                    break
+        if not streamed:
+            self.count += 1
+            yield obj
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            ch = self._peek()
+            if ch is None:
+                return
+            if ch == "[":
+                yield from self._array()
+            elif ch == "{":
+                yield from self._object()
+            else:
+                self.count += 1
+                yield self._value()  # scalar NDJSON line: counted, never an event
+
+def iter_json_events(path: Path) -> Iterator[Tuple[int, Any]]:
+    """Yield (ordinal, event) from a JSON/NDJSON event export, optionally compressed.
+
+    Raises ValueError on malformed input; events before the error have
+    already been yielded.
+    """
+    with open_log(path) as f:
+        stream = JsonEventStream(f)
+        for evt in stream:
+            yield stream.count, evt
+
+# Record format behind each input kind a rule set can hook.
+INPUT_FORMATS = {
+    "web": "web",
+    "app": "text",
+    "egress": "text",
+    "kv": "kv",
+}
+
+def iter_records(kind: str, lines: Iterable[Tuple[int, str]], state: Tuple = (None, None)) -> Iterator[Any]:
+    fmt = INPUT_FORMATS[kind]
+    if fmt == "web":
+        return iter_web_records(lines, *state)
+    if fmt == "kv":
+        return iter_kv_records(lines)
+    return iter_text_records(lines)
+
+# --- matching ----------------------------------------------------------------
+
+class MarkerMatcher:
+    """Aho-Corasick automaton that reports every marker found in one pass over a string.
+
+    Markers are lowercased at build time; callers pass already-lowercased text.
+    Each character costs amortized O(1) goto/fail steps regardless of how many
+    markers are loaded. Up to ``SMALL_SET`` markers, plain ``in`` checks
+    (C-level) are still cheaper than a Python-level walk, so ``find`` uses
+    those instead; every shipped pack is below the threshold, so the automaton
+    only runs for larger (e.g. IOC-fed) marker sets.
+    """
+
+    SMALL_SET = 64
+
+    def __init__(self, markers: Iterable[str]) -> None:
+        self.markers = sorted({m.lower() for m in markers if m})
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Set[str]] = [set()]
+        for marker in self.markers:
+            state = 0
+            for ch in marker:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    out.append(set())
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state].add(marker)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if state else 0
+                out[nxt] |= out[fail[nxt]]
+                queue.append(nxt)
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(o) for o in out]
+
+    def find(self, text: str) -> Set[str]:
+        if len(self.markers) <= self.SMALL_SET:
+            return {m for m in self.markers if m in text}
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found: Set[str] = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+@dataclass(frozen=True)
+class UriRule:
+    """A web signature: every ``require`` group needs one marker hit, no ``exclude`` marker may hit."""
+    rule_id: str
+    severity: str
+    reason: str
+    require: Tuple[Tuple[str, ...], ...]
+    exclude: Tuple[str, ...] = ()
+
+    def matches(self, found: Set[str]) -> bool:
+        return all(any(m in found for m in group) for group in self.require) and not any(m in found for m in self.exclude)
+
+def lowered(markers: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(m.lower() for m in markers)
+
+def uri_matcher(rules: Iterable[UriRule]) -> MarkerMatcher:
+    return MarkerMatcher(m for r in rules for group in r.require + (r.exclude,) for m in group)
+
+# --- findings & rule sets ----------------------------------------------------
+
+@dataclass
+class Finding:
+    rule_id: str
+    severity: str
+    reason: str
+    source: str
+    line_no: int
+    raw: str
+    fields: Dict[str, str]
+    pack: str = ""
+    # byte offset of the line in ``source`` (decompressed position for compressed logs); None if unknown
+    offset: Optional[int] = None
+    # surrounding lines as {"line_no", "text"} dicts; only filled by attach_context
+    context: Optional[List[Dict[str, Any]]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Same shape as dataclasses.asdict, without its recursive deep copy.
+        out = {
+            "rule_id": self.rule_id, "severity": self.severity, "reason": self.reason, "source": self.source,
+            "line_no": self.line_no, "raw": self.raw, "fields": dict(self.fields), "pack": self.pack,
+            "offset": self.offset,
+        }
+        if self.context is not None:
+            out["context"] = self.context
+        return out
+
+# hook(source, record) -> findings for that record (an empty sequence when nothing hits)
+Hook = Callable[[str, Any], Sequence[Finding]]
+
+@dataclass(frozen=True)
+class RuleSet:
+    """A pack's detections: per input kind (see INPUT_FORMATS), the hooks run on each parsed record.
+
+    ``prefilters[kind]`` is a cheap test on the raw line; when every rule set
+    scanning a text/kv input has one and none pass, the line is dropped before
+    a record is built. It is only an optimization: hooks must still be correct
+    for any line, since another rule set's prefilter may let it through.
+    """
+    pack: str
+    hooks: Dict[str, Tuple[Hook, ...]] = field(default_factory=dict)
+    prefilters: Dict[str, Callable[[str], bool]] = field(default_factory=dict)
+
+def _combined_prefilter(kind: str, rulesets: Sequence[RuleSet]) -> Optional[Callable[[str], bool]]:
+    if INPUT_FORMATS[kind] == "web":
+        return None  # header lines drive the W3C parser state; never drop lines before parsing
+    tests = [rs.prefilters.get(kind) for rs in rulesets if kind in rs.hooks]
+    if not tests or any(t is None for t in tests):
+        return None
+    if len(tests) == 1:
+        return tests[0]
+    return lambda line: any(t(line) for t in tests)
+
+def iter_findings(kind: str, source: str, lines: Iterable[Tuple[int, str]], rulesets: Sequence[RuleSet],
+                  state: Tuple = (None, None)) -> Iterator[Finding]:
+    """Parse each line once and run every rule set's hooks for ``kind`` on the resulting record.
+
+    Findings are tagged with the pack of the rule set that produced them.
+    """
+    hooks = [(rs.pack, h) for rs in rulesets for h in rs.hooks.get(kind, ())]
+    prefilter = _combined_prefilter(kind, rulesets)
+    if prefilter is not None:
+        lines = ((idx, ln) for idx, ln in lines if prefilter(ln))
+    if len(hooks) == 1:
+        pack, hook = hooks[0]
+        for rec in iter_records(kind, lines, state):
+            found = hook(source, rec)
+            if found:
+                for f in found:
+                    f.pack = pack
+                    yield f
+        return
+    for rec in iter_records(kind, lines, state):
+        for pack, hook in hooks:
+            found = hook(source, rec)
+            if found:
+                for f in found:
+                    f.pack = pack
+                    yield f
+
+class LineCursor:
+    """Turns (line_no, offset, line) triples into the (line_no, line) pairs parsers take, remembering the last one read."""
+
+    __slots__ = ("lines", "line_no", "offset")
+
+    def __init__(self, lines: Iterable[Tuple[int, Optional[int], str]]) -> None:
+        self.lines = lines
+        self.line_no = 0
+        self.offset: Optional[int] = None
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        for idx, pos, ln in self.lines:
+            self.line_no = idx
+            self.offset = pos
+            yield idx, ln
+
+def iter_findings_at(kind: str, source: str, cursor: LineCursor, rulesets: Sequence[RuleSet],
+                     state: Tuple = (None, None)) -> Iterator[Finding]:
+    """iter_findings that also sets each finding's byte ``offset``.
+
+    Records are parsed and hooked in lock-step with reading, so a finding for
+    the line just read is raised before the cursor moves on.
+    """
+    for f in iter_findings(kind, source, cursor, rulesets, state):
+        if f.line_no == cursor.line_no:
+            f.offset = cursor.offset
+        yield f
+
+# --- sharded runs ------------------------------------------------------------
+
+# (kind, path, start, end, parser state, rule sets)
+Task = Tuple[str, str, int, Optional[int], Tuple, Tuple[RuleSet, ...]]
+
+def scan_task(task: Task) -> Tuple[List[Finding], int]:
+    """Scan one shard; returns its findings (with byte offsets) and line count."""
+    kind, path_s, start, end, state, rulesets = task
+    cursor = LineCursor(iter_line_offsets(Path(path_s), start, end))
+    return list(iter_findings_at(kind, path_s, cursor, rulesets, state)), cursor.line_no
+
+def build_tasks(kind: str, paths: List[Path], chunk_bytes: int, rulesets: Tuple[RuleSet, ...]) -> List[Task]:
+    tasks = []
+    for pth in paths:
+        for start, end in plan_chunks(pth, chunk_bytes):
+            state = w3c_state_at(pth, start) if (INPUT_FORMATS[kind] == "web" and start) else (None, None)
+            tasks.append((kind, str(pth), start, end, state, rulesets))
+    return tasks
+
+def run_tasks(tasks: List[Task], workers: int, initializer: Optional[Callable[..., None]] = None,
+              initargs: Tuple = ()) -> Iterator[Finding]:
+    """Scan shards (in a process pool when workers > 1) and yield findings in input order.
+
+    Shard-relative line numbers are rebased onto the file, so output matches a
+    serial run exactly. ``initializer`` runs once per worker, e.g. to import
+    the modules the rule set hooks live in.
+    """
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as ex:
+            yield from _merge_shards(tasks, ex.map(scan_task, tasks))
+    else:
+        yield from _merge_shards(tasks, map(scan_task, tasks))
+
+def _merge_shards(tasks, results) -> Iterator[Finding]:
+    base = 0
+    for task, (found, n_lines) in zip(tasks, results):
+        if task[2] == 0:
+            base = 0
+        for f in found:
+            f.line_no += base
+            yield f
+        base += n_lines
+
+def chunk_bytes_for(workers: int, chunk_mb: int) -> int:
+    """Chunk size for build_tasks: only split files when a pool will scan them."""
+    return max(1, chunk_mb) * 1024 * 1024 if workers > 1 else sys.maxsize
+
+def attach_context(found: Iterable[Finding], around: int) -> Iterator[Finding]:
+    """Fill each finding's ``context`` with ``around`` lines either side, read back from its source on demand.
+
+    Uses the finding's byte offset, else its line number. Compressed sources
+    have no random access and are passed through without context.
+    """
+    index: Optional[LineIndex] = None
+    try:
+        for f in found:
+            if around > 0:
+                if index is None or str(index.path) != f.source:
+                    if index is not None:
+                        index.close()
+                    index = None
+                    pth = Path(f.source)
+                    if pth.is_file() and not sniff_compression(pth):
+                        index = LineIndex(pth)
+                offset = f.offset
+                if index is not None and offset is None:
+                    offset = index.offset_of(f.line_no)
+                if index is not None and offset is not None:
+                    f.context = [{"line_no": f.line_no + rel, "text": text[:5000]}
+                                 for rel, text in index.context(offset, around, around)]
+            yield f
+    finally:
+        if index is not None:
+            index.close()
+
+# --- output ------------------------------------------------------------------
+
+class NdjsonSink:
+    """Streams findings as NDJSON: one flushed ``finding`` record per line, then a ``summary`` trailer."""
+
+    def __init__(self, out_path: str = "", mode: str = "w") -> None:
+        self.out = open(out_path, mode, encoding="utf-8") if out_path else sys.stdout
+        self.severity_counts: Dict[str, int] = {}
+
+    def write(self, finding: Finding) -> None:
+        self.out.write(json.dumps({"record_type": "finding", **finding.to_dict()}) + "\n")
+        self.out.flush()
+        self.severity_counts[finding.severity] = self.severity_counts.get(finding.severity, 0) + 1
+
+    @property
+    def count(self) -> int:
+        return sum(self.severity_counts.values())
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        record = {"record_type": "summary", **summary, "finding_count": self.count, "severity_counts": self.severity_counts}
+        self.out.write(json.dumps(record) + "\n")
+        self.out.flush()
+        if self.out is not sys.stdout:
+            self.out.close()
+
+def write_report(found: Iterable[Finding], out_path: str, out_format: str, tool: str, notes: Dict[str, Any]) -> Dict[str, int]:
+    """Write findings as one JSON document or streamed NDJSON; returns per-severity counts."""
+    if out_format == "ndjson":
+        sink = NdjsonSink(out_path)
+        for f in found:
+            sink.write(f)
+        sink.close({"tool": tool, "notes": notes})
+        if out_path:
+            print(f"[+] Wrote findings NDJSON: {out_path}")
+        return sink.severity_counts
+
+    findings: List[Finding] = list(found)
+    payload = {
+        "tool": tool,
+        "finding_count": len(findings),
+        "findings": [f.to_dict() for f in findings],
+        "notes": notes,
+    }
+
+    out_json = json.dumps(payload, indent=2, sort_keys=False)
+    if out_path:
+        Path(out_path).write_text(out_json, encoding="utf-8")
+        print(f"[+] Wrote findings JSON: {out_path}")
+    else:
+        print(out_json)
+
+    counts: Dict[str, int] = {}
+    for f in findings:
+        counts[f.severity] = counts.get(f.severity, 0) + 1
+    return counts
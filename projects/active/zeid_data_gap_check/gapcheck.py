@@ -8,24 +8,46 @@ Authorized use only.
 from __future__ import annotations
 
 import argparse
+import asyncio
+import codecs
 import datetime as _dt
+import errno
 import hashlib
 import ipaddress
 import json
+import os
 import platform
 import re
-import shlex
+import select
+import signal
 import socket
+import struct
 import subprocess
-import threading
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 
 TOOL_DISPLAY_NAME = "Zeid Data GapCheck"
 TOOL_VERSION = "1.2.0"
 
+# Evidence collection: commands run in parallel, each capped at CMD_TIMEOUT_S and
+# all of them together at the collection budget (--workers / --budget).
+CMD_TIMEOUT_S = 20
+DEFAULT_COLLECT_WORKERS = 8
+DEFAULT_COLLECT_BUDGET_S = 60
+DEFAULT_VERIFY_WORKERS = 8
+# A command is not started with less budget than this left; it would only be
+# killed and recorded as a timeout instead of a skip.
+MIN_CMD_SLICE_S = 1.0
+# stderr markers run_cmd/run_commands leave on exit code 124 results.
+TIMEOUT_STDERR = "timeout"
+SKIPPED_STDERR = "skipped: collection budget exhausted"
+
 
 def utcnow_iso() -> str:
     return _dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
@@ -50,6 +72,7 @@ class CmdResult:
     stdout: str
     stderr: str
     cmd: str
+    duration_ms: int = 0
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -58,23 +81,56 @@ class CmdResult:
             "stdout": self.stdout,
             "stderr": self.stderr,
             "cmd": self.cmd,
+            "duration_ms": self.duration_ms,
         }
 
 
-def run_cmd(cmd: str, timeout: int = 20) -> CmdResult:
+def _kill_tree(proc: subprocess.Popen) -> None:
+    # shell=True: the command runs under sh, and a hung grandchild would keep the
+    # output pipes open, so kill the whole process group (POSIX) rather than sh.
     try:
-        completed = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
-        return CmdResult(
-            ok=(completed.returncode == 0),
-            exit_code=int(completed.returncode),
-            stdout=(completed.stdout or "").strip(),
-            stderr=(completed.stderr or "").strip(),
-            cmd=cmd,
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+
+
+def run_cmd(cmd: str, timeout: float = CMD_TIMEOUT_S) -> CmdResult:
+    start = time.monotonic()
+
+    def elapsed_ms() -> int:
+        return int((time.monotonic() - start) * 1000)
+
+    try:
+        proc = subprocess.Popen(
+            cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace",
+            start_new_session=(os.name == "posix"),
         )
-    except subprocess.TimeoutExpired as e:
-        return CmdResult(ok=False, exit_code=124, stdout=(e.stdout or "").strip(), stderr="timeout", cmd=cmd)
     except Exception as e:
-        return CmdResult(ok=False, exit_code=1, stdout="", stderr=str(e), cmd=cmd)
+        return CmdResult(ok=False, exit_code=1, stdout="", stderr=str(e), cmd=cmd, duration_ms=elapsed_ms())
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_tree(proc)
+        try:
+            stdout, _ = proc.communicate(timeout=2)
+        except subprocess.TimeoutExpired:
+            stdout = ""
+        return CmdResult(ok=False, exit_code=124, stdout=(stdout or "").strip(), stderr=TIMEOUT_STDERR, cmd=cmd, duration_ms=elapsed_ms())
+    except Exception as e:
+        _kill_tree(proc)
+        proc.wait()
+        return CmdResult(ok=False, exit_code=1, stdout="", stderr=str(e), cmd=cmd, duration_ms=elapsed_ms())
+    return CmdResult(
+        ok=(proc.returncode == 0),
+        exit_code=int(proc.returncode),
+        stdout=(stdout or "").strip(),
+        stderr=(stderr or "").strip(),
+        cmd=cmd,
+        duration_ms=elapsed_ms(),
+    )
 
 
 def write_text(path: Path, data: str) -> None:
@@ -85,6 +141,40 @@ def write_json(path: Path, obj: Any) -> None:
     path.write_text(json.dumps(obj, indent=2, sort_keys=False), encoding="utf-8")
 
 
+def _text_bytes(data: str, errors: str = "strict") -> bytes:
+    # Same bytes Path.write_text() would produce (newline translation included).
+    if os.linesep != "\n":
+        data = data.replace("\n", os.linesep)
+    return data.encode("utf-8", errors)
+
+
+class BundleWriter:
+    """Writes the files of one bundle and hashes each from the bytes being written.
+
+    Paths are relative to the bundle root (``raw/routes_01.txt``). The SHA-256
+    manifest is kept in memory, so ``hashes.txt`` needs no second read pass.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.manifest: Dict[str, str] = {}
+        self.sizes: Dict[str, int] = {}
+        self.output_hashes: Dict[str, str] = {}
+
+    def write_bytes(self, rel: str, data: bytes) -> str:
+        with (self.root / rel).open("wb") as f:
+            f.write(data)
+        self.manifest[rel] = hashlib.sha256(data).hexdigest()
+        self.sizes[rel] = len(data)
+        return rel
+
+    def write_text(self, rel: str, data: str) -> str:
+        return self.write_bytes(rel, _text_bytes(data, errors="replace"))
+
+    def write_json(self, rel: str, obj: Any) -> str:
+        return self.write_bytes(rel, _text_bytes(json.dumps(obj, indent=2, sort_keys=False)))
+
+
 def hostname() -> str:
     try:
         return socket.gethostname()
@@ -148,29 +238,428 @@ def collect_platform_commands() -> Dict[str, List[str]]:
         }
 
 
-def save_raw(raw_dir: Path, name: str, result: CmdResult) -> str:
-    fname = f"{name}.txt"
-    path = raw_dir / fname
-    body = [f"## cmd: {result.cmd}", f"## ok: {result.ok}  exit_code: {result.exit_code}"]
+# In-process Linux collectors: read procfs/sysfs (plus netlink dumps for
+# addresses and link kinds) instead of forking `ip`, `ss`, `rfkill`, `lsblk`. Each renders text in the
+# format of the command it replaces, under a "native:<name>" pseudo-command, so
+# the record parsers, analyze() and raw/ files work the same for both backends.
+# DNS (resolvectl upstreams) and firewall rules have no procfs source and stay
+# on the shell commands.
+IFF_FLAGS = ((0x8, "LOOPBACK"), (0x2, "BROADCAST"), (0x10, "POINTOPOINT"), (0x1000, "MULTICAST"), (0x80, "NOARP"),
+             (0x100, "PROMISC"), (0x1, "UP"))
+ARPHRD_LINK = {1: "ether", 772: "loopback", 768: "tunnel", 776: "sit", 65534: "none"}
+TCP_STATES = {"0A": "LISTEN"}
+UDP_UNCONN = "07"
+RTF_UP, RTF_GATEWAY, RTF_REJECT = 0x1, 0x2, 0x200
+RTF6_LOCAL_OR_CACHE = 0x80000000 | 0x01000000
+NLMSG_HDR = struct.Struct("=IHHII")
+IFINFOMSG = struct.Struct("=BxHiII")
+IFADDRMSG = struct.Struct("=BBBBI")
+RTATTR = struct.Struct("=HH")
+NLMSG_ERROR, NLMSG_DONE = 2, 3
+RTM_NEWLINK, RTM_GETLINK, RTM_NEWADDR, RTM_GETADDR = 16, 18, 20, 22
+NLM_F_REQUEST, NLM_F_DUMP = 0x1, 0x300
+IFLA_LINKINFO, IFLA_INFO_KIND = 18, 1
+IFA_ADDRESS, IFA_LOCAL = 1, 2
+IFA_SCOPES = {0: "global", 200: "site", 253: "link", 254: "host"}
+SOCKET_INODE_RE = re.compile(r"^socket:\[(\d+)\]$")
+PROC_NET = Path("/proc/net")
+
+
+def _read(path: Path, default: Optional[str] = None) -> str:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").strip()
+    except OSError:
+        if default is None:
+            raise
+        return default
+
+
+def _hex_ipv4(h: str) -> str:
+    # procfs prints the network-order address as a host-order u32
+    return socket.inet_ntop(socket.AF_INET, struct.pack("=I", int(h, 16)))
+
+
+def _hex_ipv6(h: str, host_words: bool = True) -> str:
+    if host_words:  # /proc/net/{tcp6,udp6}: four host-order u32 words
+        b = b"".join(struct.pack("=I", int(h[i:i + 8], 16)) for i in range(0, 32, 8))
+    else:  # /proc/net/ipv6_route: plain network-order hex
+        b = bytes.fromhex(h)
+    return socket.inet_ntop(socket.AF_INET6, b)
+
+
+def _rtattrs(data: bytes, off: int, end: int) -> Dict[int, bytes]:
+    attrs: Dict[int, bytes] = {}
+    while off + RTATTR.size <= end:
+        alen, atype = RTATTR.unpack_from(data, off)
+        if alen < RTATTR.size:
+            break
+        attrs[atype & 0x3FFF] = data[off + RTATTR.size:off + alen]  # drop NLA_F_NESTED/NET_BYTEORDER
+        off += (alen + 3) & ~3
+    return attrs
+
+
+def netlink_dump(request: int, header: bytes, reply: int) -> Iterator[Tuple[bytes, Dict[int, bytes]]]:
+    """One NETLINK_ROUTE dump: yields (fixed header, attributes) for each ``reply`` message."""
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, 0) as sock:  # 0 = NETLINK_ROUTE
+        sock.settimeout(2)
+        sock.send(NLMSG_HDR.pack(NLMSG_HDR.size + len(header), request, NLM_F_REQUEST | NLM_F_DUMP, 1, 0) + header)
+        while True:
+            data = sock.recv(65536)
+            off = 0
+            while off + NLMSG_HDR.size <= len(data):
+                length, mtype, _, _, _ = NLMSG_HDR.unpack_from(data, off)
+                if mtype == NLMSG_DONE:
+                    return
+                if mtype == NLMSG_ERROR:
+                    raise OSError(f"netlink dump {request} failed")
+                if length < NLMSG_HDR.size:
+                    break
+                if mtype == reply:
+                    body = off + NLMSG_HDR.size
+                    yield data[body:body + len(header)], _rtattrs(data, body + len(header), off + length)
+                off += (length + 3) & ~3
+
+
+def netlink_addresses() -> Dict[int, List[Tuple[str, str]]]:
+    """All interface addresses (``addr/prefix``, scope) by ifindex, from one RTM_GETADDR dump."""
+    out: Dict[int, List[Tuple[str, str]]] = {}
+    for head, attrs in netlink_dump(RTM_GETADDR, IFADDRMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0), RTM_NEWADDR):
+        family, plen, _, scope, index = IFADDRMSG.unpack(head)
+        raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+        if raw and family in (socket.AF_INET, socket.AF_INET6):
+            out.setdefault(index, []).append((f"{socket.inet_ntop(family, raw)}/{plen}", IFA_SCOPES.get(scope, str(scope))))
+    return out
+
+
+def netlink_link_kinds() -> Dict[int, str]:
+    """Link kind (vlan, bridge, tun, wireguard...) by ifindex, from one RTM_GETLINK dump."""
+    out: Dict[int, str] = {}
+    for head, attrs in netlink_dump(RTM_GETLINK, IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0), RTM_NEWLINK):
+        index = IFINFOMSG.unpack(head)[2]
+        info = attrs.get(IFLA_LINKINFO)
+        kind = _rtattrs(info, 0, len(info)).get(IFLA_INFO_KIND) if info else None
+        if kind:
+            out[index] = kind.rstrip(b"\0").decode("ascii", "replace")
+    return out
+
+
+def native_interfaces() -> str:
+    """``ip -details addr``-style listing from /sys/class/net plus netlink addresses and link kinds."""
+    try:
+        addrs, kinds = netlink_addresses(), netlink_link_kinds()
+    except OSError:  # netlink unavailable: names, flags and MACs only
+        addrs, kinds = {}, {}
+    blocks = []
+    for d in sorted(Path("/sys/class/net").iterdir(), key=lambda p: int(_read(p / "ifindex", "0") or 0)):
+        name, index = d.name, int(_read(d / "ifindex", "0") or 0)
+        flags_v = int(_read(d / "flags", "0x0"), 16)
+        flags = [label for bit, label in IFF_FLAGS if flags_v & bit]
+        if _read(d / "carrier", "0") == "1":
+            flags.append("LOWER_UP")
+        lowers = [p.name[len("lower_"):] for p in d.glob("lower_*")]
+        uevent = dict(ln.split("=", 1) for ln in _read(d / "uevent", "").splitlines() if "=" in ln)
+        kind = kinds.get(index) or uevent.get("DEVTYPE") or ("wlan" if (d / "wireless").exists() or (d / "phy80211").exists() else "")
+        lines = [f"{index}: {name}{'@' + lowers[0] if len(lowers) == 1 else ''}: <{','.join(flags)}> "
+                 f"mtu {_read(d / 'mtu', '0')} state {_read(d / 'operstate', 'unknown').upper()}"]
+        link = ARPHRD_LINK.get(int(_read(d / "type", "0") or 0), "none")
+        lines.append(f"    link/{link} {_read(d / 'address', '')}".rstrip())
+        if kind:
+            lines.append(f"    {kind}")
+        for addr, scope in addrs.get(index, []):
+            lines.append(f"    {'inet6' if ':' in addr else 'inet'} {addr} scope {scope} {name}")
+        blocks.append("\n".join(lines))
+    return "\n".join(blocks)
+
+
+def native_routes() -> str:
+    """``ip route``-style listing from /proc/net/route."""
+    out = []
+    for ln in (PROC_NET / "route").read_text().splitlines()[1:]:
+        f = ln.split()
+        if len(f) < 8:
+            continue
+        flags = int(f[3], 16)
+        if not flags & RTF_UP:
+            continue
+        mask = int(f[7], 16)
+        plen = bin(mask).count("1")
+        dst = "default" if int(f[1], 16) == 0 and plen == 0 else f"{_hex_ipv4(f[1])}/{plen}"
+        via = f" via {_hex_ipv4(f[2])}" if flags & RTF_GATEWAY else ""
+        dev = f" dev {f[0]}" if f[0] != "*" else ""  # reject routes have no device
+        metric = f" metric {int(f[6])}" if int(f[6]) else ""
+        out.append(f"{'unreachable ' if flags & RTF_REJECT else ''}{dst}{via}{dev}{metric}")
+    return "\n".join(out)
+
+
+def native_routes6() -> str:
+    """``ip -6 route``-style listing from /proc/net/ipv6_route (main-table unicast routes)."""
+    out = []
+    for ln in (PROC_NET / "ipv6_route").read_text().splitlines():
+        f = ln.split()
+        if len(f) < 10:
+            continue
+        flags = int(f[8], 16)
+        dst_ip = _hex_ipv6(f[0], host_words=False)
+        if not flags & RTF_UP or flags & RTF6_LOCAL_OR_CACHE or dst_ip.startswith("ff") or f[9] == "lo":
+            continue
+        plen = int(f[1], 16)
+        dst = "default" if plen == 0 else f"{dst_ip}/{plen}"
+        via = f" via {_hex_ipv6(f[4], host_words=False)}" if flags & RTF_GATEWAY else ""
+        out.append(f"{dst}{via} dev {f[9]} metric {int(f[5], 16)}")
+    return "\n".join(out)
+
+
+def _socket_owners(inodes: Set[str]) -> Dict[str, List[Tuple[str, int, int]]]:
+    """Socket inode → [(comm, pid, fd)] from /proc/<pid>/fd; processes we may not inspect are skipped."""
+    owners: Dict[str, List[Tuple[str, int, int]]] = {}
+    for p in Path("/proc").iterdir():
+        if not p.name.isdigit():
+            continue
+        try:
+            fds = list((p / "fd").iterdir())
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                m = SOCKET_INODE_RE.match(os.readlink(fd))
+            except OSError:
+                continue
+            if m and m.group(1) in inodes:
+                owners.setdefault(m.group(1), []).append((_read(p / "comm", "?"), int(p.name), int(fd.name)))
+    return owners
+
+
+def _listening_rows() -> List[Tuple[str, str]]:
+    """(``ss``-style row, socket inode) for each listening TCP and unconnected UDP socket in /proc/net/{tcp,udp}[6]."""
+    rows = []
+    for proto, fname in (("tcp", "tcp"), ("tcp", "tcp6"), ("udp", "udp"), ("udp", "udp6")):
+        path = PROC_NET / fname
+        if not path.exists():
+            continue  # no IPv6 stack
+        for ln in path.read_text().splitlines()[1:]:
+            f = ln.split()
+            if len(f) < 10:
+                continue
+            st = f[3]
+            if proto == "tcp" and st not in TCP_STATES or proto == "udp" and st != UDP_UNCONN:
+                continue
+            (lh, lp), (rh, rp) = f[1].split(":"), f[2].split(":")
+            v6 = fname.endswith("6")
+            local = f"[{_hex_ipv6(lh)}]" if v6 else _hex_ipv4(lh)
+            peer = f"[{_hex_ipv6(rh)}]" if v6 else _hex_ipv4(rh)
+            rport = int(rp, 16)
+            rows.append((f"{proto} {TCP_STATES.get(st, 'UNCONN')} 0 0 {local}:{int(lp, 16)} {peer}:{rport if rport else '*'}", f[9]))
+    return rows
+
+
+def native_sockets() -> str:
+    """``ss -lntuap``-style listing of listening TCP and unconnected UDP sockets, with owning processes."""
+    rows = _listening_rows()
+    owners = _socket_owners({inode for _, inode in rows})
+    out = ["Netid State  Recv-Q Send-Q Local Address:Port Peer Address:Port Process"]
+    for row, inode in rows:
+        users = ",".join(f'("{comm}",pid={pid},fd={fd})' for comm, pid, fd in owners.get(inode, []))
+        out.append(f"{row} users:({users})" if users else row)
+    return "\n".join(out)
+
+
+def native_neighbors() -> str:
+    """``ip neigh``-style listing from /proc/net/arp."""
+    out = []
+    for ln in (PROC_NET / "arp").read_text().splitlines()[1:]:
+        f = ln.split()
+        if len(f) < 6:
+            continue
+        flags = int(f[2], 16)
+        state = "PERMANENT" if flags & 0x4 else ("REACHABLE" if flags & 0x2 else "INCOMPLETE")
+        lladdr = f" lladdr {f[3]}" if flags & 0x2 else ""
+        out.append(f"{f[0]} dev {f[5]}{lladdr} {state}")
+    return "\n".join(out)
+
+
+def _rfkill(types: Tuple[str, ...]) -> List[str]:
+    root = Path("/sys/class/rfkill")
+    out = []
+    for d in sorted(root.iterdir()) if root.is_dir() else []:
+        t = _read(d / "type", "")
+        if t in types:
+            out.append(f"{d.name}: {_read(d / 'name', '?')} type {t} soft_blocked {_read(d / 'soft', '?')} hard_blocked {_read(d / 'hard', '?')}")
+    return out
+
+
+def native_wifi() -> str:
+    """Wireless interfaces (sysfs) and WLAN rfkill switches; empty when the host has no Wi-Fi hardware."""
+    ifaces = [f"wireless interface {d.name} state {_read(d / 'operstate', 'unknown')}"
+              for d in sorted(Path("/sys/class/net").iterdir()) if (d / "wireless").exists() or (d / "phy80211").exists()]
+    return "\n".join(ifaces + _rfkill(("wlan",)))
+
+
+def native_bluetooth() -> str:
+    """Bluetooth controllers (/sys/class/bluetooth) and rfkill switches; empty when there are none."""
+    root = Path("/sys/class/bluetooth")
+    ctrls = [f"bluetooth controller {d.name}" for d in sorted(root.iterdir()) if ":" not in d.name] if root.is_dir() else []
+    return "\n".join(ctrls + _rfkill(("bluetooth",)))
+
+
+def native_block() -> str:
+    """``lsblk``-style block device listing from /sys/block, followed by /proc/mounts."""
+    out = ["NAME RM RO SIZE MODEL"]
+    for d in sorted(Path("/sys/block").iterdir()):
+        size = int(_read(d / "size", "0") or 0) * 512
+        model = " ".join(filter(None, (_read(d / "device" / "vendor", ""), _read(d / "device" / "model", ""))))
+        out.append(f"{d.name} {_read(d / 'removable', '0')} {_read(d / 'ro', '0')} {size} {model}".rstrip())
+    out.append("")
+    out.append(_read(Path("/proc/mounts"), ""))
+    return "\n".join(out)
+
+
+# Evidence group → native readers replacing the group's shell commands.
+NATIVE_COLLECTORS = {
+    "interfaces": (("interfaces", native_interfaces),),
+    "routes": (("routes", native_routes), ("routes6", native_routes6)),
+    "listening_ports": (("sockets", native_sockets),),
+    "arp": (("neighbors", native_neighbors),),
+    "wifi": (("wifi", native_wifi),),
+    "bluetooth": (("bluetooth", native_bluetooth),),
+    "removable_media": (("block", native_block),),
+}
+
+
+def collect_native(groups: List[str]) -> Dict[str, List[CmdResult]]:
+    """Run the native readers for ``groups``; a group whose reader fails is left out (shell fallback)."""
+    out: Dict[str, List[CmdResult]] = {}
+    for group in groups:
+        results = []
+        for name, reader in NATIVE_COLLECTORS.get(group, ()):
+            start = time.monotonic()
+            try:
+                text = reader()
+            except (OSError, ValueError):
+                results = []
+                break
+            results.append(CmdResult(ok=True, exit_code=0, stdout=text.strip(), stderr="", cmd=f"native:{name}",
+                                     duration_ms=int((time.monotonic() - start) * 1000)))
+        if results:
+            out[group] = results
+    return out
+
+
+def output_digest(result: CmdResult) -> str:
+    """SHA-256 of what a command reported (not how long it took), for comparing runs."""
+    h = hashlib.sha256()
+    for part in (result.cmd, str(result.ok), str(result.exit_code), result.stderr or "", result.stdout or ""):
+        h.update(part.encode("utf-8", errors="replace") + b"\0")
+    return h.hexdigest()
+
+
+def save_raw(writer: BundleWriter, name: str, result: CmdResult) -> str:
+    body = [f"## cmd: {result.cmd}", f"## ok: {result.ok}  exit_code: {result.exit_code}  duration_ms: {result.duration_ms}"]
     if result.stderr:
         body.append("## stderr:\n" + result.stderr)
     body.append("## stdout:\n" + (result.stdout or ""))
-    write_text(path, "\n".join(body) + "\n")
-    return f"raw/{fname}"
+    rel = writer.write_text(f"raw/{name}.txt", "\n".join(body) + "\n")
+    writer.output_hashes[rel] = output_digest(result)
+    return rel
+
+
+RAW_NAME_RE = re.compile(r"^(?P<group>.+)_(?P<idx>\d+)\.txt$")
+RAW_STATUS_RE = re.compile(r"^## ok: (?P<ok>\w+)\s+exit_code: (?P<rc>-?\d+)(?:\s+duration_ms: (?P<ms>\d+))?")
+
+
+def parse_raw(text: str) -> CmdResult:
+    """Inverse of save_raw(): rebuild the CmdResult from a raw/*.txt file."""
+    head, sep, stdout = text.partition("\n## stdout:\n")
+    if not sep and head.startswith("## stdout:\n"):
+        head, stdout = "", head[len("## stdout:\n"):]
+    if stdout.endswith("\n"):
+        stdout = stdout[:-1]
+    cmd, ok, rc, ms, stderr = "", False, 1, 0, ""
+    lines = head.split("\n")
+    for i, ln in enumerate(lines):
+        if ln.startswith("## cmd: "):
+            cmd = ln[len("## cmd: "):]
+        elif ln.startswith("## ok: "):
+            m = RAW_STATUS_RE.match(ln)
+            if m:
+                ok, rc, ms = m.group("ok") == "True", int(m.group("rc")), int(m.group("ms") or 0)
+        elif ln == "## stderr:":
+            stderr = "\n".join(lines[i + 1:])
+            break
+    return CmdResult(ok=ok, exit_code=rc, stdout=stdout, stderr=stderr, cmd=cmd, duration_ms=ms)
+
+
+def load_raw_evidence(bundle: Path, groups: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Evidence as collect_evidence() returned it, rebuilt from a bundle's raw/ outputs (optionally only ``groups``)."""
+    found: Dict[str, List[Tuple[int, str]]] = {}
+    for p in (bundle / "raw").glob("*.txt"):
+        m = RAW_NAME_RE.match(p.name)
+        if m and (groups is None or m.group("group") in groups):
+            found.setdefault(m.group("group"), []).append((int(m.group("idx")), p.name))
+    evidence: Dict[str, Any] = {"commands": {}, "raw_files": {}}
+    for group, items in found.items():
+        items.sort()
+        evidence["commands"][group] = [
+            parse_raw((bundle / "raw" / name).read_text(encoding="utf-8", errors="replace")).to_dict() for _, name in items
+        ]
+        evidence["raw_files"][group] = [f"raw/{name}" for _, name in items]
+    evidence["records"] = parse_records(evidence["commands"])
+    return evidence
+
 
+def run_commands(cmds: List[str], workers: int, budget_s: float, timeout: float = CMD_TIMEOUT_S) -> Dict[str, CmdResult]:
+    """Run independent commands on a bounded thread pool under one wall-clock budget.
 
-def collect_evidence(raw_dir: Path) -> Dict[str, Any]:
+    Each command gets min(timeout, budget left when it starts). Commands that
+    reach a worker with less than MIN_CMD_SLICE_S of budget left are not
+    started and are recorded as skipped. Duplicate command strings run once.
+    """
+    deadline = time.monotonic() + max(0.0, budget_s)
+
+    def one(cmd: str) -> CmdResult:
+        remaining = deadline - time.monotonic()
+        if remaining < MIN_CMD_SLICE_S:
+            return CmdResult(ok=False, exit_code=124, stdout="", stderr=SKIPPED_STDERR, cmd=cmd)
+        return run_cmd(cmd, timeout=min(timeout, remaining))
+
+    unique = list(dict.fromkeys(cmds))
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        return dict(zip(unique, pool.map(one, unique)))
+
+
+def collect_evidence(writer: BundleWriter, workers: int = DEFAULT_COLLECT_WORKERS,
+                     budget_s: float = DEFAULT_COLLECT_BUDGET_S, collector: str = "auto") -> Dict[str, Any]:
+    """Collect every evidence group and write its raw/ files.
+
+    With ``collector="auto"`` on Linux, the groups in NATIVE_COLLECTORS are read
+    in-process; only the remaining groups, and any group whose native reader
+    failed, run the shell commands. ``collector="shell"`` runs the commands only.
+    """
     cmds = collect_platform_commands()
+    start = time.monotonic()
+    native: Dict[str, List[CmdResult]] = {}
+    if collector == "auto" and platform.system() == "Linux":
+        native = collect_native([g for g in cmds if g in NATIVE_COLLECTORS])
+    shell_cmds = [c for group, cmd_list in cmds.items() if group not in native for c in cmd_list]
+    results = run_commands(shell_cmds, workers, budget_s - (time.monotonic() - start)) if shell_cmds else {}
     evidence: Dict[str, Any] = {"commands": {}, "raw_files": {}}
+    # raw files are written here, after collection, in platform-command order
     for group, cmd_list in cmds.items():
         group_results = []
         raw_paths = []
-        for i, cmd in enumerate(cmd_list, start=1):
-            res = run_cmd(cmd)
+        for i, res in enumerate(native.get(group) or [results[cmd] for cmd in cmd_list], start=1):
             group_results.append(res.to_dict())
-            raw_paths.append(save_raw(raw_dir, f"{group}_{i:02d}", res))
+            raw_paths.append(save_raw(writer, f"{group}_{i:02d}", res))
         evidence["commands"][group] = group_results
         evidence["raw_files"][group] = raw_paths
+    evidence["records"] = parse_records(evidence["commands"])
+    evidence["collection"] = {
+        "collector": collector,
+        "native_groups": [g for g in cmds if g in native],
+        "shell_groups": [g for g in cmds if g not in native],
+        "workers": max(1, int(workers)),
+        "budget_seconds": budget_s,
+        "duration_ms": int((time.monotonic() - start) * 1000),
+    }
     return evidence
 
 
@@ -183,92 +672,440 @@ PRIVATE_NETS_V4 = [
 ]
 
 
+IPV4_CANDIDATE_RE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+_OCTET = r"(?:[01]?\d?\d|2[0-4]\d|25[0-5])"
+IPV4_VALID_RE = re.compile(rf"{_OCTET}(?:\.{_OCTET}){{3}}")
+
+
 def extract_ipv4s(text: str) -> List[str]:
-    candidates = re.findall(r"\b(?:\d{1,3}\.){3}\d{1,3}\b", text)
-    out = []
-    for c in candidates:
-        parts = c.split(".")
-        if all(0 <= int(p) <= 255 for p in parts):
-            out.append(c)
-    seen = set()
-    final = []
-    for ip in out:
-        if ip not in seen:
-            seen.add(ip)
-            final.append(ip)
-    return final
-
-
-def analyze(policy: Dict[str, Any], evidence: Dict[str, Any]) -> Dict[str, Any]:
-    disallowed_patterns = [p.lower() for p in policy.get("disallowed_interface_patterns", [])]
-    allowed_dns = set(policy.get("allowed_dns", []) or [])
-    allow_default_gw = bool(policy.get("allow_default_gateway", False))
-
-    def group_stdout(group: str) -> str:
-        res = evidence.get("commands", {}).get(group, [])
-        return "\n".join([(r.get("stdout") or "") for r in res if isinstance(r, dict)])
-
-    interfaces_blob = group_stdout("interfaces")
-    routes_blob = group_stdout("routes")
-    dns_blob = group_stdout("dns")
-    wifi_blob = group_stdout("wifi")
-    bt_blob = group_stdout("bluetooth")
-    firewall_blob = group_stdout("firewall")
-
-    iface_suspects = []
-    for ln in [ln.strip() for ln in interfaces_blob.splitlines() if ln.strip()]:
-        low = ln.lower()
-        if any(p in low for p in disallowed_patterns):
-            iface_suspects.append(ln)
-
-    gateways = []
-    for m in re.finditer(r"(default\s+(?:via\s+)?)(\d{1,3}(?:\.\d{1,3}){3})", routes_blob, re.IGNORECASE):
-        gateways.append(m.group(2))
-    for m in re.finditer(r"^\s*0\.0\.0\.0\s+0\.0\.0\.0\s+(\d{1,3}(?:\.\d{1,3}){3})", routes_blob, re.MULTILINE):
-        gateways.append(m.group(1))
-    gateways = list(dict.fromkeys(gateways))
-
-    dns_ips = extract_ipv4s(dns_blob)
-    flagged_dns = [ip for ip in dns_ips if (ip not in allowed_dns)] if allowed_dns else []
-
-    wifi_indicators = bool(wifi_blob.strip()) and not re.search(r"(no such|not found)", wifi_blob, re.IGNORECASE)
-    bt_indicators = bool(bt_blob.strip()) and not re.search(r"(no such|not found)", bt_blob, re.IGNORECASE)
-
-    fw_enabled = None
-    if firewall_blob.strip():
-        low = firewall_blob.lower()
-        if re.search(r"\bstate\s+on\b", low) or "enabled" in low or "active" in low or "running" in low:
-            fw_enabled = True
-        if re.search(r"\bstate\s+off\b", low) or "disabled" in low or "inactive" in low:
-            fw_enabled = False
-
-    checks = []
-    if allow_default_gw:
-        checks.append({"check": "default_gateway_allowed", "pass": True, "details": "Policy allows a default gateway."})
-    else:
-        checks.append({"check": "no_default_gateway", "pass": (len(gateways) == 0), "details": {"detected_gateways": gateways}})
-    checks.append({"check": "no_disallowed_interfaces", "pass": (len(iface_suspects) == 0), "details": {"matches": iface_suspects}})
-    checks.append({"check": "dns_allowed", "pass": (len(flagged_dns) == 0), "details": {"flagged_dns": flagged_dns}})
-    checks.append({"check": "wifi_not_present_or_disabled", "pass": (not wifi_indicators), "details": {"indicator": wifi_indicators}})
-    checks.append({"check": "bluetooth_not_present_or_disabled", "pass": (not bt_indicators), "details": {"indicator": bt_indicators}})
-    checks.append({"check": "firewall_enabled", "pass": True if fw_enabled is None else bool(fw_enabled), "details": {"status": "unknown" if fw_enabled is None else ("enabled" if fw_enabled else "disabled")}})
+    # Dedupe before validating: each distinct candidate is checked once, in C.
+    return [ip for ip in dict.fromkeys(IPV4_CANDIDATE_RE.findall(text)) if IPV4_VALID_RE.fullmatch(ip)]
+
+
+# Structured parsers for Linux command outputs. Each takes one command's
+# stdout and returns typed records keyed by kind, or None when the text is not
+# in that command's format (e.g. a `|| netstat` fallback answered instead).
+IP_LINK_RE = re.compile(r"^(\d+):\s+([^:@\s]+)(?:@(\S+?))?:\s+<([^>]*)>(.*)$")
+IP_LINK_DETAIL_SKIP = frozenset(("inet", "inet6", "valid_lft", "altname", "bridge_slave", "bond_slave"))
+ROUTE_TYPES = frozenset(("unicast", "local", "broadcast", "multicast", "unreachable", "prohibit", "blackhole", "throw", "nat", "anycast"))
+ROUTE_KEYS = frozenset(("via", "dev", "proto", "scope", "src", "metric", "table", "pref", "weight", "mtu", "expires"))
+SS_USER_RE = re.compile(r'\("([^"]*)",pid=(\d+)')
+NFT_BLOCK_RE = re.compile(r"^(\w+)\s+(.*?)\s*\{$")
+NFT_HOOK_RE = re.compile(r"\btype\s+(\S+)\s+hook\s+(\S+)(?:\s+device\s+\S+)?\s+priority\s+([^;]+);")
+NFT_POLICY_RE = re.compile(r"\bpolicy\s+(\w+);")
+
+
+def _int_or_none(v: Optional[str]) -> Optional[int]:
+    return int(v) if v is not None and v.isdigit() else None
+
+
+def parse_ip_addr(text: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """``ip -details addr show`` → interfaces (name, flags, state, mtu, link type, MAC, kind, addresses)."""
+    ifaces: List[Dict[str, Any]] = []
+    cur: Optional[Dict[str, Any]] = None
+    after_link = False
+    for ln in text.splitlines():
+        m = IP_LINK_RE.match(ln)
+        if m:
+            rest = m.group(5).split()
+            opts = dict(zip(rest[::2], rest[1::2]))
+            cur = {
+                "index": int(m.group(1)), "name": m.group(2), "parent": m.group(3),
+                "flags": [f for f in m.group(4).split(",") if f], "state": opts.get("state"),
+                "mtu": _int_or_none(opts.get("mtu")), "link_type": None, "mac": None, "kind": None,
+                "ipv4": [], "ipv6": [],
+            }
+            ifaces.append(cur)
+            after_link = False
+            continue
+        parts = ln.split()
+        if cur is None or not parts:
+            continue
+        key = parts[0]
+        if key.startswith("link/"):
+            cur["link_type"] = key[5:]
+            if len(parts) > 1 and ":" in parts[1]:
+                cur["mac"] = parts[1]
+            after_link = True
+            continue
+        if key == "inet" and len(parts) > 1:
+            cur["ipv4"].append(parts[1])
+        elif key == "inet6" and len(parts) > 1:
+            cur["ipv6"].append(parts[1])
+        elif after_link and key not in IP_LINK_DETAIL_SKIP and key.replace("_", "").isalnum():
+            cur["kind"] = key  # -details: the line after link/ starts with the link kind (vlan, bridge, tun...)
+        after_link = False
+    if text.strip() and not ifaces:
+        return None
+    return {"interfaces": ifaces}
+
+
+def _parse_ip_route(text: str, family: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    routes: List[Dict[str, Any]] = []
+    for ln in text.splitlines():
+        parts = ln.split()
+        if not parts:
+            continue
+        if parts[0] == "nexthop" and routes:
+            hop = dict(zip(parts[1::2], parts[2::2]))
+            routes[-1].setdefault("nexthops", []).append({k: hop[k] for k in ("via", "dev", "weight") if k in hop})
+            continue
+        rtype = parts.pop(0) if parts[0] in ROUTE_TYPES and len(parts) > 1 else "unicast"
+        rec: Dict[str, Any] = {"family": family, "type": rtype, "dst": parts[0]}
+        flags = []
+        i = 1
+        while i < len(parts):
+            if parts[i] in ROUTE_KEYS and i + 1 < len(parts):
+                rec[parts[i]] = parts[i + 1]
+                i += 2
+            else:
+                flags.append(parts[i])
+                i += 1
+        if "metric" in rec:
+            rec["metric"] = _int_or_none(rec["metric"])
+        if flags:
+            rec["flags"] = flags
+        routes.append(rec)
+    return {"routes": routes}
+
+
+def parse_ip_route(text: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    return _parse_ip_route(text, "inet")
+
+
+def parse_ip6_route(text: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    return _parse_ip_route(text, "inet6")
+
+
+def _split_host_port(addr: str) -> Tuple[str, Optional[int]]:
+    host, _, port = addr.rpartition(":")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    return host, _int_or_none(port)
+
+
+def parse_ss(text: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """``ss -lntuap`` → sockets (proto, state, local/peer address and port, owning processes)."""
+    lines = text.splitlines()
+    if not lines or not lines[0].startswith("Netid"):
+        return None
+    sockets = []
+    for ln in lines[1:]:
+        parts = ln.split(None, 6)
+        if len(parts) < 6:
+            continue
+        local, lport = _split_host_port(parts[4])
+        peer, pport = _split_host_port(parts[5])
+        procs = [{"name": n, "pid": int(p)} for n, p in SS_USER_RE.findall(parts[6])] if len(parts) > 6 else []
+        sockets.append({
+            "proto": parts[0], "state": parts[1], "local_address": local, "local_port": lport,
+            "peer_address": peer, "peer_port": pport, "processes": procs,
+        })
+    return {"sockets": sockets}
+
+
+def parse_ip_neigh(text: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """``ip neigh show`` → neighbors (IP, device, link-layer address, NUD state, router flag)."""
+    neighbors = []
+    for ln in text.splitlines():
+        parts = ln.split()
+        if len(parts) < 2 or parts[1] != "dev":
+            continue
+        rec: Dict[str, Any] = {"ip": parts[0], "dev": parts[2] if len(parts) > 2 else None, "lladdr": None,
+                               "state": None, "router": "router" in parts}
+        if "lladdr" in parts and parts.index("lladdr") + 1 < len(parts):
+            rec["lladdr"] = parts[parts.index("lladdr") + 1]
+        if parts[-1].isupper():
+            rec["state"] = parts[-1]
+        neighbors.append(rec)
+    if text.strip() and not neighbors:
+        return None
+    return {"neighbors": neighbors}
+
+
+def parse_nft(text: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """``nft list ruleset`` → chains (hook, priority, policy) and rules, each tagged with family/table/chain."""
+    chains: List[Dict[str, Any]] = []
+    rules: List[Dict[str, Any]] = []
+    stack: List[Tuple[str, str]] = []
+    family = table = ""
+    chain: Optional[Dict[str, Any]] = None
+    saw_table = False
+    for ln in text.splitlines():
+        s = ln.strip()
+        if not s or s.startswith("#"):
+            continue
+        if s == "}":
+            if stack:
+                kind, _ = stack.pop()
+                if kind == "chain":
+                    chain = None
+            continue
+        m = NFT_BLOCK_RE.match(s)
+        if m and m.group(1) in ("table", "chain", "set", "map", "flowtable", "ct", "counter", "quota", "limit", "secmark", "synproxy"):
+            kind, name = m.group(1), m.group(2)
+            if kind == "table":
+                saw_table = True
+                bits = name.split()
+                family, table = (bits[0], bits[1]) if len(bits) == 2 else ("ip", name)
+            elif kind == "chain" and stack and stack[-1][0] == "table":
+                chain = {"family": family, "table": table, "chain": name, "type": None, "hook": None, "priority": None, "policy": None}
+                chains.append(chain)
+            stack.append((kind, name))
+            continue
+        opened = s.count("{") - s.count("}")
+        if chain is not None and stack and stack[-1][0] == "chain":
+            hm = NFT_HOOK_RE.search(s)
+            pm = NFT_POLICY_RE.search(s)
+            if hm or (pm and s.startswith("policy ")):
+                if hm:
+                    chain.update(type=hm.group(1), hook=hm.group(2), priority=hm.group(3).strip())
+                if pm:
+                    chain["policy"] = pm.group(1)
+            else:
+                rules.append({"family": family, "table": table, "chain": chain["chain"], "rule": s})
+        for _ in range(max(0, opened)):
+            stack.append(("{", ""))
+        for _ in range(max(0, -opened)):
+            if stack and stack[-1][0] == "{":
+                stack.pop()
+    if not saw_table:  # empty output: nft missing (the command ends in `|| true`) or no ruleset
+        return None
+    return {"chains": chains, "rules": rules}
+
+
+def parse_iptables_s(text: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """``iptables -S`` → chains (built-in policy) and rules of the filter table."""
+    chains: List[Dict[str, Any]] = []
+    rules: List[Dict[str, Any]] = []
+    for ln in text.splitlines():
+        parts = ln.split(None, 2)
+        if len(parts) < 2 or parts[0] not in ("-P", "-N", "-A"):
+            continue
+        if parts[0] == "-A":
+            rules.append({"family": "ip", "table": "filter", "chain": parts[1], "rule": parts[2] if len(parts) > 2 else ""})
+        else:
+            chains.append({"family": "ip", "table": "filter", "chain": parts[1], "type": "filter",
+                           "hook": parts[1].lower() if parts[0] == "-P" else None, "priority": None,
+                           "policy": parts[2].lower() if parts[0] == "-P" and len(parts) > 2 else None})
+    if not chains and not rules:  # iptables always prints the built-in policies
+        return None
+    return {"chains": chains, "rules": rules}
+
+
+# Command prefix (as listed in collect_platform_commands, or a native reader) → parser.
+RECORD_PARSERS = (
+    ("ip -details addr show", parse_ip_addr),
+    ("ip route show", parse_ip_route),
+    ("ip -6 route show", parse_ip6_route),
+    ("ss -lntuap", parse_ss),
+    ("ip neigh show", parse_ip_neigh),
+    ("native:interfaces", parse_ip_addr),
+    ("native:routes6", parse_ip6_route),
+    ("native:routes", parse_ip_route),
+    ("native:sockets", parse_ss),
+    ("native:neighbors", parse_ip_neigh),
+    ("nft list ruleset", parse_nft),
+    ("iptables -S", parse_iptables_s),
+)
+
+
+def parse_records(commands: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Typed records from every successful command that has a parser.
+
+    A kind is present only when some command for it was parsed, so an empty
+    list means "parsed, none found". ``default_gateways`` (IPv4 next hops of
+    default routes) is precomputed for the no_default_gateway check.
+    """
+    records: Dict[str, Any] = {}
+    for res in commands.values():
+        for r in res:
+            if not isinstance(r, dict) or r.get("exit_code") != 0:
+                continue
+            cmd = str(r.get("cmd") or "")
+            for prefix, parser in RECORD_PARSERS:
+                if cmd.startswith(prefix):
+                    parsed = parser(r.get("stdout") or "")
+                    for kind, items in (parsed or {}).items():
+                        records.setdefault(kind, []).extend(items)
+                    if parsed is not None and parser is parse_ip_route:
+                        records.setdefault("default_gateways", [])
+                    break
+    if "default_gateways" in records:
+        gws = []
+        for rt in records.get("routes", []):
+            if rt["dst"] in ("default", "0.0.0.0/0") and rt["type"] == "unicast":
+                gws += [hop.get("via") for hop in [rt] + rt.get("nexthops", [])]
+        records["default_gateways"] = [gw for gw in dict.fromkeys(gws) if gw and IPV4_VALID_RE.fullmatch(gw)]
+    return records
+
+
+# Evidence groups each check reads; a skipped or timed-out command in one of
+# them is listed on the check; with the policy's fail_on_incomplete_evidence
+# the check is also inconclusive (reported as failed).
+CHECK_GROUPS = {
+    "no_default_gateway": ("routes",),
+    "no_disallowed_interfaces": ("interfaces",),
+    "dns_allowed": ("dns",),
+    "wifi_not_present_or_disabled": ("wifi",),
+    "bluetooth_not_present_or_disabled": ("bluetooth",),
+    "firewall_enabled": ("firewall",),
+}
+
+
+def incomplete_commands(evidence: Dict[str, Any]) -> Dict[str, List[Dict[str, str]]]:
+    """Per evidence group, the commands that were skipped or timed out (exit code 124)."""
+    out: Dict[str, List[Dict[str, str]]] = {}
+    for group, res in (evidence.get("commands") or {}).items():
+        for r in res:
+            if not isinstance(r, dict) or r.get("exit_code") != 124:
+                continue
+            stderr = str(r.get("stderr") or "")
+            if stderr == TIMEOUT_STDERR:
+                status = "timeout"
+            elif stderr == SKIPPED_STDERR:
+                status = "skipped"
+            else:
+                continue
+            out.setdefault(group, []).append({"cmd": str(r.get("cmd", "")), "status": status})
+    return out
+
+
+# Policy-independent matchers used by analyze(), compiled once at import.
+DEFAULT_GW_RE = re.compile(r"(default\s+(?:via\s+)?)(\d{1,3}(?:\.\d{1,3}){3})", re.IGNORECASE)
+ZERO_ROUTE_RE = re.compile(r"^\s*0\.0\.0\.0\s+0\.0\.0\.0\s+(\d{1,3}(?:\.\d{1,3}){3})", re.MULTILINE)
+NOT_PRESENT_RE = re.compile(r"(no such|not found)", re.IGNORECASE)
+FW_STATE_ON_RE = re.compile(r"\bstate\s+on\b")
+FW_STATE_OFF_RE = re.compile(r"\bstate\s+off\b")
+
+
+def detect_gateways(evidence: Dict[str, Any], routes_blob: Optional[str] = None) -> List[str]:
+    """IPv4 default gateways: from parsed route records when present, else regexes over the routes output."""
+    records = evidence.get("records") or {}
+    if "default_gateways" in records:
+        return list(records["default_gateways"])
+    # no parsed `ip route` output (other platforms, older bundles)
+    if routes_blob is None:
+        routes_blob = "\n".join((r.get("stdout") or "") for r in evidence.get("commands", {}).get("routes", []) if isinstance(r, dict))
+    gateways = [m.group(2) for m in DEFAULT_GW_RE.finditer(routes_blob)]
+    gateways += [m.group(1) for m in ZERO_ROUTE_RE.finditer(routes_blob)]
+    return list(dict.fromkeys(gateways))
+
+
+class CompiledPolicy:
+    """A policy turned into ready-to-run matchers: build once, then ``analyze`` many evidence sets.
+
+    Disallowed interface patterns become one alternation that is run over the
+    lowercased interfaces output in a single pass; only lines containing a hit
+    are cut out.
+    """
+
+    def __init__(self, policy: Dict[str, Any]) -> None:
+        self.policy = policy
+        self.name = policy.get("policy_name", "unnamed")
+        patterns = sorted({str(p).lower() for p in policy.get("disallowed_interface_patterns", []) or [] if p}, key=len, reverse=True)
+        self.iface_re = re.compile("|".join(map(re.escape, patterns))) if patterns else None
+        self.allowed_dns = frozenset(policy.get("allowed_dns", []) or [])
+        self.allow_default_gw = bool(policy.get("allow_default_gateway", False))
+        self.fail_on_incomplete = bool(policy.get("fail_on_incomplete_evidence", False))
+
+    def interface_matches(self, blob: str) -> List[str]:
+        if self.iface_re is None:
+            return []
+        low = blob.lower()
+        if len(low) != len(blob):  # lowercasing changed offsets (rare non-ASCII); match per line
+            return [ln.strip() for ln in blob.splitlines() if self.iface_re.search(ln.lower())]
+        out = []
+        pos = 0
+        for m in self.iface_re.finditer(low):
+            if m.start() < pos:
+                continue  # another hit on a line already taken
+            start = low.rfind("\n", 0, m.start()) + 1
+            end = low.find("\n", m.end())
+            pos = len(low) if end < 0 else end
+            out.append(blob[start:pos].strip())
+        return out
+
+    def analyze(self, evidence: Dict[str, Any]) -> Dict[str, Any]:
+        def group_stdout(group: str) -> str:
+            res = evidence.get("commands", {}).get(group, [])
+            return "\n".join([(r.get("stdout") or "") for r in res if isinstance(r, dict)])
+
+        interfaces_blob = group_stdout("interfaces")
+        routes_blob = group_stdout("routes")
+        dns_blob = group_stdout("dns")
+        wifi_blob = group_stdout("wifi")
+        bt_blob = group_stdout("bluetooth")
+        firewall_blob = group_stdout("firewall")
+
+        iface_suspects = self.interface_matches(interfaces_blob)
+
+        gateways = detect_gateways(evidence, routes_blob)
+
+        dns_ips = extract_ipv4s(dns_blob)
+        flagged_dns = [ip for ip in dns_ips if (ip not in self.allowed_dns)] if self.allowed_dns else []
+
+        wifi_indicators = bool(wifi_blob.strip()) and not NOT_PRESENT_RE.search(wifi_blob)
+        bt_indicators = bool(bt_blob.strip()) and not NOT_PRESENT_RE.search(bt_blob)
+
+        fw_enabled = None
+        if firewall_blob.strip():
+            low = firewall_blob.lower()
+            if FW_STATE_ON_RE.search(low) or "enabled" in low or "active" in low or "running" in low:
+                fw_enabled = True
+            if FW_STATE_OFF_RE.search(low) or "disabled" in low or "inactive" in low:
+                fw_enabled = False
+
+        checks = []
+        if self.allow_default_gw:
+            checks.append({"check": "default_gateway_allowed", "pass": True, "details": "Policy allows a default gateway."})
+        else:
+            checks.append({"check": "no_default_gateway", "pass": (len(gateways) == 0), "details": {"detected_gateways": gateways}})
+        checks.append({"check": "no_disallowed_interfaces", "pass": (len(iface_suspects) == 0), "details": {"matches": iface_suspects}})
+        checks.append({"check": "dns_allowed", "pass": (len(flagged_dns) == 0), "details": {"flagged_dns": flagged_dns}})
+        checks.append({"check": "wifi_not_present_or_disabled", "pass": (not wifi_indicators), "details": {"indicator": wifi_indicators}})
+        checks.append({"check": "bluetooth_not_present_or_disabled", "pass": (not bt_indicators), "details": {"indicator": bt_indicators}})
+        checks.append({"check": "firewall_enabled", "pass": True if fw_enabled is None else bool(fw_enabled), "details": {"status": "unknown" if fw_enabled is None else ("enabled" if fw_enabled else "disabled")}})
+
+        incomplete = incomplete_commands(evidence)
+        for c in checks:
+            missing = [dict(item, group=g) for g in CHECK_GROUPS.get(c["check"], ()) for item in incomplete.get(g, [])]
+            if missing:
+                c["incomplete_commands"] = missing
+                if self.fail_on_incomplete:
+                    c["pass"] = False
+                    c["inconclusive"] = True
+        if incomplete and self.fail_on_incomplete:
+            checks.append({
+                "check": "evidence_collection_complete",
+                "pass": False,
+                "details": "One or more evidence commands were skipped or timed out; affected checks are inconclusive.",
+                "incomplete_commands": [dict(item, group=g) for g, items in incomplete.items() for item in items],
+            })
 
-    overall_pass = all(bool(c.get("pass", False)) for c in checks)
+        overall_pass = all(bool(c.get("pass", False)) for c in checks)
+
+        return {
+            "policy_name": self.name,
+            "overall_pass": overall_pass,
+            "checks": checks,
+            "incomplete_evidence": incomplete,
+            "normalized": {
+                "interfaces_suspect_lines": iface_suspects,
+                "detected_gateways": gateways,
+                "dns_extracted": dns_ips,
+                "dns_flagged": flagged_dns,
+                "wifi_indicator": wifi_indicators,
+                "bluetooth_indicator": bt_indicators,
+                "firewall_enabled": fw_enabled,
+            },
+        }
 
-    return {
-        "policy_name": policy.get("policy_name", "unnamed"),
-        "overall_pass": overall_pass,
-        "checks": checks,
-        "normalized": {
-            "interfaces_suspect_lines": iface_suspects,
-            "detected_gateways": gateways,
-            "dns_extracted": dns_ips,
-            "dns_flagged": flagged_dns,
-            "wifi_indicator": wifi_indicators,
-            "bluetooth_indicator": bt_indicators,
-            "firewall_enabled": fw_enabled,
-        },
-    }
+
+def analyze(policy: Any, evidence: Dict[str, Any]) -> Dict[str, Any]:
+    """Evaluate one evidence set; ``policy`` is a policy dict or a CompiledPolicy."""
+    compiled = policy if isinstance(policy, CompiledPolicy) else CompiledPolicy(policy)
+    return compiled.analyze(evidence)
 
 
 def tcp_connect_test(host: str, port: int, timeout_s: int) -> Dict[str, Any]:
@@ -291,47 +1128,194 @@ def tcp_connect_test(host: str, port: int, timeout_s: int) -> Dict[str, Any]:
     }
 
 
-def ping_once(ip: str, timeout_ms: int) -> bool:
-    sysname = platform.system().lower()
-    if "windows" in sysname:
-        cmd = f"ping -n 1 -w {int(timeout_ms)} {ip}"
-    elif "darwin" in sysname or "mac" in sysname:
-        cmd = f"ping -c 1 -W 1 {shlex.quote(ip)}"
-    else:
-        sec = max(1, int((timeout_ms + 999) / 1000))
-        cmd = f"ping -c 1 -W {sec} {shlex.quote(ip)}"
-    return run_cmd(cmd, timeout=max(2, int((timeout_ms + 999) / 1000) + 2)).ok
+DEFAULT_PROBE_METHODS = ("tcp",)
+DEFAULT_PROBE_PORTS = (22, 80, 135, 443, 445, 3389)
+DEFAULT_HOST_TIMEOUT_MS = 1000
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
 
 
-def subnet_discovery(cidr: str, timeout_ms: int, concurrency: int) -> Dict[str, Any]:
-    net = ipaddress.ip_network(cidr, strict=False)
-    hosts = [str(h) for h in net.hosts()]
-    found: List[str] = []
-    lock = threading.Lock()
-    idx = {"i": 0}
+def _icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(int.from_bytes(data[i:i + 2], "big") for i in range(0, len(data), 2))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
 
-    def worker():
-        while True:
-            with lock:
-                if idx["i"] >= len(hosts):
-                    return
-                ip = hosts[idx["i"]]
-                idx["i"] += 1
-            if ping_once(ip, timeout_ms=timeout_ms):
-                with lock:
-                    found.append(ip)
 
-    threads = []
-    concurrency = max(1, min(int(concurrency), 256))
-    for _ in range(concurrency):
-        t = threading.Thread(target=worker, daemon=True)
-        threads.append(t)
-        t.start()
-    for t in threads:
-        t.join()
+def icmp_dgram_available() -> bool:
+    """True when the kernel allows unprivileged ICMP datagram sockets (Linux ping_group_range, macOS)."""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
 
-    found_sorted = sorted(found, key=lambda s: tuple(int(x) for x in s.split("."))) if found else []
-    return {"cidr": str(net), "hosts_tested": len(hosts), "responsive_hosts": found_sorted}
+# Errors that answer the question "is the host up?" with no; any other
+# OSError (EMFILE, ENOBUFS, EPERM...) means the probe itself failed.
+PROBE_NO_ANSWER_ERRNOS = frozenset((errno.ETIMEDOUT, errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EHOSTDOWN))
+
+
+def _socket_limit() -> Optional[int]:
+    """Soft RLIMIT_NOFILE, or None where it cannot be read (Windows)."""
+    try:
+        import resource
+        soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    except (ImportError, OSError, ValueError):
+        return None
+    return None if soft == resource.RLIM_INFINITY else int(soft)
+
+
+async def _tcp_probe(ip: str, port: int) -> bool:
+    # A completed handshake or a refusal (RST) both prove the host is up.
+    loop = asyncio.get_running_loop()
+    sock = None
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        await loop.sock_connect(sock, (ip, port))
+        return True
+    except ConnectionRefusedError:
+        return True
+    except OSError as e:
+        if e.errno in PROBE_NO_ANSWER_ERRNOS:
+            return False
+        raise
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+async def _icmp_probe(ip: str, seq: int) -> bool:
+    loop = asyncio.get_running_loop()
+    sock = None
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        sock.setblocking(False)
+        sock.connect((ip, 0))
+        payload = b"gapcheck"
+        header = bytes([ICMP_ECHO_REQUEST, 0, 0, 0]) + (0).to_bytes(2, "big") + seq.to_bytes(2, "big")
+        csum = _icmp_checksum(header + payload).to_bytes(2, "big")
+        # The kernel rewrites the identifier (and checksum) of ping sockets.
+        await loop.sock_sendall(sock, header[:2] + csum + header[4:] + payload)
+        while True:
+            data = await loop.sock_recv(sock, 1024)
+            if data and data[0] >> 4 == 4:  # macOS delivers the IP header too
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) >= 8 and data[0] == ICMP_ECHO_REPLY and int.from_bytes(data[6:8], "big") == seq:
+                return True
+    except OSError as e:
+        if e.errno in PROBE_NO_ANSWER_ERRNOS:
+            return False
+        raise
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+async def _probe_host(ip: str, seq: int, methods: List[str], ports: List[int],
+                      timeout_s: float) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Race every probe for one host under one deadline; the first positive answer wins.
+
+    Returns the answer (or None) and the probes that failed with an error
+    rather than getting no answer.
+    """
+    start = time.monotonic()
+    tasks: Dict[asyncio.Task, Dict[str, Any]] = {}
+    if "icmp" in methods:
+        tasks[asyncio.ensure_future(_icmp_probe(ip, seq))] = {"method": "icmp", "port": None}
+    if "tcp" in methods:
+        for port in ports:
+            tasks[asyncio.ensure_future(_tcp_probe(ip, port))] = {"method": "tcp", "port": port}
+    pending = set(tasks)
+    errors: List[Dict[str, Any]] = []
+    deadline = start + timeout_s
+    try:
+        while pending:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.cancelled():
+                    continue
+                if t.exception() is not None:
+                    errors.append(dict({"ip": ip}, **tasks[t], error=str(t.exception())))
+                elif t.result():
+                    rtt_ms = round((time.monotonic() - start) * 1000, 1)
+                    return dict({"ip": ip}, **tasks[t], rtt_ms=rtt_ms), errors
+        return None, errors
+    finally:
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _probe_all(hosts: List[str], methods: List[str], ports: List[int], timeout_s: float,
+                     hosts_in_flight: int) -> List[Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]]:
+    sem = asyncio.Semaphore(hosts_in_flight)
+
+    async def one(i: int, ip: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        async with sem:
+            return await _probe_host(ip, i & 0xFFFF, methods, ports, timeout_s)
+
+    return list(await asyncio.gather(*(one(i, ip) for i, ip in enumerate(hosts))))
+
+
+def subnet_discovery(cidr: str, timeout_ms: int = DEFAULT_HOST_TIMEOUT_MS, concurrency: int = 64,
+                     methods: Optional[List[str]] = None, ports: Optional[List[int]] = None) -> Dict[str, Any]:
+    """Probe every host in ``cidr`` from one asyncio event loop.
+
+    ``concurrency`` caps the hosts in flight (as the parallel pings did); each
+    host runs all of its probes at once under a ``timeout_ms`` deadline. The
+    cap is lowered if hosts x probes would not fit in the open-file limit.
+    ICMP is used only where the kernel permits unprivileged datagram sockets.
+    Hosts with no answer where some probe failed with an error (not a
+    timeout or unreachable) are listed as inconclusive.
+    """
+    net = ipaddress.ip_network(cidr, strict=False)
+    hosts = [str(h) for h in net.hosts()]
+    methods = [m for m in (methods or DEFAULT_PROBE_METHODS) if m in ("tcp", "icmp")] or list(DEFAULT_PROBE_METHODS)
+    ports = [int(p) for p in (DEFAULT_PROBE_PORTS if ports is None else ports)]
+    icmp = "not requested"
+    if "icmp" in methods:
+        icmp = "available" if icmp_dgram_available() else "unavailable"
+        if icmp == "unavailable":
+            methods = [m for m in methods if m != "icmp"]
+    if "tcp" in methods and not ports:
+        methods = [m for m in methods if m != "tcp"]
+    per_host = (1 if "icmp" in methods else 0) + (len(ports) if "tcp" in methods else 0)
+    hosts_in_flight = max(1, min(int(concurrency), 1024))
+    fd_limit = _socket_limit()
+    if fd_limit is not None and per_host:
+        hosts_in_flight = max(1, min(hosts_in_flight, (fd_limit - 64) // per_host))  # keep headroom for the process
+    start = time.monotonic()
+    results = asyncio.run(_probe_all(hosts, methods, ports, max(0.05, timeout_ms / 1000.0), hosts_in_flight)) if per_host else []
+    found = sorted((hit for hit, _ in results if hit), key=lambda r: ipaddress.ip_address(r["ip"]))
+    errors = [e for hit, errs in results if not hit for e in errs]
+    error_counts: Dict[str, int] = {}
+    for e in errors:
+        error_counts[e["error"]] = error_counts.get(e["error"], 0) + 1
+    return {
+        "cidr": str(net),
+        "hosts_tested": len(hosts),
+        "responsive_hosts": [r["ip"] for r in found],
+        "hosts": found,
+        "inconclusive_hosts": list(dict.fromkeys(e["ip"] for e in errors)),
+        "probe_errors": error_counts,
+        "probe": {
+            "methods": methods,
+            "tcp_ports": ports if "tcp" in methods else [],
+            "icmp": icmp,
+            "host_timeout_ms": int(timeout_ms),
+            "max_hosts_in_flight": hosts_in_flight,
+            "max_sockets_in_flight": hosts_in_flight * per_host,
+        },
+        "duration_ms": int((time.monotonic() - start) * 1000),
+    }
 
 
 def render_md(meta: Dict[str, Any], analysis_obj: Dict[str, Any], extra: Dict[str, Any]) -> str:
@@ -347,8 +1331,17 @@ def render_md(meta: Dict[str, Any], analysis_obj: Dict[str, Any], extra: Dict[st
     lines.append("## Checks")
     lines.append("")
     for c in analysis_obj.get("checks", []):
-        lines.append(f"- **{c.get('check')}**: `{'PASS' if c.get('pass') else 'FAIL'}`")
+        status = "PASS" if c.get("pass") else ("INCONCLUSIVE" if c.get("inconclusive") else "FAIL")
+        note = " (on incomplete evidence)" if c.get("incomplete_commands") and not c.get("inconclusive") else ""
+        lines.append(f"- **{c.get('check')}**: `{status}`{note}")
     lines.append("")
+    if analysis_obj.get("incomplete_evidence"):
+        lines.append("## Incomplete evidence")
+        lines.append("")
+        for group, items in analysis_obj["incomplete_evidence"].items():
+            for item in items:
+                lines.append(f"- `{group}`: `{item.get('cmd')}` → `{item.get('status')}`")
+        lines.append("")
     if extra.get("connectivity_test"):
         lines.append("## Connectivity test (optional)")
         lines.append("")
@@ -363,6 +1356,15 @@ def render_md(meta: Dict[str, Any], analysis_obj: Dict[str, Any], extra: Dict[st
         lines.append(f"- CIDR: `{s.get('cidr')}`")
         lines.append(f"- Hosts tested: `{s.get('hosts_tested')}`")
         lines.append(f"- Responsive hosts: `{len(s.get('responsive_hosts') or [])}`")
+        if s.get("inconclusive_hosts"):
+            errs = ", ".join(f"{k} ({v})" for k, v in (s.get("probe_errors") or {}).items())
+            lines.append(f"- Inconclusive hosts (probe errors, no answer): `{len(s['inconclusive_hosts'])}`: {errs}")
+        probe = s.get("probe") or {}
+        if probe:
+            lines.append(f"- Probes: `{', '.join(probe.get('methods') or [])}` (TCP ports: `{probe.get('tcp_ports')}`, ICMP: `{probe.get('icmp')}`)")
+        for h in s.get("hosts") or []:
+            via = "icmp" if h.get("method") == "icmp" else f"tcp/{h.get('port')}"
+            lines.append(f"  - `{h.get('ip')}` via `{via}` ({h.get('rtt_ms')} ms)")
         lines.append("")
     lines.append("## Evidence")
     lines.append("")
@@ -379,24 +1381,592 @@ def build_bundle(output_root: Path, host: str) -> Path:
     return bundle
 
 
-def write_hashes(bundle: Path) -> None:
-    hashes_path = bundle / "hashes.txt"
-    lines = []
-    for p in sorted(bundle.rglob("*")):
-        if p.is_file() and p.name != "hashes.txt":
-            rel = p.relative_to(bundle).as_posix()
-            lines.append(f"{sha256_file(p)}  {rel}")
-    write_text(hashes_path, "\n".join(lines) + "\n")
+def write_hashes(writer: BundleWriter) -> None:
+    # File sizes let `verify` reject truncated/grown files before hashing anything.
+    # Raw outputs also carry output_sha256, which ignores duration_ms, for `diff`.
+    # hashes.json is written through the writer so hashes.txt seals it too.
+    files: Dict[str, Dict[str, Any]] = {}
+    for rel in sorted(writer.manifest, key=lambda r: r.split("/")):
+        files[rel] = {"sha256": writer.manifest[rel], "size": writer.sizes[rel]}
+        if rel in writer.output_hashes:
+            files[rel]["output_sha256"] = writer.output_hashes[rel]
+    writer.write_json("hashes.json", {"files": files})
+    # Same order as sorting the bundle's Paths (by path component).
+    rels = sorted(writer.manifest, key=lambda r: r.split("/"))
+    write_text(writer.root / "hashes.txt", "\n".join(f"{writer.manifest[rel]}  {rel}" for rel in rels) + "\n")
 
 
-def cmd_run(args: argparse.Namespace) -> int:
-    policy = load_policy(Path(args.policy).resolve())
-    output_root = Path(args.output).resolve()
+def read_hashes(bundle: Path) -> Dict[str, str]:
+    expected = {}
+    for line in (bundle / "hashes.txt").read_text(encoding="utf-8", errors="replace").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            expected[parts[1]] = parts[0]
+    return expected
+
+
+def read_hashes_json(bundle: Path, expected: Dict[str, str]) -> Tuple[Dict[str, Any], bool]:
+    """hashes.json's per-file entries, and whether hashes.txt seals them.
+
+    Sealed means hashes.txt lists hashes.json and the file still has that
+    digest. A listed but altered hashes.json yields nothing. Bundles from
+    before hashes.json was sealed return their entries unsealed.
+    """
+    path = bundle / "hashes.json"
+    listed = expected.get("hashes.json")
+    try:
+        if listed is not None and sha256_file(path).lower() != listed.lower():
+            return {}, False
+        files = json.loads(path.read_text(encoding="utf-8")).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}, False
+    return (files, listed is not None) if isinstance(files, dict) else ({}, False)
+
+
+def read_sizes(bundle: Path, expected: Dict[str, str]) -> Dict[str, int]:
+    """Recorded file sizes from hashes.json; empty for bundles without a usable one."""
+    try:
+        return {rel: int(v["size"]) for rel, v in read_hashes_json(bundle, expected)[0].items()}
+    except (KeyError, TypeError, ValueError):
+        return {}
+
+
+def read_output_hashes(bundle: Path, expected: Dict[str, str]) -> Dict[str, str]:
+    """Recorded raw-output digests (see output_digest) from a sealed hashes.json.
+
+    Empty unless hashes.txt seals hashes.json: an unsealed digest could
+    have been edited to hide a change, so callers re-read the raw files.
+    """
+    files, sealed = read_hashes_json(bundle, expected)
+    if not sealed:
+        return {}
+    return {rel: v["output_sha256"] for rel, v in files.items()
+            if isinstance(v, dict) and isinstance(v.get("output_sha256"), str)}
+
+
+def verify_bundle(bundle: Path, pool: ThreadPoolExecutor, fail_fast: bool = False) -> Dict[str, Any]:
+    """Check one bundle against hashes.txt.
+
+    A stat pass runs first (missing files, and size changes where hashes.json
+    recorded sizes and is itself intact); only files that pass it are hashed,
+    on ``pool``. hashes.json is one of the files hashes.txt lists. With
+    ``fail_fast`` the first problem stops the bundle and pending hashes are
+    cancelled.
+    """
+    result: Dict[str, Any] = {"bundle": str(bundle), "ok": False, "files": 0, "hashed": 0,
+                              "missing": [], "size_mismatches": [], "mismatches": []}
+    if not (bundle / "hashes.txt").is_file():
+        result["error"] = "hashes.txt not found in bundle"
+        return result
+    expected = read_hashes(bundle)
+    sizes = read_sizes(bundle, expected)
+    result["files"] = len(expected)
+
+    to_hash = []
+    for rel, h in expected.items():
+        try:
+            size = (bundle / rel).stat().st_size
+        except OSError:
+            result["missing"].append(rel)
+            continue
+        if rel in sizes and size != sizes[rel]:
+            result["size_mismatches"].append({"file": rel, "expected": sizes[rel], "actual": size})
+            continue
+        to_hash.append((rel, h))
+    if fail_fast and (result["missing"] or result["size_mismatches"]):
+        return result
+
+    futures = {pool.submit(sha256_file, bundle / rel): (rel, h) for rel, h in to_hash}
+    for fut in as_completed(futures):
+        rel, h = futures[fut]
+        try:
+            actual = fut.result()
+        except OSError:
+            result["missing"].append(rel)
+        else:
+            result["hashed"] += 1
+            if actual.lower() == h.lower():
+                continue
+            result["mismatches"].append({"file": rel, "expected": h, "actual": actual})
+        if fail_fast:
+            for f in futures:
+                f.cancel()
+            break
+    result["mismatches"].sort(key=lambda m: m["file"])
+    result["ok"] = not (result["missing"] or result["size_mismatches"] or result["mismatches"])
+    return result
+
+
+def find_bundles(root: Path) -> List[Path]:
+    return sorted(p.parent for p in root.rglob("hashes.txt"))
+
+
+# report.json readers for fleet tooling: only the top-level keys asked for are
+# decoded, and reading stops once they have all been seen. Other values
+# (notably "evidence", which carries the raw stdout) are skipped unparsed.
+REPORT_READ_BYTES = 1024 * 1024
+_JSON_WS_RE = re.compile(r"[ \t\r\n]*")
+_JSON_STRUCT_RE = re.compile(r'[{}\[\]"]')
+_JSON_STR_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*')
+_JSON_NUM_START = "-0123456789"
+_JSON_NUM_END_RE = re.compile(r"[^-+.eE0-9]")
+
+
+class ReportReader:
+    """Stream the top-level ``key: value`` pairs of a JSON object from a binary file."""
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f: BinaryIO) -> None:
+        self.f = f
+        self.dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        chunk = self.f.read(REPORT_READ_BYTES)
+        if not chunk:
+            self.eof = True
+            self.buf += self.dec.decode(b"", final=True)
+            return False
+        self.buf += self.dec.decode(chunk)
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self.pos = _JSON_WS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("unexpected end of JSON")
+
+    def _expect(self, ch: str) -> None:
+        if self._peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self.pos}")
+        self.pos += 1
+
+    def _decode(self) -> Any:
+        if self._peek() in _JSON_NUM_START:
+            # A number cut at the chunk end would decode as a shorter one.
+            while not _JSON_NUM_END_RE.search(self.buf, self.pos) and self._fill():
+                pass
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            self.pos = end
+            return obj
+
+    def _skip(self) -> None:
+        if self._peek() not in '{["':
+            self._decode()
+            return
+        depth = 0
+        in_str = False
+        while True:
+            if in_str:
+                end = _JSON_STR_BODY_RE.match(self.buf, self.pos).end()
+                if end < len(self.buf) and self.buf[end] == '"':
+                    self.pos = end + 1
+                    in_str = False
+                    if depth == 0:
+                        return
+                    continue
+                self.pos = end  # end of buffer, or a backslash whose escape is not read yet
+            else:
+                m = _JSON_STRUCT_RE.search(self.buf, self.pos)
+                if m is not None:
+                    self.pos = m.end()
+                    ch = m.group()
+                    if ch == '"':
+                        in_str = True
+                    elif ch in "{[":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return
+                    continue
+                self.pos = len(self.buf)
+            if not self._fill():
+                raise ValueError("unexpected end of JSON")
+
+    def items(self, keys: Set[str]) -> Iterator[Tuple[str, Any]]:
+        """Yield ``(key, value)`` for ``keys`` in file order; stop once all have been read."""
+        wanted = set(keys)
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while wanted:
+            if self._peek() != '"':
+                raise ValueError(f"expected a key at offset {self.pos}")
+            key = self._decode()
+            self._expect(":")
+            if key in wanted:
+                wanted.discard(key)
+                yield key, self._decode()
+            else:
+                self._skip()
+            if self._peek() == "}":
+                return
+            self._expect(",")
+
+
+def read_report_keys(f: BinaryIO, keys: Set[str]) -> Dict[str, Any]:
+    return dict(ReportReader(f).items(keys))
+
+
+def iter_report_sources(paths: List[str]) -> Iterator[Tuple[str, Callable[[], BinaryIO]]]:
+    """Yield ``(label, opener)`` for every report.json under ``paths``: files, folders, or zips of bundles."""
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files = sorted(p for p in path.rglob("*") if p.is_file() and (p.name == "report.json" or p.suffix.lower() == ".zip"))
+        else:
+            files = [path]
+        for p in files:
+            if p.suffix.lower() == ".zip":
+                try:
+                    zf = zipfile.ZipFile(p)
+                except (OSError, zipfile.BadZipFile) as e:
+                    yield str(p), _raiser(e)
+                    continue
+                with zf:
+                    for name in sorted(n for n in zf.namelist() if n.rsplit("/", 1)[-1] == "report.json"):
+                        yield f"{p}!{name}", (lambda zf=zf, name=name: zf.open(name))
+            else:
+                yield str(p), (lambda p=p: p.open("rb"))
+
+
+def _raiser(exc: Exception) -> Callable[[], BinaryIO]:
+    def opener() -> BinaryIO:
+        raise exc
+    return opener
+
+
+def _report_row(source: str, meta: Dict[str, Any], analysis_obj: Dict[str, Any]) -> Dict[str, Any]:
+    norm = analysis_obj.get("normalized") or {}
+    checks: Dict[str, Optional[bool]] = {}
+    inconclusive = set()
+    for c in analysis_obj.get("checks") or []:
+        if isinstance(c, dict) and c.get("check"):
+            checks[c["check"]] = bool(c.get("pass"))
+            if c.get("inconclusive"):
+                inconclusive.add(c["check"])
+    return {
+        "source": source,
+        "host": str(meta.get("host") or "unknown-host"),
+        "time_utc": str(meta.get("time_utc") or ""),
+        "policy": str(analysis_obj.get("policy_name") or ""),
+        "overall_pass": bool(analysis_obj.get("overall_pass")),
+        "checks": checks,
+        "inconclusive": inconclusive,
+        "gateways": list(norm.get("detected_gateways") or []),
+        "dns_flagged": list(norm.get("dns_flagged") or []),
+        "interface_matches": list(norm.get("interfaces_suspect_lines") or []),
+    }
+
+
+def aggregate_reports(paths: List[str], latest_per_host: bool = False) -> Dict[str, Any]:
+    """Fleet rollup of many report.json files as columns (one entry per report) plus failure indexes."""
+    rows: List[Dict[str, Any]] = []
+    errors: List[Dict[str, str]] = []
+    for source, opener in iter_report_sources(paths):
+        try:
+            with opener() as f:
+                obj = read_report_keys(f, {"meta", "analysis"})
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            errors.append({"source": source, "error": str(e)})
+            continue
+        if not isinstance(obj.get("analysis"), dict):
+            errors.append({"source": source, "error": "no analysis object"})
+            continue
+        rows.append(_report_row(source, obj.get("meta") or {}, obj["analysis"]))
+
+    if latest_per_host:
+        latest: Dict[str, Dict[str, Any]] = {}
+        for r in rows:
+            if r["host"] not in latest or r["time_utc"] >= latest[r["host"]]["time_utc"]:
+                latest[r["host"]] = r
+        rows = list(latest.values())
+    rows.sort(key=lambda r: (r["host"], r["time_utc"], r["source"]))
+
+    check_names = list(dict.fromkeys(name for r in rows for name in r["checks"]))
+    columns: Dict[str, Any] = {k: [r[k] for r in rows] for k in ("host", "time_utc", "source", "policy", "overall_pass")}
+    columns["checks"] = {name: [r["checks"].get(name) for r in rows] for name in check_names}
+    for k in ("gateways", "dns_flagged", "interface_matches"):
+        columns[k] = [r[k] for r in rows]
+
+    failures = {name: [i for i, r in enumerate(rows) if r["checks"].get(name) is False] for name in check_names}
+    totals = {}
+    for name in check_names:
+        col = columns["checks"][name]
+        inc = sum(1 for r in rows if name in r["inconclusive"])
+        totals[name] = {"pass": col.count(True), "fail": col.count(False) - inc, "inconclusive": inc, "not_run": col.count(None)}
+
+    def value_index(key: str) -> Dict[str, List[int]]:
+        idx: Dict[str, List[int]] = {}
+        for i, r in enumerate(rows):
+            for v in dict.fromkeys(r[key]):
+                idx.setdefault(str(v), []).append(i)
+        return dict(sorted(idx.items(), key=lambda kv: (-len(kv[1]), kv[0])))
+
+    passed = columns["overall_pass"].count(True)
+    return {
+        "tool": {"name": TOOL_DISPLAY_NAME, "version": TOOL_VERSION},
+        "time_utc": utcnow_iso(),
+        "reports": len(rows),
+        "hosts": len(set(columns["host"])),
+        "overall_pass": passed,
+        "overall_fail": len(rows) - passed,
+        "check_totals": totals,
+        "columns": columns,
+        "failures": failures,
+        "indexes": {"gateway": value_index("gateways"), "dns_flagged": value_index("dns_flagged")},
+        "errors": errors,
+    }
+
+
+def render_fleet_md(fleet: Dict[str, Any], max_hosts: int = 50) -> str:
+    cols = fleet["columns"]
+    lines = [f"# {TOOL_DISPLAY_NAME} Fleet Report", ""]
+    lines.append(f"- **Generated (UTC)**: `{fleet.get('time_utc')}`")
+    lines.append(f"- **Reports**: `{fleet.get('reports')}` from `{fleet.get('hosts')}` hosts")
+    lines.append(f"- **Overall**: `{fleet.get('overall_pass')}` PASS / `{fleet.get('overall_fail')}` FAIL")
+    if fleet.get("errors"):
+        lines.append(f"- **Unreadable reports**: `{len(fleet['errors'])}`")
+    lines.append("")
+    lines.append("## Checks")
+    lines.append("")
+    lines.append("| Check | Pass | Fail | Inconclusive | Not run |")
+    lines.append("|---|---:|---:|---:|---:|")
+    for name, t in fleet.get("check_totals", {}).items():
+        lines.append(f"| `{name}` | {t['pass']} | {t['fail']} | {t['inconclusive']} | {t['not_run']} |")
+    lines.append("")
+    failing = {name: rows for name, rows in fleet.get("failures", {}).items() if rows}
+    if failing:
+        lines.append("## Failing hosts by check")
+        lines.append("")
+        for name, idx in failing.items():
+            hosts = list(dict.fromkeys(cols["host"][i] for i in idx))
+            more = f" (+{len(hosts) - max_hosts} more)" if len(hosts) > max_hosts else ""
+            lines.append(f"- **{name}** ({len(idx)} report(s), {len(hosts)} host(s)): "
+                         + ", ".join(f"`{h}`" for h in hosts[:max_hosts]) + more)
+        lines.append("")
+    for key, title in (("gateway", "Default gateways seen"), ("dns_flagged", "Non-allowed DNS servers seen")):
+        idx = fleet.get("indexes", {}).get(key) or {}
+        if idx:
+            lines.append(f"## {title}")
+            lines.append("")
+            for value, rows in list(idx.items())[:max_hosts]:
+                lines.append(f"- `{value}`: {len(rows)} report(s)")
+            lines.append("")
+    if fleet.get("errors"):
+        lines.append("## Unreadable reports")
+        lines.append("")
+        for e in fleet["errors"]:
+            lines.append(f"- `{e['source']}`: {e['error']}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+DIFF_MAX_LINES = 200
+
+
+def _set_delta(old: Any, new: Any) -> Dict[str, List[Any]]:
+    """``{"added": [...], "removed": [...]}`` between two collections of hashable items, empty sides omitted."""
+    old_set, new_set = set(old), set(new)
+    out: Dict[str, List[Any]] = {}
+    if new_set - old_set:
+        out["added"] = sorted(new_set - old_set)
+    if old_set - new_set:
+        out["removed"] = sorted(old_set - new_set)
+    return out
+
+
+def _group_lines(evidence: Dict[str, Any], group: str) -> List[str]:
+    return [ln.strip() for r in evidence["commands"].get(group, []) for ln in (r.get("stdout") or "").splitlines() if ln.strip()]
+
+
+def _line_delta(a: Dict[str, Any], b: Dict[str, Any], group: str) -> Dict[str, Any]:
+    out: Dict[str, Any] = _set_delta(_group_lines(a, group), _group_lines(b, group))
+    for side in ("added", "removed"):
+        if len(out.get(side, [])) > DIFF_MAX_LINES:
+            out[f"{side}_truncated"] = len(out[side]) - DIFF_MAX_LINES
+            out[side] = out[side][:DIFF_MAX_LINES]
+    return out
+
+
+def _interfaces_delta(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, Any]:
+    a = {i["name"]: i for i in old}
+    b = {i["name"]: i for i in new}
+    out: Dict[str, Any] = _set_delta(a, b)
+    changed = {}
+    for name in sorted(a.keys() & b.keys()):
+        fields = {}
+        for k in ("state", "flags", "mtu", "mac", "kind", "parent", "ipv4", "ipv6"):
+            va, vb = a[name].get(k), b[name].get(k)
+            if isinstance(va, list) and isinstance(vb, list):
+                if set(va) != set(vb):
+                    fields[k] = _set_delta(va, vb)
+            elif va != vb:
+                fields[k] = [va, vb]
+        if fields:
+            changed[name] = fields
+    if changed:
+        out["changed"] = changed
+    return out
+
+
+def _route_key(rt: Dict[str, Any]) -> str:
+    key = f"{rt['type']} {rt['dst']}" if rt["type"] != "unicast" else rt["dst"]
+    hops = [rt] + rt.get("nexthops", [])
+    return key + "".join(f" via {h['via']}" for h in hops if h.get("via")) + (f" dev {rt['dev']}" if rt.get("dev") else "")
+
+
+def _listening_key(sk: Dict[str, Any]) -> str:
+    host = f"[{sk['local_address']}]" if ":" in str(sk["local_address"]) else sk["local_address"]
+    procs = sorted({p["name"] for p in sk.get("processes", [])})
+    return f"{sk['proto']} {host}:{sk['local_port']}" + (f" ({','.join(procs)})" if procs else "")
+
+
+def _firewall_delta(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    def chain_id(c: Dict[str, Any]) -> str:
+        return f"{c['family']} {c['table']} {c['chain']}"
+
+    ca = {chain_id(c): c for c in a.get("chains", [])}
+    cb = {chain_id(c): c for c in b.get("chains", [])}
+    out: Dict[str, Any] = {}
+    chains = _set_delta(ca, cb)
+    policies = {k: [ca[k].get("policy"), cb[k].get("policy")] for k in sorted(ca.keys() & cb.keys())
+                if ca[k].get("policy") != cb[k].get("policy")}
+    if policies:
+        chains["policy_changed"] = policies
+    if chains:
+        out["chains"] = chains
+    rules = _set_delta((f"{r['family']} {r['table']} {r['chain']}: {r['rule']}" for r in a.get("rules", [])),
+                       (f"{r['family']} {r['table']} {r['chain']}: {r['rule']}" for r in b.get("rules", [])))
+    if rules:
+        out["rules"] = rules
+    return out
+
+
+def changed_raw_groups(a: Path, b: Path) -> Tuple[Set[str], Dict[str, int]]:
+    """Evidence groups whose raw outputs differ between two bundles, and file counts by outcome.
+
+    Files with the same hashes.txt digest are identical. Otherwise the
+    output_sha256 recorded in hashes.json (which ignores duration_ms) decides
+    when hashes.txt seals that hashes.json; other raw files are re-read and
+    compared.
+    """
+    expected_a, expected_b = read_hashes(a), read_hashes(b)
+    ha = {rel: h for rel, h in expected_a.items() if rel.startswith("raw/")}
+    hb = {rel: h for rel, h in expected_b.items() if rel.startswith("raw/")}
+    oa, ob = read_output_hashes(a, expected_a), read_output_hashes(b, expected_b)
+    counts = {"identical": 0, "same_output": 0, "changed": 0}
+    groups: Set[str] = set()
+    for rel in sorted(ha.keys() | hb.keys()):
+        if ha.get(rel) is not None and ha.get(rel) == hb.get(rel):
+            counts["identical"] += 1
+            continue
+        if rel in ha and rel in hb:
+            da, db = oa.get(rel), ob.get(rel)
+            if da is None or db is None:
+                da = da or output_digest(parse_raw((a / rel).read_text(encoding="utf-8", errors="replace")))
+                db = db or output_digest(parse_raw((b / rel).read_text(encoding="utf-8", errors="replace")))
+            if da == db:
+                counts["same_output"] += 1
+                continue
+        counts["changed"] += 1
+        m = RAW_NAME_RE.match(rel[len("raw/"):])
+        if m:
+            groups.add(m.group("group"))
+    return groups, counts
+
+
+def _bundle_summary(bundle: Path) -> Dict[str, Any]:
+    try:
+        with (bundle / "report.json").open("rb") as f:
+            rep = read_report_keys(f, {"meta", "analysis"})
+    except (OSError, ValueError):
+        rep = {}
+    meta, analysis_obj = rep.get("meta") or {}, rep.get("analysis") or {}
+    return {
+        "bundle": str(bundle), "host": meta.get("host"), "time_utc": meta.get("time_utc"),
+        "overall_pass": analysis_obj.get("overall_pass"),
+        "checks": {c.get("check"): c.get("pass") for c in analysis_obj.get("checks", []) if isinstance(c, dict)},
+    }
+
+
+def diff_bundles(a: Path, b: Path) -> Dict[str, Any]:
+    """What changed from bundle ``a`` to bundle ``b``; only groups whose raw outputs differ are parsed."""
+    groups, files = changed_raw_groups(a, b)
+    sa, sb = _bundle_summary(a), _bundle_summary(b)
+    ca, cb = sa.pop("checks"), sb.pop("checks")
+    delta: Dict[str, Any] = {}
+    if groups:
+        ea, eb = load_raw_evidence(a, groups), load_raw_evidence(b, groups)
+        ra, rb = ea["records"], eb["records"]
+        structured = set()
+        if "interfaces" in groups and "interfaces" in ra and "interfaces" in rb:
+            delta["interfaces"] = _interfaces_delta(ra["interfaces"], rb["interfaces"])
+            structured.add("interfaces")
+        if "routes" in groups:
+            delta["default_gateways"] = _set_delta(detect_gateways(ea), detect_gateways(eb))
+            if "routes" in ra and "routes" in rb:
+                delta["routes"] = _set_delta(map(_route_key, ra["routes"]), map(_route_key, rb["routes"]))
+                structured.add("routes")
+        if "listening_ports" in groups and "sockets" in ra and "sockets" in rb:
+            delta["listening"] = _set_delta(
+                (_listening_key(sk) for sk in ra["sockets"] if sk["state"] in ("LISTEN", "UNCONN")),
+                (_listening_key(sk) for sk in rb["sockets"] if sk["state"] in ("LISTEN", "UNCONN")))
+            structured.add("listening_ports")
+        if "arp" in groups and "neighbors" in ra and "neighbors" in rb:
+            la = {n["ip"]: n["lladdr"] for n in ra["neighbors"] if n["lladdr"]}
+            lb = {n["ip"]: n["lladdr"] for n in rb["neighbors"] if n["lladdr"]}
+            delta["neighbors"] = _set_delta(la, lb)
+            moved = {ip: [la[ip], lb[ip]] for ip in sorted(la.keys() & lb.keys()) if la[ip] != lb[ip]}
+            if moved:
+                delta["neighbors"]["lladdr_changed"] = moved
+            structured.add("arp")
+        if "firewall" in groups and ("chains" in ra or "rules" in ra) and ("chains" in rb or "rules" in rb):
+            delta["firewall"] = _firewall_delta(ra, rb)
+            structured.add("firewall")
+        if "dns" in groups:
+            delta["dns_servers"] = _set_delta(extract_ipv4s("\n".join(_group_lines(ea, "dns"))),
+                                              extract_ipv4s("\n".join(_group_lines(eb, "dns"))))
+        lines = {g: _line_delta(ea, eb, g) for g in sorted(groups - structured)}
+        delta["lines"] = {g: d for g, d in lines.items() if d}
+        delta = {k: v for k, v in delta.items() if v}
+    checks = {k: [ca.get(k), cb.get(k)] for k in sorted(ca.keys() | cb.keys(), key=str) if ca.get(k) != cb.get(k)}
+    out: Dict[str, Any] = {"a": sa, "b": sb, "changed": bool(delta or checks), "files": files, "changed_groups": sorted(groups)}
+    if checks:
+        out["checks"] = checks
+    if delta:
+        out["delta"] = delta
+    return out
+
+
+def run_bundle(policy: Dict[str, Any], output_root: Path, workers: int = DEFAULT_COLLECT_WORKERS,
+               budget_s: float = DEFAULT_COLLECT_BUDGET_S, collector: str = "auto",
+               scan_subnet: Optional[str] = None, large_scan: bool = False) -> Path:
+    """One full collection: evidence, analysis, connectivity test, optional subnet sweep, sealed bundle."""
     safe_mkdir(output_root)
 
     host = hostname()
     bundle = build_bundle(output_root, host)
-    raw_dir = bundle / "raw"
+    writer = BundleWriter(bundle)
 
     meta = {
         "host": host,
@@ -405,7 +1975,7 @@ def cmd_run(args: argparse.Namespace) -> int:
         "tool": {"name": TOOL_DISPLAY_NAME, "version": TOOL_VERSION},
     }
 
-    evidence = collect_evidence(raw_dir=raw_dir)
+    evidence = collect_evidence(writer, workers=workers, budget_s=budget_s, collector=collector)
     analysis_obj = analyze(policy=policy, evidence=evidence)
     extra: Dict[str, Any] = {}
 
@@ -434,67 +2004,297 @@ def cmd_run(args: argparse.Namespace) -> int:
             })
             analysis_obj["overall_pass"] = False
 
-    if args.scan_subnet:
-        cidr = str(args.scan_subnet).strip()
+    if scan_subnet:
+        cidr = str(scan_subnet).strip()
         subnet_cfg = policy.get("subnet_scan", {}) if isinstance(policy.get("subnet_scan"), dict) else {}
         max_prefix = int(subnet_cfg.get("max_prefixlen", 24))
         net = ipaddress.ip_network(cidr, strict=False)
-        if net.prefixlen < max_prefix and not bool(args.i_understand_large_scan):
+        if net.prefixlen < max_prefix and not large_scan:
             raise SystemExit(
                 f"Refusing to scan {cidr} (prefixlen {net.prefixlen}) because it is larger than /{max_prefix}. "
                 f"Re-run with --i-understand-large-scan if you truly intend this."
             )
-        timeout_ms = int(subnet_cfg.get("ping_timeout_ms", 500))
+        timeout_ms = int(subnet_cfg.get("host_timeout_ms", subnet_cfg.get("ping_timeout_ms", DEFAULT_HOST_TIMEOUT_MS)))
         concurrency = int(subnet_cfg.get("concurrency", 64))
-        extra["subnet_scan"] = subnet_discovery(cidr, timeout_ms=timeout_ms, concurrency=concurrency)
+        extra["subnet_scan"] = subnet_discovery(
+            cidr, timeout_ms=timeout_ms, concurrency=concurrency,
+            methods=subnet_cfg.get("methods"), ports=subnet_cfg.get("tcp_ports"),
+        )
+
+    # Typed records sit ahead of the raw evidence so readers can stop before it.
+    records = evidence.pop("records", {})
+    report = {"meta": meta, "policy": policy, "analysis": analysis_obj, "records": records, "evidence": evidence, "extra": extra}
+    writer.write_json("report.json", report)
+    writer.write_text("report.md", render_md(meta, analysis_obj, extra))
+    write_hashes(writer)
+    return bundle
+
+
+DEFAULT_WATCH_INTERVAL_S = 10.0
+DEFAULT_WATCH_MAX_INTERVAL_S = 900.0
+WATCH_SETTLE_S = 2.0
+# RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_IFADDR | RTMGRP_IPV6_ROUTE
+WATCH_NETLINK_GROUPS = 0x1 | 0x10 | 0x40 | 0x100 | 0x400
+
+
+def _resolv_conf() -> str:
+    return _read(Path("/etc/resolv.conf"))
+
+
+# Cheap signals hashed on every watch tick. Volatile data (ARP states, socket
+# owners, route use counters) is left out so it does not trigger collections.
+WATCH_SIGNALS = (
+    ("interfaces", native_interfaces),
+    ("routes", native_routes),
+    ("routes6", native_routes6),
+    ("listening_ports", lambda: "\n".join(row for row, _ in _listening_rows())),
+    ("wifi", native_wifi),
+    ("bluetooth", native_bluetooth),
+    ("removable_media", native_block),
+    ("dns", _resolv_conf),
+)
+
+
+def watch_signals() -> Dict[str, str]:
+    """SHA-256 of each cheap change signal; empty off Linux, where only the max interval triggers a run."""
+    if platform.system() != "Linux":
+        return {}
+    out = {}
+    for name, reader in WATCH_SIGNALS:
+        try:
+            data = reader()
+        except (OSError, ValueError) as e:
+            data = f"error: {type(e).__name__}"
+        out[name] = hashlib.sha256(data.encode("utf-8", errors="replace")).hexdigest()
+    return out
+
+
+def netlink_event_socket() -> Optional[socket.socket]:
+    """A non-blocking socket subscribed to link, address and route change events, or None where unavailable."""
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, 0)  # 0 = NETLINK_ROUTE
+    except (OSError, AttributeError):  # AF_NETLINK is Linux-only
+        return None
+    try:
+        sock.bind((0, WATCH_NETLINK_GROUPS))
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _drain(sock: socket.socket) -> bool:
+    got = False
+    while True:
+        try:
+            got = bool(sock.recv(65536)) or got
+        except BlockingIOError:
+            return got
+        except OSError:  # ENOBUFS: events were dropped, so something changed
+            return True
+
+
+def watch(policy: Dict[str, Any], output_root: Path, interval_s: float = DEFAULT_WATCH_INTERVAL_S,
+          max_interval_s: float = DEFAULT_WATCH_MAX_INTERVAL_S, stop: Callable[[], bool] = lambda: False,
+          **run_kwargs: Any) -> int:
+    """Write a bundle at start, when a watch signal changes, and at least every ``max_interval_s``.
+
+    Signals are hashed every ``interval_s``. A netlink link/address/route event
+    brings the next check forward to WATCH_SETTLE_S after it, so a burst of
+    events (link up, address, route) leads to one collection. Returns the
+    number of bundles written once ``stop()`` is true.
+    """
+    sock = netlink_event_socket()
+    last_signals: Optional[Dict[str, str]] = None
+    last_run = 0.0
+    written = 0
+    try:
+        while not stop():
+            signals = watch_signals()
+            now = time.monotonic()
+            reason = ""
+            if last_signals is None:
+                reason = "start"
+            elif signals != last_signals:
+                reason = "change:" + ",".join(k for k in signals if signals[k] != last_signals.get(k))
+            elif now - last_run >= max_interval_s:
+                reason = "max_interval"
+            if reason:
+                try:
+                    bundle = run_bundle(policy, output_root, **run_kwargs)
+                except OSError as e:
+                    print(f"{utcnow_iso()} {reason} error: {e}", file=sys.stderr, flush=True)
+                else:
+                    written += 1
+                    print(f"{utcnow_iso()} {reason} {bundle}", flush=True)
+                    # signals from before the collection: a change during it triggers the next one
+                    last_signals, last_run = signals, now
+            next_check = time.monotonic() + interval_s
+            while not stop():
+                remaining = next_check - time.monotonic()
+                if remaining <= 0:
+                    break
+                if sock is None:
+                    time.sleep(min(remaining, 1.0))
+                elif select.select([sock], [], [], min(remaining, 1.0))[0] and _drain(sock):
+                    next_check = min(next_check, time.monotonic() + WATCH_SETTLE_S)
+    finally:
+        if sock is not None:
+            sock.close()
+    return written
 
-    report = {"meta": meta, "policy": policy, "analysis": analysis_obj, "evidence": evidence, "extra": extra}
-    write_json(bundle / "report.json", report)
-    write_text(bundle / "report.md", render_md(meta, analysis_obj, extra))
-    write_hashes(bundle)
 
+def cmd_run(args: argparse.Namespace) -> int:
+    bundle = run_bundle(
+        load_policy(Path(args.policy).resolve()), Path(args.output).resolve(),
+        workers=args.workers, budget_s=args.budget, collector=args.collector,
+        scan_subnet=args.scan_subnet, large_scan=bool(args.i_understand_large_scan),
+    )
     print(str(bundle))
     return 0
 
 
 def cmd_verify(args: argparse.Namespace) -> int:
-    bundle = Path(args.bundle).resolve()
-    hashes_path = bundle / "hashes.txt"
-    if not hashes_path.exists():
+    bundles = [Path(b).resolve() for b in args.bundle]
+    for root in args.root:
+        bundles.extend(find_bundles(Path(root).resolve()))
+    bundles = list(dict.fromkeys(bundles))
+    if not bundles:
+        raise SystemExit("no bundles to verify (use --bundle and/or --root)")
+    if len(bundles) == 1 and not args.root and not (bundles[0] / "hashes.txt").exists():
         raise SystemExit("hashes.txt not found in bundle")
 
-    expected = {}
-    for line in hashes_path.read_text(encoding="utf-8", errors="replace").splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        parts = line.split()
-        if len(parts) >= 2:
-            expected[parts[1]] = parts[0]
+    results: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=max(1, int(args.workers))) as pool:
+        for bundle in bundles:
+            res = verify_bundle(bundle, pool, fail_fast=args.fail_fast)
+            results.append(res)
+            if args.fail_fast and not res["ok"]:
+                break
+    failed = [r for r in results if not r["ok"]]
+
+    if args.json:
+        write_json(Path(args.json), {
+            "tool": {"name": TOOL_DISPLAY_NAME, "version": TOOL_VERSION},
+            "time_utc": utcnow_iso(),
+            "fail_fast": bool(args.fail_fast),
+            "bundles_total": len(bundles),
+            "bundles_checked": len(results),
+            "bundles_ok": len(results) - len(failed),
+            "bundles_failed": len(failed),
+            "bundles": results,
+        })
+
+    if len(bundles) == 1:
+        res = results[0]
+        if res["ok"]:
+            print("OK: bundle integrity verified")
+            return 0
+        if res["missing"]:
+            print("MISSING FILES:")
+            for rel in res["missing"]:
+                print(f"  - {rel}")
+        if res["size_mismatches"]:
+            print("SIZE MISMATCHES:")
+            for m in res["size_mismatches"]:
+                print(f"  - {m['file']}\n    expected: {m['expected']} bytes\n    actual:   {m['actual']} bytes")
+        if res["mismatches"]:
+            print("HASH MISMATCHES:")
+            for m in res["mismatches"]:
+                print(f"  - {m['file']}\n    expected: {m['expected']}\n    actual:   {m['actual']}")
+        return 2
+
+    for res in results:
+        if res["ok"]:
+            print(f"OK    {res['bundle']}")
+        else:
+            problems = res.get("error") or ", ".join(
+                f"{label}: {len(res[k])}" for k, label in (("missing", "missing"), ("size_mismatches", "size mismatches"),
+                                                           ("mismatches", "hash mismatches")) if res[k])
+            print(f"FAIL  {res['bundle']}: {problems}")
+    skipped = len(bundles) - len(results)
+    print(f"[summary] bundles={len(bundles)} ok={len(results) - len(failed)} failed={len(failed)}"
+          + (f" not_checked={skipped}" if skipped else ""))
+    return 2 if failed else 0
+
+
+def cmd_aggregate(args: argparse.Namespace) -> int:
+    fleet = aggregate_reports(args.paths, latest_per_host=args.latest_per_host)
+    out = Path(args.output).resolve()
+    safe_mkdir(out)
+    write_json(out / "fleet.json", fleet)
+    write_text(out / "fleet.md", render_fleet_md(fleet))
+    print(f"[summary] reports={fleet['reports']} hosts={fleet['hosts']} pass={fleet['overall_pass']} "
+          f"fail={fleet['overall_fail']} unreadable={len(fleet['errors'])}")
+    print(str(out))
+    return 0
 
-    missing, mismatches = [], []
-    for rel, h in expected.items():
-        p = bundle / rel
-        if not p.exists():
-            missing.append(rel)
-            continue
-        actual = sha256_file(p)
-        if actual.lower() != h.lower():
-            mismatches.append((rel, h, actual))
 
-    if not missing and not mismatches:
-        print("OK: bundle integrity verified")
-        return 0
+def cmd_reanalyze(args: argparse.Namespace) -> int:
+    policy = load_policy(Path(args.policy).resolve())
+    compiled = CompiledPolicy(policy)
+    bundles: List[Path] = []
+    for raw in args.bundles:
+        path = Path(raw).resolve()
+        bundles.extend([path] if (path / "raw").is_dir() else sorted(p.parent for p in path.rglob("raw") if p.is_dir()))
+    bundles = list(dict.fromkeys(bundles))
+    if not bundles:
+        raise SystemExit("no bundles found (a bundle is a folder with a raw/ directory)")
+
+    results = []
+    for bundle in bundles:
+        meta: Dict[str, Any] = {}
+        try:
+            with (bundle / "report.json").open("rb") as f:
+                meta = read_report_keys(f, {"meta"}).get("meta") or {}
+        except (OSError, ValueError):
+            pass
+        analysis_obj = compiled.analyze(load_raw_evidence(bundle))
+        results.append({"bundle": str(bundle), "host": meta.get("host"), "time_utc": meta.get("time_utc"), "analysis": analysis_obj})
+        print(f"{'PASS' if analysis_obj['overall_pass'] else 'FAIL'}  {bundle}")
+
+    failed = sum(1 for r in results if not r["analysis"]["overall_pass"])
+    if args.output:
+        write_json(Path(args.output), {
+            "tool": {"name": TOOL_DISPLAY_NAME, "version": TOOL_VERSION},
+            "time_utc": utcnow_iso(),
+            "policy": policy,
+            "bundles": results,
+        })
+    print(f"[summary] bundles={len(results)} pass={len(results) - failed} fail={failed} policy={compiled.name!r}")
+    return 0
+
+
+def cmd_diff(args: argparse.Namespace) -> int:
+    a, b = Path(args.a).resolve(), Path(args.b).resolve()
+    for bundle in (a, b):
+        if not (bundle / "hashes.txt").is_file():
+            raise SystemExit(f"hashes.txt not found in bundle: {bundle}")
+    result = diff_bundles(a, b)
+    text = json.dumps(result, separators=(",", ":"))
+    if args.output:
+        write_text(Path(args.output), text + "\n")
+    else:
+        print(text)
+    return 1 if result["changed"] else 0
+
 
-    if missing:
-        print("MISSING FILES:")
-        for rel in missing:
-            print(f"  - {rel}")
-    if mismatches:
-        print("HASH MISMATCHES:")
-        for rel, exp, act in mismatches:
-            print(f"  - {rel}\n    expected: {exp}\n    actual:   {act}")
-    return 2
+def cmd_watch(args: argparse.Namespace) -> int:
+    if args.interval < 1 or args.max_interval < args.interval:
+        raise SystemExit("--interval must be at least 1 s and --max-interval at least --interval")
+    policy = load_policy(Path(args.policy).resolve())
+    stopping = []
+
+    def request_stop(signum: int, frame: Any) -> None:
+        stopping.append(signum)
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, request_stop)
+    written = watch(policy, Path(args.output).resolve(), interval_s=args.interval, max_interval_s=args.max_interval,
+                    stop=lambda: bool(stopping), workers=args.workers, budget_s=args.budget, collector=args.collector)
+    print(f"[summary] bundles={written}")
+    return 0
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -504,14 +2304,50 @@ def main(argv: Optional[List[str]] = None) -> int:
     p_run = sub.add_parser("run", help="collect evidence and generate a report bundle")
     p_run.add_argument("--policy", required=True, help="path to policy JSON file")
     p_run.add_argument("--output", required=True, help="output directory root")
-    p_run.add_argument("--scan-subnet", default=None, help="optional CIDR to ping-sweep (e.g., 192.168.10.0/24)")
+    p_run.add_argument("--scan-subnet", default=None, help="optional CIDR to sweep with TCP/ICMP probes (e.g., 192.168.10.0/24)")
     p_run.add_argument("--i-understand-large-scan", action="store_true", help="allow scans larger than policy max_prefixlen")
+    p_run.add_argument("--workers", type=int, default=DEFAULT_COLLECT_WORKERS, help=f"evidence commands to run in parallel (default: {DEFAULT_COLLECT_WORKERS})")
+    p_run.add_argument("--budget", type=float, default=DEFAULT_COLLECT_BUDGET_S, help=f"wall-clock budget in seconds for all evidence commands (default: {DEFAULT_COLLECT_BUDGET_S})")
+    p_run.add_argument("--collector", choices=("auto", "shell"), default="auto",
+                       help="auto: on Linux read procfs/sysfs/netlink in-process and fall back to shell commands per group; shell: always run the commands (default: auto)")
     p_run.set_defaults(func=cmd_run)
 
+    p_watch = sub.add_parser("watch", help="stay running; collect a bundle only when network state changes or --max-interval passes")
+    p_watch.add_argument("--policy", required=True, help="path to policy JSON file")
+    p_watch.add_argument("--output", required=True, help="output directory root")
+    p_watch.add_argument("--interval", type=float, default=DEFAULT_WATCH_INTERVAL_S, help=f"seconds between cheap change checks (default: {DEFAULT_WATCH_INTERVAL_S:g})")
+    p_watch.add_argument("--max-interval", type=float, default=DEFAULT_WATCH_MAX_INTERVAL_S, help=f"collect a bundle at least this often, in seconds, even without changes (default: {DEFAULT_WATCH_MAX_INTERVAL_S:g})")
+    p_watch.add_argument("--workers", type=int, default=DEFAULT_COLLECT_WORKERS, help=f"evidence commands to run in parallel (default: {DEFAULT_COLLECT_WORKERS})")
+    p_watch.add_argument("--budget", type=float, default=DEFAULT_COLLECT_BUDGET_S, help=f"wall-clock budget in seconds for all evidence commands (default: {DEFAULT_COLLECT_BUDGET_S})")
+    p_watch.add_argument("--collector", choices=("auto", "shell"), default="auto", help="evidence collector backend, as for run (default: auto)")
+    p_watch.set_defaults(func=cmd_watch)
+
     p_ver = sub.add_parser("verify", help="verify hashes in an evidence bundle")
-    p_ver.add_argument("--bundle", required=True, help="path to a bundle folder containing hashes.txt")
+    p_ver.add_argument("--bundle", action="append", default=[], help="path to a bundle folder containing hashes.txt (repeatable)")
+    p_ver.add_argument("--root", action="append", default=[], help="verify every bundle (folder with hashes.txt) under this directory (repeatable)")
+    p_ver.add_argument("--workers", type=int, default=DEFAULT_VERIFY_WORKERS, help=f"files hashed in parallel (default: {DEFAULT_VERIFY_WORKERS})")
+    p_ver.add_argument("--fail-fast", action="store_true", help="stop at the first missing, resized or mismatched file")
+    p_ver.add_argument("--json", default="", help="write one consolidated JSON result for all bundles to this path")
     p_ver.set_defaults(func=cmd_verify)
 
+    p_re = sub.add_parser("reanalyze", help="re-evaluate existing bundles' raw/ outputs against a policy")
+    p_re.add_argument("bundles", nargs="+", help="bundle folders, or directories to search for bundles")
+    p_re.add_argument("--policy", required=True, help="path to policy JSON file")
+    p_re.add_argument("--output", default="", help="write all results as one JSON file to this path")
+    p_re.set_defaults(func=cmd_reanalyze)
+
+    p_diff = sub.add_parser("diff", help="show what changed between two bundles of a host as compact JSON")
+    p_diff.add_argument("a", help="older bundle folder (e.g. the last compliant run)")
+    p_diff.add_argument("b", help="newer bundle folder")
+    p_diff.add_argument("--output", default="", help="write the JSON delta to this path instead of stdout")
+    p_diff.set_defaults(func=cmd_diff)
+
+    p_agg = sub.add_parser("aggregate", help="roll many report.json files (folders or zips) up into a fleet summary")
+    p_agg.add_argument("paths", nargs="+", help="report.json files, bundle folders/archives, or zips of bundles")
+    p_agg.add_argument("--output", required=True, help="directory for fleet.json and fleet.md")
+    p_agg.add_argument("--latest-per-host", action="store_true", help="keep only the newest report of each host")
+    p_agg.set_defaults(func=cmd_aggregate)
+
     args = parser.parse_args(argv)
     return int(args.func(args))
 
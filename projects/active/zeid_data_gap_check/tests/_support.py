@@ -0,0 +1,59 @@
+"""Shared helpers for the GapCheck tests: import path, fixtures and bundles from a fake Linux host."""
+
+from __future__ import annotations
+
+import copy
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+from unittest import mock
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+import gapcheck  # noqa: E402
+
+# command prefix → stdout of the fake host; anything else is "not found"
+HOST_OUTPUTS = {
+    "ip -details addr show": (FIXTURES / "ip_details_addr_show.txt").read_text(encoding="utf-8"),
+    "ip route show": (FIXTURES / "ip_route_show.txt").read_text(encoding="utf-8"),
+    "ip -6 route show": (FIXTURES / "linux_host" / "ip_6_route_show.txt").read_text(encoding="utf-8"),
+    "ss -lntuap": (FIXTURES / "ss_lntuap.txt").read_text(encoding="utf-8"),
+    "ip neigh show": (FIXTURES / "ip_neigh_show.txt").read_text(encoding="utf-8"),
+    "nft list ruleset": (FIXTURES / "nft_list_ruleset.txt").read_text(encoding="utf-8"),
+    "iptables -S": (FIXTURES / "iptables_S.txt").read_text(encoding="utf-8"),
+    "cat /etc/resolv.conf": "# managed by NetworkManager\nnameserver 10.0.0.53\nnameserver 8.8.8.8",
+    "ufw status verbose": "Status: active",
+}
+
+
+def load_policy(**overrides) -> dict:
+    """policy.sample.json without the live connectivity test, plus ``overrides``."""
+    policy = copy.deepcopy(gapcheck.load_policy(PROJECT_DIR / "policy.sample.json"))
+    policy["connectivity_test"]["enabled"] = False
+    policy.update(overrides)
+    return policy
+
+
+def fake_run_cmd(outputs: Dict[str, str], duration_ms: int = 3):
+    def run_cmd(cmd: str, timeout: float = gapcheck.CMD_TIMEOUT_S) -> gapcheck.CmdResult:
+        for prefix, stdout in outputs.items():
+            if cmd.startswith(prefix):
+                return gapcheck.CmdResult(ok=True, exit_code=0, stdout=stdout.strip(), stderr="", cmd=cmd,
+                                          duration_ms=duration_ms)
+        if cmd.startswith("resolvectl"):
+            return gapcheck.CmdResult(ok=False, exit_code=124, stdout="", stderr=gapcheck.TIMEOUT_STDERR, cmd=cmd)
+        return gapcheck.CmdResult(ok=False, exit_code=127, stdout="", stderr=f"sh: 1: {cmd.split()[0]}: not found", cmd=cmd)
+    return run_cmd
+
+
+def make_bundle(root: Path, policy: dict, outputs: Optional[Dict[str, str]] = None, collector: str = "shell",
+                duration_ms: int = 3) -> Path:
+    """One ``run`` on the fake Linux host; ``outputs`` replaces HOST_OUTPUTS."""
+    with mock.patch.object(gapcheck.platform, "system", return_value="Linux"), \
+            mock.patch.object(gapcheck, "run_cmd", fake_run_cmd(HOST_OUTPUTS if outputs is None else outputs, duration_ms)), \
+            mock.patch.object(gapcheck, "PROC_NET", FIXTURES / "linux_host" / "proc_net"):
+        return gapcheck.run_bundle(policy, root, collector=collector)
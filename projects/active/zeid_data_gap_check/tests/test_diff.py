@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests._support import HOST_OUTPUTS, load_policy, make_bundle
+
+import gapcheck
+
+
+def changed_outputs() -> dict:
+    """HOST_OUTPUTS after a WWAN modem came up, a listener appeared, a rule was added and DNS moved."""
+    out = dict(HOST_OUTPUTS)
+    out["ip route show"] += "\ndefault via 203.0.113.1 dev wwan0 proto dhcp metric 50"
+    out["ss -lntuap"] += '\ntcp   LISTEN 0      5           0.0.0.0:4444       0.0.0.0:*     users:(("nc",pid=9001,fd=3))'
+    out["ip neigh show"] = out["ip neigh show"].replace("192.0.2.1 dev br0 lladdr 00:1b:21:aa:bb:01",
+                                                        "192.0.2.1 dev br0 lladdr de:ad:be:ef:00:01")
+    out["iptables -S"] += "\n-A ufw-user-input -p tcp -m tcp --dport 4444 -j ACCEPT"
+    out["cat /etc/resolv.conf"] = out["cat /etc/resolv.conf"].replace("8.8.8.8", "9.9.9.9")
+    return out
+
+
+class DiffBundlesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.policy = load_policy()
+        self.a = make_bundle(self.tmp / "a", self.policy)
+        self.raw_count = len(list((self.a / "raw").iterdir()))
+
+    def test_identical_bundles(self) -> None:
+        b = make_bundle(self.tmp / "b", self.policy)
+        result = gapcheck.diff_bundles(self.a, b)
+        self.assertFalse(result["changed"])
+        self.assertEqual(result["files"], {"identical": self.raw_count, "same_output": 0, "changed": 0})
+        self.assertEqual(result["changed_groups"], [])
+        self.assertNotIn("delta", result)
+
+    def test_only_durations_differ(self) -> None:
+        b = make_bundle(self.tmp / "b", self.policy, duration_ms=250)
+        result = gapcheck.diff_bundles(self.a, b)
+        # commands that answered carry the new duration; "not found" and timeouts report 0 in both runs
+        timed = sum(1 for p in (b / "raw").iterdir() if "duration_ms: 250" in p.read_text(encoding="utf-8"))
+        self.assertFalse(result["changed"])
+        self.assertEqual(result["files"], {"identical": self.raw_count - timed, "same_output": timed, "changed": 0})
+
+    def test_changed_groups_and_deltas(self) -> None:
+        b = make_bundle(self.tmp / "b", self.policy, outputs=changed_outputs())
+        result = gapcheck.diff_bundles(self.a, b)
+        self.assertTrue(result["changed"])
+        self.assertEqual(result["changed_groups"], ["arp", "dns", "firewall", "listening_ports", "routes"])
+        self.assertEqual(result["files"]["changed"], 5)
+        delta = result["delta"]
+        self.assertEqual(delta["default_gateways"], {"added": ["203.0.113.1"]})
+        self.assertEqual(delta["routes"], {"added": ["default via 203.0.113.1 dev wwan0"]})
+        self.assertEqual(delta["listening"], {"added": ["tcp 0.0.0.0:4444 (nc)"]})
+        self.assertEqual(delta["neighbors"], {"lladdr_changed": {"192.0.2.1": ["00:1b:21:aa:bb:01", "de:ad:be:ef:00:01"]}})
+        self.assertEqual(delta["firewall"], {"rules": {"added": ["ip filter ufw-user-input: -p tcp -m tcp --dport 4444 -j ACCEPT"]}})
+        self.assertEqual(delta["dns_servers"], {"added": ["9.9.9.9"], "removed": ["8.8.8.8"]})
+        # DNS has no records: resolver lines are listed next to the extracted servers
+        self.assertEqual(delta["lines"], {"dns": {"added": ["nameserver 9.9.9.9"], "removed": ["nameserver 8.8.8.8"]}})
+
+    def test_check_outcomes_are_compared(self) -> None:
+        outputs = dict(HOST_OUTPUTS, **{"cat /etc/resolv.conf": "nameserver 10.0.0.53"})
+        b = make_bundle(self.tmp / "b", self.policy, outputs=outputs)
+        result = gapcheck.diff_bundles(self.a, b)
+        self.assertEqual(result["checks"], {"dns_allowed": [False, True]})
+        self.assertEqual(result["delta"]["dns_servers"], {"removed": ["8.8.8.8"]})
+
+    def test_group_without_records_falls_back_to_lines(self) -> None:
+        outputs = dict(HOST_OUTPUTS, **{"nmcli radio all": "WIFI-HW  WIFI     WWAN-HW  WWAN\nenabled  enabled  missing  enabled"})
+        b = make_bundle(self.tmp / "b", self.policy, outputs=outputs)
+        result = gapcheck.diff_bundles(self.a, b)
+        self.assertEqual(result["changed_groups"], ["wifi"])
+        self.assertEqual(result["delta"], {"lines": {"wifi": {"added": ["WIFI-HW  WIFI     WWAN-HW  WWAN",
+                                                                         "enabled  enabled  missing  enabled"]}}})
+
+    def tamper(self, bundle: Path, rel: str) -> None:
+        """Hide a real output change by copying ``rel``'s output_sha256 from ``self.a`` into hashes.json."""
+        hashes = json.loads((bundle / "hashes.json").read_text(encoding="utf-8"))
+        hashes["files"][rel]["output_sha256"] = json.loads(
+            (self.a / "hashes.json").read_text(encoding="utf-8"))["files"][rel]["output_sha256"]
+        (bundle / "hashes.json").write_text(json.dumps(hashes, indent=2), encoding="utf-8")
+
+    def test_edited_hashes_json_is_not_trusted(self) -> None:
+        b = make_bundle(self.tmp / "b", self.policy, outputs=changed_outputs(), duration_ms=250)
+        self.tamper(b, "raw/routes_01.txt")
+        self.assertEqual(gapcheck.read_hashes_json(b, gapcheck.read_hashes(b)), ({}, False))
+        result = gapcheck.diff_bundles(self.a, b)
+        self.assertIn("routes", result["changed_groups"])
+        self.assertEqual(result["delta"]["default_gateways"], {"added": ["203.0.113.1"]})
+
+    def test_unsealed_hashes_json_is_not_trusted(self) -> None:
+        # a bundle from before hashes.txt listed hashes.json, edited the same way
+        b = make_bundle(self.tmp / "b", self.policy, outputs=changed_outputs(), duration_ms=250)
+        self.tamper(b, "raw/routes_01.txt")
+        hashes_txt = b / "hashes.txt"
+        hashes_txt.write_text("".join(ln for ln in hashes_txt.read_text(encoding="utf-8").splitlines(keepends=True)
+                                      if not ln.rstrip().endswith("  hashes.json")), encoding="utf-8")
+        self.assertEqual(gapcheck.read_hashes_json(b, gapcheck.read_hashes(b))[1], False)
+        result = gapcheck.diff_bundles(self.a, b)
+        self.assertIn("routes", result["changed_groups"])
+        self.assertEqual(result["delta"]["routes"], {"added": ["default via 203.0.113.1 dev wwan0"]})
+
+    def test_raw_file_on_one_side_only(self) -> None:
+        b = make_bundle(self.tmp / "b", self.policy)
+        (b / "raw" / "routes_03.txt").write_text(
+            "## cmd: ip route show table 100\n## ok: True  exit_code: 0\n## stdout:\n10.0.0.0/8 dev eth0\n", encoding="utf-8")
+        with (b / "hashes.txt").open("a", encoding="utf-8") as f:
+            f.write(f"{gapcheck.sha256_file(b / 'raw' / 'routes_03.txt')}  raw/routes_03.txt\n")
+        result = gapcheck.diff_bundles(self.a, b)
+        self.assertEqual(result["files"], {"identical": self.raw_count, "same_output": 0, "changed": 1})
+        self.assertEqual(result["delta"]["routes"], {"added": ["10.0.0.0/8 dev eth0"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from tests._support import FIXTURES
+
+import gapcheck
+
+# /proc/net and the `ip`/`ss` outputs captured on the same host at the same time
+LINUX_HOST = FIXTURES / "linux_host"
+
+# socket inode → owners, as _socket_owners would read them from /proc/<pid>/fd on that host
+OWNERS = {
+    "80143": [("python3", 21216, 3)],
+    "80144": [("python3", 21216, 4)],
+    "80145": [("python3", 21216, 5)],
+    "80146": [("python3", 21216, 6)],
+}
+
+
+def shell(name: str) -> str:
+    return (LINUX_HOST / name).read_text(encoding="utf-8")
+
+
+def route_key(rt: dict) -> tuple:
+    # procfs has no proto, scope or src
+    return rt["type"], rt["dst"], rt.get("via"), rt.get("dev"), rt.get("metric", 0)
+
+
+def socket_key(sk: dict) -> tuple:
+    return (sk["proto"], sk["state"], sk["local_address"], sk["local_port"], sk["peer_address"], sk["peer_port"],
+            sk["processes"])
+
+
+class NativeMatchesShellTest(unittest.TestCase):
+    """The native readers over the captured /proc/net files parse to the same records as the commands they replace."""
+
+    def setUp(self) -> None:
+        patcher = mock.patch.object(gapcheck, "PROC_NET", LINUX_HOST / "proc_net")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_routes(self) -> None:
+        native = gapcheck.parse_ip_route(gapcheck.native_routes())["routes"]
+        expected = gapcheck.parse_ip_route(shell("ip_route_show.txt"))["routes"]
+        self.assertEqual(sorted(map(route_key, native)), sorted(map(route_key, expected)))
+
+    def test_unreachable_route_has_no_device(self) -> None:
+        self.assertIn("unreachable 203.0.113.0/24\n", gapcheck.native_routes() + "\n")
+
+    def test_routes6(self) -> None:
+        native = gapcheck.parse_ip6_route(gapcheck.native_routes6())["routes"]
+        expected = gapcheck.parse_ip6_route(shell("ip_6_route_show.txt"))["routes"]
+        self.assertEqual(sorted(map(route_key, native)), sorted(map(route_key, expected)))
+
+    def test_neighbors(self) -> None:
+        native = gapcheck.parse_ip_neigh(gapcheck.native_neighbors())["neighbors"]
+        expected = gapcheck.parse_ip_neigh(shell("ip_neigh_show.txt"))["neighbors"]
+        self.assertEqual([(n["ip"], n["dev"], n["lladdr"]) for n in native],
+                         [(n["ip"], n["dev"], n["lladdr"]) for n in expected])
+        # /proc/net/arp only tells permanent entries apart, not STALE from REACHABLE
+        self.assertEqual([n["state"] == "PERMANENT" for n in native], [n["state"] == "PERMANENT" for n in expected])
+
+    def test_sockets(self) -> None:
+        with mock.patch.object(gapcheck, "_socket_owners", return_value=OWNERS):
+            native = gapcheck.parse_ss(gapcheck.native_sockets())["sockets"]
+        expected = gapcheck.parse_ss(shell("ss_lntuap.txt"))["sockets"]
+        self.assertEqual(sorted(map(socket_key, native)), sorted(map(socket_key, expected)))
+
+    def test_socket_without_an_owner_has_no_users_column(self) -> None:
+        with mock.patch.object(gapcheck, "_socket_owners", return_value={}):
+            rows = gapcheck.native_sockets().splitlines()
+        self.assertIn("tcp LISTEN 0 0 0.0.0.0:2024 0.0.0.0:*", rows)
+
+    def test_missing_ipv6_tables_are_skipped(self) -> None:
+        with mock.patch.object(gapcheck, "PROC_NET", LINUX_HOST / "missing"), \
+                mock.patch.object(gapcheck, "_socket_owners", return_value={}):
+            self.assertEqual(gapcheck.parse_ss(gapcheck.native_sockets()), {"sockets": []})
+
+
+@unittest.skipUnless(sys.platform.startswith("linux") and shutil.which("ip"), "needs Linux and iproute2")
+class NativeInterfacesLiveTest(unittest.TestCase):
+    def test_matches_ip_details_addr(self) -> None:
+        out = subprocess.run(["ip", "-details", "addr", "show"], capture_output=True, text=True, check=True).stdout
+        native = gapcheck.parse_ip_addr(gapcheck.native_interfaces())["interfaces"]
+        expected = gapcheck.parse_ip_addr(out)["interfaces"]
+
+        def key(i: dict) -> tuple:
+            return (i["index"], i["name"], i["parent"], i["state"], i["mtu"], i["link_type"], i["mac"], i["kind"],
+                    sorted(i["ipv4"]), sorted(i["ipv6"]))
+
+        self.assertEqual(list(map(key, native)), list(map(key, expected)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from tests._support import load_policy, make_bundle
+
+import gapcheck
+
+
+def report(bundle: Path) -> dict:
+    return json.loads((bundle / "report.json").read_text(encoding="utf-8"))
+
+
+class ReanalyzeMatchesRunTest(unittest.TestCase):
+    """Re-evaluating a bundle's raw/ files gives what ``run`` decided from the live evidence."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def test_same_analysis_and_records(self) -> None:
+        policies = {
+            "sample": load_policy(),
+            "strict": load_policy(fail_on_incomplete_evidence=True, allowed_dns=["10.0.0.53", "8.8.8.8"]),
+        }
+        for collector in ("shell", "auto"):
+            for name, policy in policies.items():
+                with self.subTest(collector=collector, policy=name):
+                    bundle = make_bundle(self.tmp / f"{collector}-{name}", policy, collector=collector)
+                    stored = report(bundle)
+                    evidence = gapcheck.load_raw_evidence(bundle)
+                    self.assertEqual(evidence["commands"], stored["evidence"]["commands"])
+                    self.assertEqual(evidence["raw_files"], stored["evidence"]["raw_files"])
+                    self.assertEqual(evidence["records"], stored["records"])
+                    self.assertEqual(gapcheck.analyze(policy, evidence), stored["analysis"])
+
+    def test_fixture_host_fails_the_sample_policy(self) -> None:
+        # guards the test above against comparing two empty analyses
+        analysis = report(make_bundle(self.tmp, load_policy()))["analysis"]
+        failed = {c["check"] for c in analysis["checks"] if not c["pass"]}
+        self.assertFalse(analysis["overall_pass"])
+        self.assertIn("no_default_gateway", failed)
+        self.assertEqual(analysis["normalized"]["detected_gateways"], ["192.0.2.1", "198.51.100.1", "10.8.0.1"])
+        self.assertEqual(analysis["normalized"]["dns_flagged"], ["8.8.8.8"])
+
+    def test_reanalyze_command(self) -> None:
+        policy = load_policy()
+        bundles = [make_bundle(self.tmp / "a", policy), make_bundle(self.tmp / "b", policy, outputs={})]
+        policy_path, out = self.tmp / "policy.json", self.tmp / "reanalyzed.json"
+        gapcheck.write_json(policy_path, policy)
+        with redirect_stdout(StringIO()):
+            # a directory is searched for bundles, a bundle given twice is analysed once
+            self.assertEqual(gapcheck.main(["reanalyze", "--policy", str(policy_path), "--output", str(out),
+                                            str(self.tmp), str(bundles[0])]), 0)
+        results = {r["bundle"]: r["analysis"] for r in json.loads(out.read_text(encoding="utf-8"))["bundles"]}
+        self.assertEqual(results, {str(b.resolve()): report(b)["analysis"] for b in bundles})
+
+
+class RawRoundTripTest(unittest.TestCase):
+    def round_trip(self, result: gapcheck.CmdResult) -> gapcheck.CmdResult:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "raw").mkdir()
+            rel = gapcheck.save_raw(gapcheck.BundleWriter(root), "routes_01", result)
+            return gapcheck.parse_raw((root / rel).read_text(encoding="utf-8"))
+
+    def test_save_raw_and_parse_raw_are_inverse(self) -> None:
+        for result in (
+            gapcheck.CmdResult(ok=True, exit_code=0, stdout="default via 192.0.2.1 dev eth0", stderr="", cmd="ip route show",
+                               duration_ms=4),
+            gapcheck.CmdResult(ok=True, exit_code=0, stdout="", stderr="", cmd="native:routes6"),
+            gapcheck.CmdResult(ok=False, exit_code=2, stdout="partial\n\n", stderr="Error: syntax error\nline 2",
+                               cmd="nft list ruleset", duration_ms=12),
+            gapcheck.CmdResult(ok=True, exit_code=0, stdout="## stdout:\n## ok: False  exit_code: 9", stderr="",
+                               cmd="cat /etc/resolv.conf"),
+            gapcheck.CmdResult(ok=False, exit_code=-9, stdout="", stderr=gapcheck.TIMEOUT_STDERR, cmd="resolvectl status"),
+        ):
+            with self.subTest(result.cmd):
+                self.assertEqual(self.round_trip(result), result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import unittest
+from unittest import mock
+
+from tests._support import FIXTURES
+
+import gapcheck
+
+# fixture stem → parser; each <stem>.txt has its expected records in <stem>.json
+PARSER_FIXTURES = (
+    ("ip_details_addr_show", gapcheck.parse_ip_addr),
+    ("ip_route_show", gapcheck.parse_ip_route),
+    ("ip_neigh_show", gapcheck.parse_ip_neigh),
+    ("ss_lntuap", gapcheck.parse_ss),
+    ("nft_list_ruleset", gapcheck.parse_nft),
+    ("iptables_S", gapcheck.parse_iptables_s),
+)
+
+
+def fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def command(cmd: str, stdout: str, exit_code: int = 0) -> dict:
+    return gapcheck.CmdResult(ok=exit_code == 0, exit_code=exit_code, stdout=stdout, stderr="", cmd=cmd).to_dict()
+
+
+def linux_commands() -> dict:
+    with mock.patch.object(gapcheck.platform, "system", return_value="Linux"):
+        return gapcheck.collect_platform_commands()
+
+
+class RecordParserTest(unittest.TestCase):
+    def test_fixtures_parse_to_the_recorded_records(self) -> None:
+        for stem, parser in PARSER_FIXTURES:
+            with self.subTest(stem):
+                expected = json.loads(fixture(f"{stem}.json"))
+                self.assertEqual(parser(fixture(f"{stem}.txt")), expected)
+
+    def test_empty_output(self) -> None:
+        # "parsed, nothing found" for listings that may be empty ...
+        self.assertEqual(gapcheck.parse_ip_route(""), {"routes": []})
+        self.assertEqual(gapcheck.parse_ip_neigh(""), {"neighbors": []})
+        self.assertEqual(gapcheck.parse_ip_addr(""), {"interfaces": []})
+        # ... and "not parsed" where empty output means the tool is missing (`|| true`)
+        self.assertIsNone(gapcheck.parse_nft(""))
+        self.assertIsNone(gapcheck.parse_iptables_s(""))
+        self.assertIsNone(gapcheck.parse_ss(""))
+
+    def test_unrecognised_output_is_not_parsed(self) -> None:
+        netstat = "Active Internet connections (only servers)\ntcp 0 0 0.0.0.0:22 0.0.0.0:* LISTEN 981/sshd"
+        self.assertIsNone(gapcheck.parse_ss(netstat))
+        self.assertIsNone(gapcheck.parse_ip_addr("lo0: flags=8049<UP,LOOPBACK,RUNNING,MULTICAST> mtu 16384"))
+        self.assertIsNone(gapcheck.parse_ip_neigh("? (192.0.2.1) at 00:1b:21:aa:bb:01 [ether] on br0"))
+
+    def test_ipv6_routes_are_tagged_inet6(self) -> None:
+        routes = gapcheck.parse_ip6_route(fixture("linux_host/ip_6_route_show.txt"))["routes"]
+        self.assertEqual({rt["family"] for rt in routes}, {"inet6"})
+        self.assertIn({"family": "inet6", "type": "unicast", "dst": "default", "via": "fd00::1", "dev": "eth0",
+                       "metric": 1024, "pref": "medium"}, routes)
+
+
+class RecordDispatchTest(unittest.TestCase):
+    def test_every_parser_prefix_matches_a_collected_command(self) -> None:
+        cmds = [c for group in linux_commands().values() for c in group]
+        native = {f"native:{name}" for readers in gapcheck.NATIVE_COLLECTORS.values() for name, _ in readers}
+        for prefix, _ in gapcheck.RECORD_PARSERS:
+            with self.subTest(prefix):
+                if prefix.startswith("native:"):
+                    self.assertIn(prefix, native)
+                else:
+                    self.assertTrue(any(c.startswith(prefix) for c in cmds))
+
+    def test_commands_reach_their_parser(self) -> None:
+        cmds = linux_commands()
+        stdout = {
+            "ip -details addr show": fixture("ip_details_addr_show.txt"),
+            "ip route show": fixture("ip_route_show.txt"),
+            "ip -6 route show": fixture("linux_host/ip_6_route_show.txt"),
+            "ss -lntuap": fixture("ss_lntuap.txt"),
+            "ip neigh show": fixture("ip_neigh_show.txt"),
+            "nft list ruleset": fixture("nft_list_ruleset.txt"),
+            "iptables -S": fixture("iptables_S.txt"),
+        }
+        commands = {group: [command(c, next((v for k, v in stdout.items() if c.startswith(k)), "")) for c in group_cmds]
+                    for group, group_cmds in cmds.items()}
+        records = gapcheck.parse_records(commands)
+        self.assertEqual(sorted(records), ["chains", "default_gateways", "interfaces", "neighbors", "routes", "rules",
+                                           "sockets"])
+        self.assertEqual(len(records["interfaces"]), 6)
+        self.assertEqual({rt["family"] for rt in records["routes"]}, {"inet", "inet6"})
+        # nft and iptables rules are merged, each tagged with its family/table
+        self.assertEqual({(c["family"], c["table"]) for c in records["chains"]},
+                         {("inet", "filter"), ("ip", "nat"), ("netdev", "ingress_guard"), ("ip", "filter")})
+        # multipath next hops count; IPv6 next hops never do
+        self.assertEqual(records["default_gateways"], ["192.0.2.1", "198.51.100.1", "10.8.0.1"])
+
+    def test_native_routes6_is_not_taken_for_routes(self) -> None:
+        records = gapcheck.parse_records({"routes": [
+            command("native:routes", "default via 192.0.2.1 dev eth0"),
+            command("native:routes6", "default via fd00::1 dev eth0 metric 1024"),
+        ]})
+        self.assertEqual([rt["family"] for rt in records["routes"]], ["inet", "inet6"])
+        self.assertEqual(records["default_gateways"], ["192.0.2.1"])
+
+    def test_failed_and_unparsed_commands_add_no_records(self) -> None:
+        records = gapcheck.parse_records({
+            "routes": [command("ip route show", "default via 192.0.2.1 dev eth0", exit_code=1)],
+            "firewall": [command("nft list ruleset 2>/dev/null || true", ""), command("ufw status verbose", "Status: active")],
+        })
+        self.assertEqual(records, {})
+        # a parsed routing table without a default route still answers the gateway check
+        records = gapcheck.parse_records({"routes": [command("ip route show", "192.0.2.0/24 dev eth0 scope link")]})
+        self.assertEqual(records["default_gateways"], [])
+
+    def test_detect_gateways_falls_back_to_the_raw_output(self) -> None:
+        evidence = {"commands": {"routes": [command("netstat -rn", "0.0.0.0  0.0.0.0  192.0.2.1  UGS  en0\n"
+                                                                    "default via 198.51.100.1 dev eth1")]}}
+        self.assertEqual(gapcheck.detect_gateways(evidence), ["198.51.100.1", "192.0.2.1"])
+        evidence["records"] = {"default_gateways": []}
+        self.assertEqual(gapcheck.detect_gateways(evidence), [])
+
+
+if __name__ == "__main__":
+    unittest.main()